@@ -1,18 +1,29 @@
 import pandas as pd
 import numpy as np
-from scipy import stats
-import matplotlib.pyplot as plt
-import seaborn as sns
 from pathlib import Path
-import json
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Tuple, Optional
 import logging
 
+from session_loader import load_sessions, load_sessions_cached, CACHE_NAME
+from stats_engine import StatsEngine
+from resampling import DEFAULT_RESAMPLES, resample
+from figures import render_figures
+
 
 class ExperimentAnalyzer:
-    def __init__(self, data_dir: str = "data"):
+    def __init__(self, data_dir: str = "data", workers: Optional[int] = None, chunk_size: Optional[int] = None,
+                 cache: bool = True, rebuild_cache: bool = False, n_resamples: int = DEFAULT_RESAMPLES, seed: int = 0):
         self.data_dir = Path(data_dir)
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.cache = cache
+        self.rebuild_cache = rebuild_cache
+        self.n_resamples = n_resamples
+        self.seed = seed
         self.df = None
+        self.trials = None  # Temps de réaction individuels (trials.TrialSet)
+        self.load_errors = []
+        self._engine = None
         self.setup_logging()
 
     def setup_logging(self):
@@ -23,49 +34,38 @@ class ExperimentAnalyzer:
         )
 
     def load_data(self) -> pd.DataFrame:
-        data_list = []
-
         try:
-            for file_path in self.data_dir.glob("*.json"):
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-
-                    # Extraire les informations de base du participant
-                    participant_info = data['participant_info']
-                    performance_data = data['performance_data']
-
-                    # Pour chaque évaluation (niveau)
-                    for evaluation in data.get('evaluations', []):
-                        try:
-                            # Création d'une nouvelle entrée pour ce niveau
-                            level_data = {
-                                'participant_id': participant_info['id'],
-                                'age': participant_info['age'],
-                                'gender': participant_info['gender'],
-                                'condition': participant_info['condition'],
-                                'heart_rate_before': participant_info['heart_rate_before'],
-                                'heart_rate_after': participant_info['heart_rate_after'],
-                                'level': evaluation['level'],
-                                'avg_response_time': evaluation['avg_response_time'],
-                                'missed_bonus': performance_data['missed_bonus'],
-                                'command_errors': performance_data['command_errors'],
-                                'performance_eval': evaluation['performance'],
-                                'stress_eval': evaluation['stress'],
-                                'certitude_eval': evaluation['certitude']
-                            }
-                            data_list.append(level_data)
-                        except KeyError as e:
-                            logging.error(f"Données manquantes dans l'évaluation du fichier {file_path}: {str(e)}")
-                            continue
-
-            self.df = pd.DataFrame(data_list)
-            logging.info(f"Données chargées avec succès: {len(self.df)} entrées")
+            # Lecture parallèle, une ligne par participant et niveau (session_loader.py)
+            paths = sorted(self.data_dir.glob("*.json"))
+            if self.cache:
+                # Seuls les fichiers nouveaux ou modifiés depuis le dernier lancement sont relus
+                result = load_sessions_cached(paths, self.data_dir / CACHE_NAME, self.workers, self.chunk_size,
+                                              self.rebuild_cache)
+                counts = result.counts
+                logging.info(f"Cache de lecture: {counts['cached']} fichiers repris, {counts['parsed']} relus, "
+                             f"{counts['removed']} retirés")
+            else:
+                result = load_sessions(paths, self.workers, self.chunk_size)
+            self.df, self.trials, self.load_errors = result.frame, result.trials, result.errors
+
+            if self.load_errors:
+                # Un seul message pour toutes les erreurs de lecture
+                details = "\n".join(f"  {path}: {message}" for path, message in self.load_errors)
+                logging.error(f"{len(self.load_errors)} erreur(s) de lecture dans {len(paths)} fichiers:\n{details}")
+            logging.info(f"Données chargées avec succès: {len(self.df)} entrées, {self.trials.n_trials} essais")
             return self.df
 
         except Exception as e:
             logging.error(f"Erreur lors du chargement des données: {str(e)}")
             raise
 
+    @property
+    def engine(self) -> StatsEngine:
+        """Moteur statistique condition × niveau, partagé par les analyses (reconstruit si les données changent)"""
+        if self._engine is None or self._engine.frame is not self.df:
+            self._engine = StatsEngine(self.df, ('condition', 'level'))
+        return self._engine
+
     def validate_data(self) -> Tuple[bool, List[str]]:
         issues = []
 
@@ -92,26 +92,20 @@ class ExperimentAnalyzer:
         results = {}
 
         try:
-            # Statistiques descriptives
-            results['descriptive'] = self.df.groupby(['condition', 'level'])['avg_response_time'].agg([
-                'count', 'mean', 'std', 'min', 'max'
-            ]).round(3)
-
-            # ANOVA à deux facteurs (condition x niveau)
-            conditions = self.df['condition'].unique()
-            levels = self.df['level'].unique()
-
-            # Préparation des données pour ANOVA
-            response_times = [
-                [self.df[(self.df['condition'] == c) & (self.df['level'] == l)]['avg_response_time'].values
-                 for l in levels]
-                for c in conditions
-            ]
-
-            f_stat, p_value = stats.f_oneway(*[group for sublist in response_times for group in sublist])
+            # Statistiques descriptives (moments par cellule calculés une seule fois)
+            results['descriptive'] = self.engine.describe('avg_response_time').round(3)
+
+            # ANOVA à deux facteurs (condition x niveau) : effets principaux et interaction
+            anova = self.engine.anova('avg_response_time')
             results['anova'] = {
-                'f_statistic': round(f_stat, 3),
-                'p_value': round(p_value, 4)
+                effect: {key: round(value, 4) if isinstance(value, float) else value for key, value in values.items()}
+                for effect, values in anova.items()
+            }
+
+            # Comparaisons post-hoc deux à deux (correction de Holm)
+            results['posthoc'] = {
+                factor: self.engine.posthoc('avg_response_time', factor, anova)
+                for factor in ('condition', 'level')
             }
 
         except Exception as e:
@@ -120,22 +114,33 @@ class ExperimentAnalyzer:
 
         return results
 
+    def analyze_trials(self) -> Dict[str, Any]:
+        results = {}
+
+        try:
+            # Distribution des temps de réaction individuels par condition et niveau (niveau 0 : non renseigné)
+            results['distribution'] = self.trials.grouped_quantiles().round(3)
+            results['trials'] = self.trials.n_trials
+
+        except Exception as e:
+            logging.error(f"Erreur lors de l'analyse des essais: {str(e)}")
+            results['error'] = str(e)
+
+        return results
+
     def analyze_performance_ratings(self) -> Dict[str, Any]:
         results = {}
 
         try:
             # Statistiques descriptives par condition et niveau
-            results['ratings'] = self.df.groupby(['condition', 'level'])[
-                ['performance_eval', 'stress_eval', 'certitude_eval']
-            ].agg(['mean', 'std']).round(2)
+            results['ratings'] = self.engine.describe(
+                ['performance_eval', 'stress_eval', 'certitude_eval'], ('mean', 'std')
+            ).round(2)
 
             # Test de Kruskal-Wallis pour les différences entre conditions
             for metric in ['performance_eval', 'stress_eval']:
                 try:
-                    h_stat, p_value = stats.kruskal(*[
-                        self.df[self.df['condition'] == c][metric].values
-                        for c in self.df['condition'].unique()
-                    ])
+                    h_stat, p_value = self.engine.kruskal(metric, 'condition')
                     results[f'kruskal_{metric}'] = {
                         'h_statistic': round(h_stat, 3),
                         'p_value': round(p_value, 4)
@@ -150,6 +155,22 @@ class ExperimentAnalyzer:
 
         return results
 
+    def analyze_resampling(self) -> Dict[str, Any]:
+        results = {}
+
+        try:
+            # Bootstrap des moyennes de cellule et permutations des effets de l'ANOVA
+            results = resample(
+                self.engine, ['avg_response_time', 'performance_eval', 'stress_eval', 'certitude_eval'],
+                n_resamples=self.n_resamples, seed=self.seed, workers=self.workers
+            )
+            results['bootstrap'] = results['bootstrap'].round(3)
+        except Exception as e:
+            logging.error(f"Erreur lors du rééchantillonnage: {str(e)}")
+            results['error'] = str(e)
+
+        return results
+
     def analyze_heart_rate_impact(self) -> Dict[str, Any]:
         results = {}
 
@@ -158,17 +179,13 @@ class ExperimentAnalyzer:
             self.df['heart_rate_change'] = self.df['heart_rate_after'] - self.df['heart_rate_before']
 
             # Statistiques descriptives par condition
-            results['hr_changes'] = self.df.groupby('condition')['heart_rate_change'].agg([
-                'count', 'mean', 'std'
-            ]).round(2)
+            results['hr_changes'] = self.engine.describe(
+                'heart_rate_change', ('count', 'mean', 'std'), by=['condition']
+            ).round(2)
 
             # T-test apparié pour chaque condition
-            for condition in self.df['condition'].unique():
-                condition_data = self.df[self.df['condition'] == condition]
-                t_stat, p_value = stats.ttest_rel(
-                    condition_data['heart_rate_before'],
-                    condition_data['heart_rate_after']
-                )
+            for condition, (t_stat, p_value) in self.engine.paired_t(
+                    'heart_rate_before', 'heart_rate_after', 'condition').items():
                 results[f'ttest_{condition}'] = {
                     't_statistic': round(t_stat, 3),
                     'p_value': round(p_value, 4)
@@ -180,40 +197,10 @@ class ExperimentAnalyzer:
 
         return results
 
-    def generate_visualizations(self, output_dir: str = "figures"):
+    def generate_visualizations(self, output_dir: str = "figures", force: bool = False) -> Dict[str, str]:
         try:
-            output_path = Path(output_dir)
-            output_path.mkdir(exist_ok=True)
-
-            # Configuration du style
-            plt.style.use('default')
-
-            # 1. Temps de réponse par condition et niveau
-            plt.figure(figsize=(12, 6))
-            sns.boxplot(x='level', y='avg_response_time', hue='condition', data=self.df)
-            plt.title('Temps de réponse par niveau et condition')
-            plt.savefig(output_path / 'response_times.png')
-            plt.close()
-
-            # 2. Évaluations de performance
-            fig, axes = plt.subplots(1, 2, figsize=(15, 6))
-
-            sns.violinplot(x='condition', y='performance_eval', data=self.df, ax=axes[0])
-            axes[0].set_title('Distribution des évaluations de performance')
-
-            sns.violinplot(x='condition', y='stress_eval', data=self.df, ax=axes[1])
-            axes[1].set_title('Distribution des évaluations de stress')
-
-            plt.tight_layout()
-            plt.savefig(output_path / 'performance_ratings.png')
-            plt.close()
-
-            # 3. Changement de fréquence cardiaque
-            plt.figure(figsize=(10, 6))
-            sns.barplot(x='condition', y='heart_rate_change', data=self.df)
-            plt.title('Variation moyenne de la fréquence cardiaque par condition')
-            plt.savefig(output_path / 'heart_rate_changes.png')
-            plt.close()
+            # Rendu parallèle (backend Agg) des seules figures dont les données ont changé
+            return render_figures(self.df, Path(output_dir), workers=self.workers, force=force)
 
         except Exception as e:
             logging.error(f"Erreur lors de la génération des visualisations: {str(e)}")
@@ -243,10 +230,26 @@ class ExperimentAnalyzer:
 
             report.append("2. ANALYSE DES TEMPS DE RÉPONSE\n")
             report.append(str(response_results['descriptive']))
-            report.append(
-                f"\nANOVA: F={response_results['anova']['f_statistic']}, p={response_results['anova']['p_value']}")
+            report.append("\nANOVA à deux facteurs (type II):")
+            for effect, values in response_results['anova'].items():
+                if effect == 'residual':
+                    report.append(f"  résidu: SC={values['sum_sq']}, ddl={values['df']}")
+                else:
+                    report.append(f"  {effect}: F({values['df']}, {response_results['anova']['residual']['df']})"
+                                  f"={values['f_statistic']}, p={values['p_value']}")
+            report.append("Comparaisons post-hoc (Holm):")
+            for factor, contrasts in response_results['posthoc'].items():
+                for contrast in contrasts:
+                    report.append(f"  {factor} {contrast['contrast']}: diff={contrast['difference']:.3f}, "
+                                  f"t={contrast['t_statistic']:.3f}, p={contrast['p_holm']:.4f}")
             report.append("")
 
+            trial_results = self.analyze_trials()
+            if trial_results.get('trials'):
+                report.append(f"Distribution des temps de réaction ({trial_results['trials']} essais):")
+                report.append(trial_results['distribution'].to_string(index=False))
+                report.append("")
+
             report.append("3. ANALYSE DES ÉVALUATIONS\n")
             report.append(str(performance_results['ratings']))
             report.append("")
@@ -255,6 +258,21 @@ class ExperimentAnalyzer:
             report.append(str(heart_rate_results['hr_changes']))
             report.append("")
 
+            # Section facultative : --resamples 0 l'omet
+            resampling_results = self.analyze_resampling() if self.n_resamples > 0 else None
+            if resampling_results is not None and 'error' not in resampling_results:
+                report.append("5. RÉÉCHANTILLONNAGE\n")
+                report.append(f"Intervalles de confiance bootstrap à {resampling_results['confidence']:.0%} "
+                              f"({resampling_results['resamples']} rééchantillonnages, "
+                              f"graine {resampling_results['seed']}):")
+                report.append(str(resampling_results['bootstrap']))
+                report.append("\nTests de permutation (F de type II):")
+                for metric, effects in resampling_results['permutation'].items():
+                    report.append(f"  {metric}:")
+                    for effect, values in effects.items():
+                        report.append(f"    {effect}: F={values['f_statistic']:.3f}, p={values['p_value']:.4f}")
+                report.append("")
+
         except Exception as e:
             logging.error(f"Erreur lors de la génération du rapport: {str(e)}")
             report.append(f"Erreur lors de la génération du rapport: {str(e)}")
@@ -263,7 +281,27 @@ class ExperimentAnalyzer:
 
 
 def main():
-    analyzer = ExperimentAnalyzer()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Analyse statistique des sessions")
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Processus de lecture des fichiers (par défaut, un par cœur)")
+    parser.add_argument("--chunk-size", type=int, default=None, help="Fichiers lus par paquet")
+    parser.add_argument("--no-cache", action="store_true", help="Relire tous les fichiers sans utiliser le cache")
+    parser.add_argument("--rebuild-cache", action="store_true", help="Reconstruire le cache de lecture")
+    parser.add_argument("--resamples", type=int, default=DEFAULT_RESAMPLES,
+                        help="Rééchantillonnages bootstrap et permutations par variable (0 : section omise)")
+    parser.add_argument("--seed", type=int, default=0, help="Graine du rééchantillonnage")
+    parser.add_argument("--redraw-figures", action="store_true",
+                        help="Redessiner toutes les figures, même si leurs données n'ont pas changé")
+    args = parser.parse_args()
+    if args.resamples < 0:
+        parser.error("--resamples doit être positif ou nul")
+
+    analyzer = ExperimentAnalyzer(args.data_dir, workers=args.workers, chunk_size=args.chunk_size,
+                                  cache=not args.no_cache, rebuild_cache=args.rebuild_cache,
+                                  n_resamples=args.resamples, seed=args.seed)
 
     try:
         # Chargement et validation des données
@@ -282,7 +320,7 @@ def main():
         analyzer.analyze_heart_rate_impact()
 
         # Génération des visualisations
-        analyzer.generate_visualizations()
+        analyzer.generate_visualizations(force=args.redraw_figures)
 
         # Génération du rapport
         report = analyzer.generate_report()
@@ -0,0 +1,89 @@
+"""
+Gestionnaire d'images : chargement, redimensionnement et conversion au format
+de l'écran une seule fois, cache disque des images redimensionnées et
+préchargement en arrière-plan.
+"""
+import hashlib
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pygame
+
+ASSET_CACHE_DIR = ".asset_cache"
+
+
+class AssetManager:
+    """
+    Cache des images redimensionnées.
+
+    Le cache disque est indexé par l'empreinte du fichier source et la taille
+    cible ; la conversion au format d'affichage (convert/convert_alpha) est
+    faite une seule fois sur le thread principal.
+    """
+
+    def __init__(self, cache_dir=ASSET_CACHE_DIR, workers=2):
+        self.cache_dir = Path(cache_dir)
+        self.workers = workers
+        self.surfaces = {}
+        self.pending = {}
+        self.executor = None
+
+    def load(self, path, size):
+        """Retourne l'image redimensionnée et convertie (attend un éventuel préchargement)"""
+        key = (str(path), tuple(size))
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            return surface
+
+        future = self.pending.pop(key, None)
+        image = future.result() if future is not None else self.load_scaled(*key)
+        surface = self.surfaces[key] = self.convert(image)
+        return surface
+
+    def preload(self, specs):
+        """Lance en arrière-plan le chargement des images [(chemin, taille), ...]"""
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=self.workers)
+        for path, size in specs:
+            key = (str(path), tuple(size))
+            if key not in self.surfaces and key not in self.pending:
+                self.pending[key] = self.executor.submit(self.load_scaled, *key)
+
+    def load_scaled(self, path, size):
+        """Charge l'image redimensionnée depuis le cache disque, ou la produit et l'y enregistre"""
+        data = Path(path).read_bytes()
+        digest = hashlib.sha1(data).hexdigest()
+        stem = self.cache_dir / f"{digest}_{size[0]}x{size[1]}"
+
+        for mode in ("RGBA", "RGB"):
+            cache_file = stem.with_suffix(f".{mode.lower()}")
+            if cache_file.exists():
+                return pygame.image.frombytes(cache_file.read_bytes(), size, mode)
+
+        image = pygame.transform.scale(pygame.image.load(io.BytesIO(data), str(path)), size)
+        mode = "RGBA" if image.get_flags() & pygame.SRCALPHA else "RGB"
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        cache_file = stem.with_suffix(f".{mode.lower()}")
+        temp_file = cache_file.with_name(f"{cache_file.name}.{os.getpid()}.tmp")
+        temp_file.write_bytes(pygame.image.tobytes(image, mode))
+        os.replace(temp_file, cache_file)
+        return image
+
+    def convert(self, image):
+        """Convertit au format de l'écran si une fenêtre est ouverte"""
+        if pygame.display.get_surface() is None:
+            return image
+        if image.get_flags() & pygame.SRCALPHA:
+            return image.convert_alpha()
+        return image.convert()
+
+    def convert_loaded(self):
+        """Convertit les images déjà chargées avant l'ouverture de la fenêtre"""
+        self.surfaces = {key: self.convert(surface) for key, surface in self.surfaces.items()}
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
@@ -0,0 +1,121 @@
+"""
+Moteur audio à faible latence.
+
+Le mixeur est initialisé une seule fois avec un petit tampon configurable,
+tous les sons de stimulation sont synthétisés au démarrage (NumPy vectorisé)
+et joués sur des canaux réservés : aucune synthèse ni allocation sur le
+chemin critique du déclenchement.
+"""
+import time
+
+import numpy as np
+import pygame
+
+SAMPLE_RATE = 44100
+AUDIO_BUFFER = 256  # Échantillons (~6 ms à 44,1 kHz contre ~23 ms pour 1024)
+STIMULUS_CHANNELS = 2  # Canaux du mixeur réservés aux stimuli
+
+# Bip par défaut : (fréquence Hz, durée s, rampe d'enveloppe en échantillons, volume)
+BIP_TONE = (800, 0.2, 100, 0.5)
+
+
+def synthesize_tone(frequency, duration, envelope, volume, sample_rate=SAMPLE_RATE, channels=2):
+    """Synthétise une sinusoïde avec attaque et déclin linéaires, en int16"""
+    n_samples = int(sample_rate * duration)
+    index = np.arange(n_samples)
+    signal = np.sin(2 * np.pi * frequency * index / sample_rate)
+
+    if envelope > 0:
+        # Rampe montante au début, descendante à la fin
+        signal *= np.minimum(1.0, np.minimum(index, n_samples - 1 - index) / envelope)
+
+    samples = (signal * 32767 * volume).astype(np.int16)
+    if channels == 1:
+        return samples
+    return np.ascontiguousarray(np.repeat(samples[:, None], channels, axis=1))
+
+
+class AudioEngine:
+    """Banque de sons pré-synthétisés jouée sur des canaux réservés"""
+
+    def __init__(self, sample_rate=SAMPLE_RATE, buffer=AUDIO_BUFFER, stimulus_channels=STIMULUS_CHANNELS,
+                 tones=(BIP_TONE,)):
+        self.buffer = buffer
+        self.bank = {}
+        self.channels = []
+        self.next_channel = 0
+        self.reset_stats()
+        self.enabled = False
+
+        try:
+            # Réinitialisation si le mixeur a déjà été ouvert avec d'autres réglages
+            if pygame.mixer.get_init():
+                pygame.mixer.quit()
+            pygame.mixer.init(frequency=sample_rate, size=-16, channels=2, buffer=buffer)
+            self.sample_rate, _, self.output_channels = pygame.mixer.get_init()
+
+            pygame.mixer.set_reserved(stimulus_channels)
+            self.channels = [pygame.mixer.Channel(i) for i in range(stimulus_channels)]
+
+            for tone in tones:
+                self.load_tone(*tone)
+            self.enabled = True
+            print(f"Audio initialisé ({self.sample_rate} Hz, tampon de {buffer} échantillons)")
+        except (pygame.error, ValueError) as e:
+            print(f"Erreur d'initialisation audio : {e}")
+
+    def load_tone(self, frequency, duration, envelope, volume):
+        """Synthétise un son et l'ajoute à la banque"""
+        key = (frequency, duration, envelope, volume)
+        if key not in self.bank:
+            samples = synthesize_tone(frequency, duration, envelope, volume,
+                                      self.sample_rate, self.output_channels)
+            self.bank[key] = pygame.sndarray.make_sound(samples)
+        return self.bank[key]
+
+    def play(self, key):
+        """Joue un son de la banque sur le prochain canal réservé"""
+        if not self.enabled:
+            return
+        sound = self.bank.get(key)
+        if sound is None:
+            print(f"Son absent de la banque : {key}")
+            return
+
+        start = time.perf_counter_ns()
+        channel = self.channels[self.next_channel]
+        self.next_channel = (self.next_channel + 1) % len(self.channels)
+        channel.play(sound)
+        duration = time.perf_counter_ns() - start
+        self.triggers += 1
+        self.trigger_total_ns += duration
+        if duration > self.trigger_max_ns:
+            self.trigger_max_ns = duration
+
+    def reset_stats(self):
+        """Remet à zéro les mesures de déclenchement (nouveau participant)"""
+        # Statistiques en flux : mémoire constante quel que soit le nombre de bips
+        self.triggers = 0
+        self.trigger_total_ns = 0
+        self.trigger_max_ns = 0
+
+    def play_bip(self, volume=BIP_TONE[3]):
+        """Joue le bip de stimulation"""
+        self.play((*BIP_TONE[:3], volume))
+
+    def latency_summary(self):
+        """
+        Latence déclenchement → lecture en millisecondes.
+
+        trigger : durée de l'appel de lecture mesurée ; buffer : délai maximal
+        avant que le mixeur ne prenne le son en compte (taille du tampon).
+        """
+        summary = {
+            "buffer_samples": self.buffer,
+            "buffer_latency_ms": round(1000 * self.buffer / self.sample_rate, 3) if self.enabled else None,
+            "triggers": self.triggers,
+        }
+        if self.triggers:
+            summary["mean_trigger_ms"] = round(self.trigger_total_ns / self.triggers / 1e6, 4)
+            summary["max_trigger_ms"] = round(self.trigger_max_ns / 1e6, 4)
+        return summary
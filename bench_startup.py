@@ -0,0 +1,55 @@
+"""
+Mesure du coût de démarrage : temps d'import du module game et temps
+jusqu'à la première frame affichée, chacun dans un processus neuf.
+
+Exemple :
+    python bench_startup.py --runs 10
+    SDL_VIDEODRIVER=dummy SDL_AUDIODRIVER=dummy python bench_startup.py
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+
+IMPORT_SNIPPET = """
+import time
+start = time.perf_counter()
+import game
+print(time.perf_counter() - start)
+"""
+
+FIRST_FRAME_SNIPPET = """
+import time
+start = time.perf_counter()
+import game, pygame
+g = game.Game(verbose=False)
+g.start_runtime()
+g.draw()
+pygame.display.flip()
+print(time.perf_counter() - start)
+g.runtime.close()
+"""
+
+
+def measure(snippet, runs):
+    """Exécute le code dans des processus neufs et retourne les durées mesurées (s)"""
+    durations = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, "-c", snippet], capture_output=True, text=True, check=True)
+        durations.append(float(output.stdout.strip().splitlines()[-1]))
+    return durations
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de démarrage du jeu")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    for label, snippet in (("Import de game", IMPORT_SNIPPET), ("Première frame", FIRST_FRAME_SNIPPET)):
+        durations = [d * 1000 for d in measure(snippet, args.runs)]
+        print(f"{label}: médiane {statistics.median(durations):.1f} ms "
+              f"(min {min(durations):.1f}, max {max(durations):.1f}, {args.runs} essais)")
+
+
+if __name__ == "__main__":
+    main()
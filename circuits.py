@@ -0,0 +1,222 @@
+"""
+Circuits des niveaux : circuits fixes historiques ou générés à partir d'une graine.
+
+Le générateur trace une marche auto-évitante sur une grille (pas de step
+pixels) : à chaque pas le circuit tourne avec la probabilité turn_density,
+sans jamais longer ni croiser un tronçon déjà tracé. Les emplacements des
+images sont ensuite tirés hors du circuit et sans chevauchement.
+
+Chaque niveau est compilé une seule fois (coordonnées centrées, segments,
+graphe de navigation, emplacements des images) et mis en cache selon la
+graine et les paramètres : un même jeu de paramètres redonne toujours le
+même circuit, sans coût de génération après le premier appel.
+"""
+import math
+import random
+from collections import namedtuple
+from functools import lru_cache
+
+from navigation import compile_path
+
+CIRCUIT_STEP = 50  # Pas de la grille (px)
+MIN_STEP = 20  # Pas minimal : les tronçons parallèles restent à 40 px au moins
+DEFAULT_SIZE = 16  # Nombre de pas du circuit
+DEFAULT_TURN_DENSITY = 0.35
+IMAGE_CLEARANCE = 20  # Distance minimale entre une image et le circuit (px)
+MAX_ATTEMPTS = 200
+
+# Circuits historiques (avant centrage)
+BUILTIN_PATHS = {
+    1: [(100, 100), (300, 100), (300, 300), (500, 300), (500, 500)],
+    2: [(100, 100), (300, 100), (300, 200), (200, 200), (200, 400), (400, 400), (400, 500)],
+    3: [(50, 50), (150, 50), (150, 100), (100, 100), (100, 150), (200, 150), (200, 200), (150, 200),
+        (150, 250), (250, 250), (250, 300), (100, 300), (100, 400), (300, 400), (300, 350), (200, 350),
+        (200, 500)],
+}
+BUILTIN_IMAGE_POSITIONS = {
+    1: [(200, 200), (400, 200), (200, 400), (400, 400)],
+    2: [(150, 150), (450, 150), (150, 450), (450, 450)],
+    3: [(100, 300), (300, 100), (500, 500), (700, 300)],
+}
+
+CompiledCircuit = namedtuple("CompiledCircuit", ["path", "segments", "image_positions", "graph"])
+
+TURNS = {(1, 0): ((0, 1), (0, -1)), (-1, 0): ((0, 1), (0, -1)),
+         (0, 1): ((1, 0), (-1, 0)), (0, -1): ((1, 0), (-1, 0))}
+
+
+def grid_shape(area, step):
+    """Colonnes et lignes de la grille (marge d'un pas)"""
+    return area[0] // step - 1, area[1] // step - 1
+
+
+def max_circuit_size(area, step):
+    """
+    Longueur maximale d'un circuit généré sur la grille.
+
+    Une marche aléatoire auto-évitante se bloque d'autant plus vite que la
+    grille se remplit ; en deçà de 4 × √(cases), 10 graines sur 10 aboutissent
+    (fenêtre 800 × 600, pas de 20 à 50 px).
+    """
+    columns, rows = grid_shape(area, step)
+    return int(4 * math.sqrt(max(columns * rows, 0)))
+
+
+def circuit_step(size, area, step=None):
+    """
+    Pas de grille pour un circuit de size pas : le plus grand pas (≤ CIRCUIT_STEP,
+    par tranches de 5 px) qui laisse assez de place, ou step s'il est imposé.
+    Lève ValueError avec la taille maximale possible sinon.
+    """
+    if size < 1:
+        raise ValueError(f"Longueur de circuit invalide : {size}")
+    if step is not None:
+        if step < MIN_STEP:
+            raise ValueError(f"Pas de grille trop petit : {step} px (minimum {MIN_STEP} px)")
+        if size > max_circuit_size(area, step):
+            raise ValueError(f"Circuit de {size} pas trop long pour un pas de {step} px dans une fenêtre "
+                             f"{area[0]}x{area[1]} (au plus {max_circuit_size(area, step)} pas)")
+        return step
+    for candidate in range(CIRCUIT_STEP, MIN_STEP - 1, -5):
+        if size <= max_circuit_size(area, candidate):
+            return candidate
+    raise ValueError(f"Circuit de {size} pas trop long pour une fenêtre {area[0]}x{area[1]} "
+                     f"(au plus {max_circuit_size(area, MIN_STEP)} pas, avec un pas de {MIN_STEP} px)")
+
+
+def circuit_params(area, seed, size=DEFAULT_SIZE, turn_density=DEFAULT_TURN_DENSITY, step=None):
+    """Paramètres d'un circuit généré, pas de grille résolu (enregistrés avec la session)"""
+    return {"seed": seed, "size": size, "turn_density": turn_density, "step": circuit_step(size, area, step)}
+
+
+def center_by_centroid(path, area):
+    """Centre un chemin dans la fenêtre (centre de gravité des points)"""
+    center_x = sum(x for x, _ in path) / len(path)
+    center_y = sum(y for _, y in path) / len(path)
+    dx = area[0] / 2 - center_x
+    dy = area[1] / 2 - center_y
+    return [(x + dx, y + dy) for x, y in path]
+
+
+def segments_of(path):
+    return tuple((a[0], a[1], b[0], b[1]) for a, b in zip(path, path[1:]))
+
+
+def self_avoiding_walk(rng, size, turn_density, columns, rows):
+    """Marche de size pas sur la grille sans contact avec les cases déjà visitées ; None en cas d'impasse"""
+    cell = (rng.randrange(columns), rng.randrange(rows))
+    direction = rng.choice(list(TURNS))
+    cells = [cell]
+    visited = {cell}
+
+    def free(candidate, previous):
+        x, y = candidate
+        if not (0 <= x < columns and 0 <= y < rows) or candidate in visited:
+            return False
+        # Aucune case voisine déjà tracée, sauf celle d'où l'on vient
+        return all(neighbour == previous or neighbour not in visited
+                   for neighbour in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)))
+
+    for _ in range(size):
+        turns = list(TURNS[direction])
+        rng.shuffle(turns)
+        options = turns + [direction] if rng.random() < turn_density else [direction] + turns
+        for option in options:
+            candidate = (cell[0] + option[0], cell[1] + option[1])
+            if free(candidate, cell):
+                direction = option
+                cell = candidate
+                cells.append(cell)
+                visited.add(cell)
+                break
+        else:
+            return None
+    return cells
+
+
+def corners(cells):
+    """Ne garde que les extrémités et les virages"""
+    points = [cells[0]]
+    for previous, cell, following in zip(cells, cells[1:], cells[2:]):
+        if (cell[0] - previous[0], cell[1] - previous[1]) != (following[0] - cell[0], following[1] - cell[1]):
+            points.append(cell)
+    points.append(cells[-1])
+    return points
+
+
+def rect_clear_of(rect, segments, clearance):
+    """Vrai si le rectangle (x, y, l, h) est à plus de clearance de tous les segments"""
+    left, top = rect[0] - clearance, rect[1] - clearance
+    right, bottom = rect[0] + rect[2] + clearance, rect[1] + rect[3] + clearance
+    for x1, y1, x2, y2 in segments:
+        if min(x1, x2) <= right and max(x1, x2) >= left and min(y1, y2) <= bottom and max(y1, y2) >= top:
+            return False
+    return True
+
+
+def place_images(rng, image_sizes, segments, area, clearance=IMAGE_CLEARANCE):
+    """Emplacements d'images (une par taille) hors du circuit et sans chevauchement"""
+    rects = []
+    for width, height in image_sizes:
+        for _ in range(MAX_ATTEMPTS):
+            x = rng.randrange(0, area[0] - width)
+            y = rng.randrange(0, area[1] - height)
+            if not rect_clear_of((x, y, width, height), segments, clearance):
+                continue
+            if any(x < rx + rw + clearance and rx < x + width + clearance and
+                   y < ry + rh + clearance and ry < y + height + clearance for rx, ry, rw, rh in rects):
+                continue
+            rects.append((x, y, width, height))
+            break
+        else:
+            raise ValueError(f"Impossible de placer {len(image_sizes)} images autour du circuit")
+    return tuple((x, y) for x, y, _, _ in rects)
+
+
+@lru_cache(maxsize=None)
+def builtin_circuit(level, area):
+    """Circuit historique d'un niveau, centré et compilé une seule fois"""
+    path = tuple(center_by_centroid(BUILTIN_PATHS[level], area))
+    return CompiledCircuit(path, segments_of(path), tuple(BUILTIN_IMAGE_POSITIONS[level]), compile_path(path))
+
+
+@lru_cache(maxsize=512)
+def generated_circuit(seed, level, area, size=DEFAULT_SIZE, turn_density=DEFAULT_TURN_DENSITY,
+                      step=CIRCUIT_STEP, image_sizes=((50, 50),) * 4):
+    """Circuit généré d'un niveau, reproductible pour une graine et des paramètres donnés"""
+    rng = random.Random(f"{seed}:{level}:{size}:{turn_density}:{step}")
+    # Grille bornée par la fenêtre, avec une marge d'un pas
+    columns, rows = grid_shape(area, step)
+    for _ in range(MAX_ATTEMPTS):
+        cells = self_avoiding_walk(rng, size, turn_density, columns, rows)
+        if cells is not None:
+            break
+    else:
+        raise ValueError(f"Aucun circuit de {size} pas sur une grille {columns}x{rows}")
+
+    points = [(x * step, y * step) for x, y in corners(cells)]
+    # Centrage sur la boîte englobante : le circuit reste dans la fenêtre
+    xs = [x for x, _ in points]
+    ys = [y for _, y in points]
+    dx = area[0] / 2 - (min(xs) + max(xs)) / 2
+    dy = area[1] / 2 - (min(ys) + max(ys)) / 2
+    path = tuple((x + dx, y + dy) for x, y in points)
+
+    segments = segments_of(path)
+    return CompiledCircuit(path, segments, place_images(rng, image_sizes, segments, area), compile_path(path))
+
+
+def level_circuits(area, image_sizes, levels=(1, 2, 3), params=None):
+    """
+    Circuits compilés des niveaux.
+
+    params : None pour les circuits historiques, sinon dictionnaire avec
+    seed et éventuellement size, turn_density, step (CIRCUIT_STEP par défaut ;
+    voir circuit_step pour l'adapter à la longueur).
+    """
+    if params is None:
+        return {level: builtin_circuit(level, area) for level in levels}
+    params = dict(params)
+    seed = params.pop("seed")
+    return {level: generated_circuit(seed, level, area, image_sizes=tuple(image_sizes), **params)
+            for level in levels}
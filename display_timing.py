@@ -0,0 +1,57 @@
+"""
+Apparition des stimuli synchronisée sur l'affichage.
+
+Modes de cadencement des frames :
+    "sleep" : attente par petites pauses (comportement historique)
+    "busy"  : image préparée à l'avance puis attente active jusqu'à
+              l'échéance, l'affichage a lieu à l'instant prévu
+    "vsync" : affichage bloqué sur le rafraîchissement vertical de l'écran
+
+Dans tous les modes, l'instant d'apparition retenu pour un stimulus est pris
+juste après le retour de pygame.display.flip(). OnsetTiming conserve, pour
+chaque apparition, l'écart entre cet instant et l'instant programmé ; seules
+les statistiques par type de stimulus sont sauvegardées avec la session. Le
+détail reste dans le journal : chaque enregistrement "stimulus" est daté de
+son affichage (t) et porte son instant programmé (scheduled).
+
+En simulation (HeadlessSession), l'affichage de chaque frame est daté à
+l'instant de la frame sur l'horloge virtuelle : les écarts mesurent alors la
+seule quantification par les frames.
+"""
+import numpy as np
+
+PACING_MODES = ("sleep", "busy", "vsync")
+SPIN_MARGIN = 0.002  # Fin d'attente en boucle active (s), au-delà de la précision de time.sleep
+
+
+class OnsetTiming:
+    """Écarts entre apparitions programmées et affichées"""
+
+    def __init__(self, frame_duration):
+        self.frame_duration = frame_duration
+        self.onsets = []  # [niveau, type, instant programmé, instant affiché]
+
+    def add(self, level, kind, scheduled, displayed):
+        self.onsets.append([level, kind, scheduled, displayed])
+
+    def reset(self):
+        self.onsets = []
+
+    def summary(self):
+        """Statistiques d'écart (ms) par type de stimulus"""
+        if not self.onsets:
+            return {"onsets": 0}
+        summary = {"onsets": len(self.onsets), "frame_ms": round(self.frame_duration * 1000, 3)}
+        kinds = sorted({onset[1] for onset in self.onsets})
+        for kind in kinds:
+            errors_ms = np.array([displayed - scheduled for _, k, scheduled, displayed in self.onsets if k == kind]) * 1000
+            summary[kind] = {
+                "count": len(errors_ms),
+                "mean_ms": round(float(errors_ms.mean()), 3),
+                "sd_ms": round(float(errors_ms.std()), 3),
+                "p95_abs_ms": round(float(np.percentile(np.abs(errors_ms), 95)), 3),
+                "max_abs_ms": round(float(np.abs(errors_ms).max()), 3),
+                # Apparitions décalées de plus d'une demi-frame : pas sur la frame visée
+                "off_frame": int(np.sum(np.abs(errors_ms) > self.frame_duration * 500)),
+            }
+        return summary
@@ -0,0 +1,151 @@
+"""
+Figures de l'analyse : description déclarative, rendu parallèle et cache.
+
+Chaque figure est décrite par un dictionnaire (taille, panneaux seaborn,
+colonnes utilisées). Son empreinte combine le contenu de ces colonnes et
+la description elle-même ; elle est enregistrée dans output_dir/.figures.json
+avec le PNG. Au lancement suivant, une figure dont l'empreinte n'a pas
+changé et dont le PNG existe n'est pas redessinée.
+
+Les figures à redessiner sont indépendantes : elles sont rendues dans des
+processus séparés (backend Agg, non interactif), chaque processus ne
+recevant que les colonnes de sa figure.
+"""
+import hashlib
+import io
+import json
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+from persistence import atomic_write
+
+MANIFEST_NAME = ".figures.json"
+RENDER_VERSION = 1  # À incrémenter si le code de rendu change (invalide toutes les figures)
+
+FIGURES = {
+    'response_times': {
+        'figsize': (12, 6),
+        'panels': [
+            {'kind': 'boxplot', 'x': 'level', 'y': 'avg_response_time', 'hue': 'condition',
+             'title': 'Temps de réponse par niveau et condition'},
+        ],
+    },
+    'performance_ratings': {
+        'figsize': (15, 6),
+        'tight_layout': True,
+        'panels': [
+            {'kind': 'violinplot', 'x': 'condition', 'y': 'performance_eval',
+             'title': 'Distribution des évaluations de performance'},
+            {'kind': 'violinplot', 'x': 'condition', 'y': 'stress_eval',
+             'title': 'Distribution des évaluations de stress'},
+        ],
+    },
+    'heart_rate_changes': {
+        'figsize': (10, 6),
+        'panels': [
+            {'kind': 'barplot', 'x': 'condition', 'y': 'heart_rate_change',
+             'title': 'Variation moyenne de la fréquence cardiaque par condition'},
+        ],
+    },
+}
+
+
+def figure_columns(spec: Dict[str, Any]) -> List[str]:
+    """Colonnes utilisées par une figure, dans l'ordre d'apparition"""
+    columns = []
+    for panel in spec['panels']:
+        for key in ('x', 'y', 'hue'):
+            if panel.get(key) and panel[key] not in columns:
+                columns.append(panel[key])
+    return columns
+
+
+def figure_hash(data: pd.DataFrame, spec: Dict[str, Any]) -> str:
+    """Empreinte des données d'une figure et de ses paramètres de tracé"""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(json.dumps({'version': RENDER_VERSION, 'spec': spec}, sort_keys=True, default=str).encode('utf-8'))
+    digest.update(pd.util.hash_pandas_object(data, index=False).to_numpy().tobytes())
+    digest.update(json.dumps([str(dtype) for dtype in data.dtypes]).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def render_figure(spec: Dict[str, Any], data: pd.DataFrame, path: Path) -> None:
+    """Dessine une figure et l'écrit en PNG (exécutée dans un processus de travail)"""
+    import matplotlib
+    from matplotlib.figure import Figure
+    import seaborn as sns
+
+    # Figure hors pyplot : rendu Agg, sans toucher au backend ni aux figures de l'appelant
+    with matplotlib.style.context('default'):
+        fig = Figure(figsize=spec['figsize'])
+        axes = fig.subplots(1, len(spec['panels']), squeeze=False)
+        for ax, panel in zip(axes[0], spec['panels']):
+            options = {key: panel[key] for key in ('x', 'y', 'hue') if panel.get(key)}
+            getattr(sns, panel['kind'])(data=data, ax=ax, **options)
+            ax.set_title(panel['title'])
+        if spec.get('tight_layout'):
+            fig.tight_layout()
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format='png')
+    atomic_write(path, buffer.getvalue(), fsync="none")
+
+
+def load_manifest(path: Path) -> Dict[str, str]:
+    try:
+        with open(path, encoding='utf-8') as f:
+            manifest = json.load(f)
+        return manifest if isinstance(manifest, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def render_figures(df: pd.DataFrame, output_dir: Path, figures: Optional[Dict[str, Dict[str, Any]]] = None,
+                   workers: Optional[int] = None, force: bool = False) -> Dict[str, str]:
+    """
+    Rend les figures dont les données ou les paramètres ont changé.
+
+    Renvoie l'état de chaque figure : 'rendered' ou 'unchanged'.
+    """
+    figures = FIGURES if figures is None else figures
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = output_dir / MANIFEST_NAME
+    manifest = load_manifest(manifest_path)
+
+    status = {}
+    pending = []
+    for name, spec in figures.items():
+        data = df[figure_columns(spec)]
+        digest = figure_hash(data, spec)
+        path = output_dir / f"{name}.png"
+        if not force and manifest.get(name) == digest and path.exists():
+            status[name] = 'unchanged'
+        else:
+            pending.append((name, spec, data, path, digest))
+
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and len(pending) > 1:
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=min(workers, len(pending)), mp_context=context) as executor:
+            futures = [executor.submit(render_figure, spec, data, path) for _, spec, data, path, _ in pending]
+            for future in futures:
+                future.result()
+    else:
+        for _, spec, data, path, _ in pending:
+            render_figure(spec, data, path)
+
+    for name, _, _, _, digest in pending:
+        manifest[name] = digest
+        status[name] = 'rendered'
+    status = {name: status[name] for name in figures}
+    if pending:
+        atomic_write(manifest_path, json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8'), fsync="none")
+    logging.info(f"Figures : {sum(s == 'rendered' for s in status.values())} dessinées, "
+                 f"{sum(s == 'unchanged' for s in status.values())} inchangées")
+    return status
@@ -1,26 +1,36 @@
 import pygame
 import sys
 import random
-import json
 import time
-import pygame.mixer
+import bisect
 from datetime import datetime
-import csv
 import math
 from pathlib import Path
-import numpy as np
 
-pygame.mixer.pre_init(44100, -16, 2, 1024)  # Pré-configuration audio
-pygame.init()
-pygame.mixer.init()
-# Initialisation de Pygame
-pygame.init()
-pygame.mixer.init()
+from assets import AssetManager
+from rendering import text_cache, LevelLayerCache, DirtyRectTracker
+from circuits import level_circuits, circuit_params, DEFAULT_SIZE, DEFAULT_TURN_DENSITY
+from input_capture import InputCapture, InputRecorder
+from scheduler import (StimulusScheduler, build_level_timeline, build_target_timeline, level_rng,
+                       IMAGE_ON, IMAGE_OFF, BIP, BONUS, TARGET_ON, TARGET_OFF)
+from runtime import Runtime
+from heart_rate import SerialHeartRateSource, FakeHeartRateDevice
+from telemetry import TelemetryRecorder
+from profiler import FrameProfiler, NullProfiler
+from display_timing import OnsetTiming, PACING_MODES, SPIN_MARGIN
+from targets import TargetManager
+from persistence import BackgroundWriter, write_session_files, write_array, write_json, FSYNC_POLICIES
+import journal
+from journal import SessionJournal
+
+# Pygame (fenêtre, audio, horloge) n'est initialisé qu'au lancement d'une session : voir Runtime
 
 # Constantes
 WINDOW_WIDTH = 800
 WINDOW_HEIGHT = 600
 FPS = 60
+LEVEL_DURATION = 60  # Durée d'un niveau en secondes
+DIRTY_RECTS = False  # Mise à jour partielle de l'affichage pendant le jeu
 
 # Couleurs
 WHITE = (255, 255, 255)
@@ -31,10 +41,15 @@ YELLOW = (255, 255, 0)
 GREEN = (0, 255, 0)
 GRAY = (128, 128, 128)
 
-# Configuration de l'écran
-screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
-pygame.display.set_caption("Mobile Game - Facteurs Humains")
-clock = pygame.time.Clock()
+# Images des stimuli : fichier source et taille d'affichage
+IMAGE_FILES = {
+    "image1": ("./images/jumpscare.png", (70, 70)),
+    "image2": ("./images/cute.jpg", (50, 50)),
+    "image3": ("./images/joke.png", (50, 50)),
+    "image4": ("./images/kidding.png", (50, 50)),
+}
+WINDOW_CAPTION = "Mobile Game - Facteurs Humains"
+TARGET_SIZE = (50, 50)  # Taille des cibles du mode multi-cibles (celle des images)
 
 
 class Button:
@@ -45,7 +60,7 @@ class Button:
         self.hover_color = hover_color
         self.is_hovered = False
         self.is_selected = False  # Nouvel attribut pour suivre l'état de sélection
-        self.font = pygame.font.Font(None, 36)
+        self.font_size = 36
 
     def draw(self, surface):
     # Utiliser une couleur différente si le bouton est sélectionné
@@ -57,7 +72,7 @@ class Button:
         pygame.draw.rect(surface, color, self.rect, border_radius=12)
         pygame.draw.rect(surface, BLACK, self.rect, 2, border_radius=12)
 
-        text_surface = self.font.render(self.text, True, WHITE)
+        text_surface = text_cache.render(self.text, self.font_size, WHITE)
         text_rect = text_surface.get_rect(center=self.rect.center)
         surface.blit(text_surface, text_rect)
 
@@ -77,8 +92,8 @@ class InputBox:
         self.color = BLACK
         self.text = text
         self.type = type
-        self.font = pygame.font.Font(None, 32)
-        self.txt_surface = self.font.render(text, True, self.color)
+        self.font_size = 32
+        self.text_color = self.color
         self.active = False
 
     def handle_event(self, event):
@@ -98,251 +113,323 @@ class InputBox:
                             self.text += event.unicode
                     else:
                         self.text += event.unicode
-                self.txt_surface = self.font.render(self.text, True, self.color)
+                self.text_color = self.color
         return False
 
     def draw(self, screen):
         pygame.draw.rect(screen, WHITE, self.rect, 0)
         pygame.draw.rect(screen, self.color, self.rect, 2)
-        screen.blit(self.txt_surface, (self.rect.x + 5, self.rect.y + 5))
+        txt_surface = text_cache.render(self.text, self.font_size, self.text_color)
+        screen.blit(txt_surface, (self.rect.x + 5, self.rect.y + 5))
 
 
-class SoundManager:
-    def __init__(self):
-        """
-        Initialise le gestionnaire de son
-        """
-        try:
-            self.sound_manager = SoundManager()
-            pygame.mixer.init(frequency=44100, size=-16, channels=2, buffer=1024)
-            self.bip_sound = self.generate_bip_sound()
-            print("Audio initialisé avec succès")
-        except Exception as e:
-            print(f"Erreur d'initialisation audio : {e}")
-            self.bip_sound = None
-
-    def generate_bip_sound(self, duration=0.2, frequency=800, volume=0.5):
-        """
-        Génère un son de bip compatible multiplateforme
-
-        Retourne:
-        - Un objet pygame.mixer.Sound représentant le bip
-        """
-        sample_rate = 44100
-        n_samples = int(sample_rate * duration)
-
-        t = np.linspace(0, duration, n_samples, False)
-        signal = np.sin(2 * np.pi * frequency * t)
-
-        envelope = np.ones_like(signal)
-        envelope[:100] = np.linspace(0, 1, 100)  # Attaque douce
-        envelope[-100:] = np.linspace(1, 0, 100)  # Déclin doux
-
-        signal *= envelope
-
-        scaled_signal = np.int16(signal * 32767 * volume)
-        stereo_signal = np.column_stack((scaled_signal, scaled_signal))
-
-        try:
-            sound = pygame.sndarray.make_sound(stereo_signal)
-            return sound
-        except Exception as e:
-            print(f"Erreur de génération de son : {e}")
-            return None
-
-    def play_bip(self, volume=0.5):
-        """
-        Joue le son de bip avec gestion des erreurs
-        """
-        try:
-            if self.bip_sound is None:
-                print("Génération de son de secours")
-                self.bip_sound = self.generate_bip_sound()
-
-            self.bip_sound.set_volume(volume)
-            self.bip_sound.play()
-        except Exception as e:
-            print(f"Impossible de jouer le son : {e}")
-
 class Game:
-    def __init__(self):
+    def __init__(self, time_source=time.perf_counter, sound_manager=None, data_dir="data", verbose=True,
+                 dirty_rects=DIRTY_RECTS, heart_rate_source=None, telemetry=True, profile=False, fsync="file",
+                 journal=True, record=True, kiosk=False, pacing="sleep",
+                 targets=0, circuit=None):
+        # Source de temps injectable (horloge virtuelle en simulation headless).
+        # Horloge monotone par défaut : même base que les horodatages d'InputCapture
+        self.time_source = time_source
+        self.data_dir = Path(data_dir)
+        self.verbose = verbose
+        self.dirty_rects = dirty_rects
+        if pacing not in PACING_MODES:
+            raise ValueError(f"Mode de cadencement inconnu : {pacing} (attendu : {PACING_MODES})")
+        # Cadencement des frames et horodatage des apparitions au retour de flip() (display_timing.py)
+        self.pacing = pacing
+        self.runtime = Runtime((WINDOW_WIDTH, WINDOW_HEIGHT), WINDOW_CAPTION, vsync=pacing == "vsync")
+        self.onset_timing = OnsetTiming(1.0 / FPS)
+        self.next_flip_time = None  # Instant visé pour l'affichage de la frame en préparation
+        self.pending_onsets = []
+        self.pending_bips = []
+        # Mode multi-cibles : nombre d'emplacements de cibles simultanées en plus des stimuli habituels
+        self.n_targets = targets
+        self.targets = TargetManager()
+        # Source de FC en direct (cardiofréquencemètre série), sinon valeur saisie
+        self.heart_rate_source = heart_rate_source
+        self.level_layers = LevelLayerCache((WINDOW_WIDTH, WINDOW_HEIGHT), WHITE, BLACK, BLUE)
+        self.dirty_tracker = DirtyRectTracker()
+        self.input_capture = InputCapture()
+        self.scheduler = StimulusScheduler()
+        # Télémétrie par frame, dimensionnée pour un niveau complet avec marge
+        self.telemetry = TelemetryRecorder(int(LEVEL_DURATION * FPS * 1.5)) if telemetry else None
+        # Profilage des phases de la boucle (optionnel, F3 affiche le résumé à l'écran)
+        self.profiler = FrameProfiler(FPS) if profile else NullProfiler()
+        self.show_profiler_overlay = False
+        self.profiler_overlay_lines = []
+        # Écriture des sessions et de la télémétrie hors du thread de rendu
+        self.writer = BackgroundWriter(fsync=fsync)
+        # Journal de session écrit au fil de l'eau (récupération après arrêt brutal)
+        self.journal = SessionJournal(self.writer) if journal else None
+        # Enregistrement des entrées pour le rejeu déterministe (replay.py)
+        self.recorder = InputRecorder() if record else None
+        # Mode kiosque : retour à la configuration après chaque participant, ressources conservées
+        self.kiosk = kiosk
+        self.kiosk_session = 1
+        self.kiosk_reset_ms = None
+        self.kiosk_turnaround = None
+        self.session_end_time = None
+        # Circuits compilés une seule fois (historiques, ou générés à partir d'une graine : circuits.py)
+        self.load_circuits(circuit)
         self.reset_game()
         self.setup_ui()
-        self.images = {
-            "image1": pygame.transform.scale(pygame.image.load("./images/jumpscare.png"), (70, 70)),
-            "image2": pygame.transform.scale(pygame.image.load("./images/cute.jpg"), (50, 50)),
-            "image3": pygame.transform.scale(pygame.image.load("./images/joke.png"), (50, 50)),
-            "image4": pygame.transform.scale(pygame.image.load("./images/kidding.png"), (50, 50)),
-        }
-        self.image_positions = self.create_image_positions()
+        self.assets = AssetManager()
+        self.images = {}
         self.image_visible = False  # Indique si les images doivent être affichées
         self.current_image_index = 0  # Index de l'image actuellement affichée
         self.image_last_toggle = 0
-        self.sound_manager = SoundManager()
+        # Sans gestionnaire injecté, l'audio du Runtime est utilisé au lancement de la session
+        self.sound_manager = sound_manager
         # Nouvelles variables pour les bips
         self.bip_start_time = None
         self.last_bip_time = 0
         self.bip_duration = 0.2  # Durée d'un bip en secondes
 
+    @property
+    def screen(self):
+        return self.runtime.screen
+
+    def log(self, message):
+        """Affiche un message si le mode verbeux est actif"""
+        if self.verbose:
+            print(message)
+
+    def journal_event(self, kind, event_time, scheduled=None, **fields):
+        """
+        Ajoute un événement au journal de session (horodatages relatifs au début
+        de session ; scheduled : instant programmé d'un stimulus)
+        """
+        if self.journal is not None:
+            if scheduled is not None:
+                fields["scheduled"] = round(scheduled - self.session_start_time, 6)
+            self.journal.record(kind, event_time - self.session_start_time, **fields)
+
+    def current_heart_rate(self):
+        """Fréquence cardiaque courante : valeur lissée en direct, sinon celle saisie"""
+        if self.heart_rate_source is not None:
+            bpm = self.heart_rate_source.current_bpm()
+            if bpm:
+                return bpm
+        return self.participant_data['heart_rate_before'] or 70
+
+    def schedule_live_stimulus(self, current_time, kind, payload=None):
+        """Programme le prochain stimulus synchrone un intervalle cardiaque plus tard"""
+        at = current_time + 60.0 / self.heart_rate
+        self.scheduler.push(at, kind, payload)
+        bisect.insort(self.game_data['stimulus_timeline'][self.current_level],
+                      (at - self.start_time, kind, payload), key=lambda entry: entry[0])
+
+    def manage_stimuli(self, current_time):
+        """
+        Déclenche les stimuli échus de la chronologie pré-calculée du niveau.
+
+        Si l'instant du prochain affichage est connu (next_flip_time), chaque
+        stimulus est rattaché à l'affichage le plus proche de son instant
+        programmé ; son apparition est datée par present() après flip().
+        """
+        self.pending_onsets = []
+        self.pending_bips = []
+        if self.next_flip_time is None:
+            due_time = current_time
+        else:
+            due_time = self.next_flip_time + 0.5 / FPS
+
+        for at, kind, payload in self.scheduler.pop_due(due_time):
+            if self.live_sync:
+                # Condition synchrone en direct : enchaînement sur la FC mesurée, depuis l'instant programmé
+                if kind == IMAGE_ON:
+                    self.schedule_live_stimulus(at, IMAGE_OFF)
+                elif kind == IMAGE_OFF:
+                    self.live_shows += 1
+                    n_images = len(self.image_positions[self.current_level])
+                    self.schedule_live_stimulus(at, IMAGE_ON, self.live_shows % n_images)
+                elif kind == BIP:
+                    self.schedule_live_stimulus(at, BIP)
+
+            if kind == IMAGE_ON:
+                self.image_visible = True
+                self.current_image_index = payload
+                self.image_last_toggle = current_time
+                self.pending_onsets.append((kind, at, payload))
+            elif kind == IMAGE_OFF:
+                self.image_visible = False
+                self.image_last_toggle = current_time
+                self.pending_onsets.append((kind, at, None))
+            elif kind == BIP:
+                if self.next_flip_time is None:
+                    self.trigger_bip(current_time, at)
+                    self.onset_timing.add(self.current_level, BIP, at, current_time)
+                else:
+                    self.pending_bips.append(at)  # Joué avec l'affichage de la frame
+            elif kind == BONUS:
+                if self.schedule_bonus(payload, current_time):
+                    self.pending_onsets.append((kind, at, list(payload)))
+            elif kind == TARGET_ON:
+                slot, image_index, position = payload
+                image_key = self.image_positions[self.current_level][image_index][0]
+                self.targets.show(slot, image_key, position, TARGET_SIZE, current_time, self.current_level)
+                self.pending_onsets.append((kind, at, payload))
+            elif kind == TARGET_OFF:
+                self.targets.hide(payload)
+
+    def present(self, flip_time):
+        """
+        Date les changements de la frame qui vient d'être affichée (flip_time :
+        retour de flip()) et les inscrit au journal à cet instant.
+        """
+        if not self.pending_onsets and not self.pending_bips:
+            return
+        for kind, at, payload in self.pending_onsets:
+            if kind == IMAGE_ON and self.image_visible:
+                self.image_last_toggle = flip_time
+            elif kind == IMAGE_OFF and not self.image_visible:
+                self.image_last_toggle = flip_time
+            elif kind == BONUS and self.active_bonus:
+                self.active_bonus["start_time"] = flip_time
+            elif kind == TARGET_ON:
+                self.targets.set_onset(payload[0], flip_time)
+            if kind != IMAGE_OFF:
+                self.onset_timing.add(self.current_level, kind, at, flip_time)
+            self.journal_event(journal.STIMULUS, flip_time, stimulus=kind, payload=payload,
+                               scheduled=at)
+        for at in self.pending_bips:
+            self.trigger_bip(flip_time, at)
+            self.onset_timing.add(self.current_level, BIP, at, flip_time)
+        if self.recorder is not None:
+            self.recorder.present(flip_time)
+        self.pending_onsets = []
+        self.pending_bips = []
+
     def manage_bips(self, current_time):
-        """Gère les bips selon les conditions expérimentales"""
+        """Termine le bip en cours une fois sa durée écoulée"""
         if self.bip_start_time is not None:
             if current_time - self.bip_start_time > self.bip_duration:
                 self.bip_start_time = None
-            return
 
-        if self.participant_data['condition'] == 'sync':
-            heart_rate = self.participant_data.get('heart_rate_before', 70)
-            interval = 60.0 / heart_rate
-            if current_time - self.last_bip_time >= interval:
-                self.trigger_bip(current_time)
-
-        elif self.participant_data['condition'] == 'async':
-            fixed_bpm = 100
-            interval = 60.0 / fixed_bpm
-            if current_time - self.last_bip_time >= interval:
-                self.trigger_bip(current_time)
-
-        elif self.participant_data['condition'] == 'random':
-            heart_rate = self.participant_data.get('heart_rate_before', 70)
-            average_interval = 60.0 / heart_rate
-            # Vérifier qu'au moins la moitié de l'intervalle moyen s'est écoulé
-            if current_time - self.last_bip_time >= (average_interval / 2):
-                if random.random() < 0.02:  # 2% de chance par frame
-                    self.trigger_bip(current_time)
-
-    def trigger_bip(self, current_time):
-        """Déclenche un bip"""
+    def trigger_bip(self, current_time, at=None):
+        """Déclenche un bip (at : instant programmé)"""
         if self.bip_start_time is None:
-            self.sound_manager.play_bip()
+            if self.sound_manager is not None:
+                self.sound_manager.play_bip()
             self.bip_start_time = current_time
             self.last_bip_time = current_time
             self.game_data['bip_times'].append(current_time)
+            self.journal_event(journal.STIMULUS, current_time, stimulus=BIP, payload=None, scheduled=at)
 
-    def create_paths(self):
-        """Crée les chemins pour chaque niveau"""
-        paths = {
-            1: [
-                (100, 100),  # Départ
-                (300, 100),
-                (300, 300),
-                (500, 300),
-                (500, 500),  # Arrivée
-            ],
-            2: [
-                (100, 100),  # Départ
-                (300, 100),
-                (300, 200),
-                (200, 200),
-                (200, 400),
-                (400, 400),
-                (400, 500),  # Arrivée
-            ],
-            3: [
-                (50, 50),  # Départ
-                (150, 50),
-                (150, 100),
-                (100, 100),
-                (100, 150),
-                (200, 150),
-                (200, 200),
-                (150, 200),
-                (150, 250),
-                (250, 250),
-                (250, 300),
-                (100, 300),
-                (100, 400),
-                (300, 400),
-                (300, 350),
-                (200, 350),
-                (200, 500),  # Arrivée
-            ]
-        }
-        centered_paths = {level: self.center_path(path) for level, path in paths.items()}
-
-        return centered_paths
-
-    def center_path(self, path):
-        """Centre un chemin dans la fenêtre"""
-        # Calcul du centre actuel du chemin
-        x_coords = [point[0] for point in path]
-        y_coords = [point[1] for point in path]
-        path_center_x = sum(x_coords) / len(x_coords)
-        path_center_y = sum(y_coords) / len(y_coords)
-
-        # Calcul du centre de la fenêtre
-        window_center_x = WINDOW_WIDTH / 2
-        window_center_y = WINDOW_HEIGHT / 2
-
-        # Translation nécessaire
-        x_translation = window_center_x - path_center_x
-        y_translation = window_center_y - path_center_y
-
-        # Appliquer la translation à chaque point
-        return [(x + x_translation, y + y_translation) for x, y in path]
+    def load_circuits(self, circuit=None):
+        """
+        Charge les circuits des niveaux et les emplacements de leurs images.
 
-    def create_image_positions(self):
-        """Crée les emplacements fixes des images et leur association pour chaque niveau."""
-        return {
-            1: [("image1", (200, 200)), ("image2", (400, 200)), ("image3", (200, 400)), ("image4", (400, 400))],
-            2: [("image1", (150, 150)), ("image2", (450, 150)), ("image3", (150, 450)), ("image4", (450, 450))],
-            3: [("image1", (100, 300)), ("image2", (300, 100)), ("image3", (500, 500)), ("image4", (700, 300))]
+        circuit : None pour les circuits historiques, sinon paramètres du
+        générateur (seed, size, turn_density).
+        """
+        self.circuit = dict(circuit) if circuit else None
+        image_keys = list(IMAGE_FILES)
+        circuits = level_circuits((WINDOW_WIDTH, WINDOW_HEIGHT), [IMAGE_FILES[key][1] for key in image_keys],
+                                  params=self.circuit)
+        self.level_paths = {level: compiled.path for level, compiled in circuits.items()}
+        self.level_graphs = {level: compiled.graph for level, compiled in circuits.items()}
+        self.image_positions = {
+            level: list(zip(image_keys, compiled.image_positions)) for level, compiled in circuits.items()
         }
 
-    def manage_images(self, current_time):
-        """Gère l'affichage d'une seule image à la fois avec rotation toutes les 5 secondes."""
-        if self.participant_data['condition'] == 'sync':
-            heart_rate = self.participant_data['heart_rate_before']  # Fixed heart rate
-            if current_time - self.image_last_toggle > 60 / heart_rate:  # Interval based on BPM
-                self.image_visible = not self.image_visible
-                if self.image_visible:
-                    self.current_image_index = (self.current_image_index + 1) % len(
-                        self.image_positions[self.current_level])
-                self.image_last_toggle = current_time
-        if self.participant_data['condition'] == 'async':
-            fixed_bpm = 100  # Fixed value for asynchronous condition
-            if current_time - self.image_last_toggle > 60 / fixed_bpm:  # Interval for 100 BPM
-                self.image_visible = not self.image_visible
-                if self.image_visible:
-                    self.current_image_index = (self.current_image_index + 1) % len(
-                        self.image_positions[self.current_level])
-                self.image_last_toggle = current_time
-        if self.participant_data['condition'] == 'random':
-            heart_rate = self.participant_data['heart_rate_before']  # Fixed heart rate
-            total_blinks = int((heart_rate / 60) * self.time_left)  # Number of blinks in the level
-            if len(self.game_data["response_times"]) < total_blinks:
-                if current_time - self.image_last_toggle > random.uniform(0.5, 1.5):  # Random intervals
-                    self.image_visible = not self.image_visible
-                    if self.image_visible:
-                        self.current_image_index = (self.current_image_index + 1) % len(
-                            self.image_positions[self.current_level])
-                    self.image_last_toggle = current_time
-
-    def handle_image_click(self, mouse_pos):
-        """Gère le clic sur l'image visible."""
+    def level_image_specs(self, level):
+        """Fichiers et tailles des images utilisées par un niveau"""
+        return [IMAGE_FILES[image_key] for image_key, _ in self.image_positions[level]]
+
+    def load_level_images(self, level):
+        """Charge (ou récupère du préchargement) les images d'un niveau"""
+        for image_key, _ in self.image_positions[level]:
+            self.images[image_key] = self.assets.load(*IMAGE_FILES[image_key])
+
+    def start_level(self):
+        """Démarre le niveau courant et programme toute sa chronologie de stimuli"""
+        self.load_level_images(self.current_level)
+        self.start_time = self.time_source()
+        self.time_left = LEVEL_DURATION
+        self.place_mobile(self.level_graphs[self.current_level].start)
+        self.image_visible = False
+        self.active_bonus = None
+        self.bip_start_time = None
+        self.live_sync = self.heart_rate_source is not None and self.participant_data['condition'] == 'sync'
+
+        timeline = build_level_timeline(
+            self.participant_data['condition'],
+            self.participant_data['heart_rate_before'],
+            LEVEL_DURATION,
+            len(self.image_positions[self.current_level]),
+            self.level_paths[self.current_level],
+            level_rng(self.stimulus_seed, self.current_level),
+            live_sync=self.live_sync,
+        )
+        if self.n_targets:
+            # Flux aléatoire distinct : la chronologie habituelle ne dépend pas du nombre de cibles
+            timeline = sorted(timeline + build_target_timeline(
+                self.n_targets,
+                LEVEL_DURATION,
+                len(self.image_positions[self.current_level]),
+                (WINDOW_WIDTH, WINDOW_HEIGHT),
+                TARGET_SIZE,
+                level_rng(self.stimulus_seed, f"{self.current_level}:cibles"),
+            ), key=lambda entry: entry[0])
+        self.scheduler.load(timeline, self.start_time)
+        self.game_data['stimulus_timeline'][self.current_level] = timeline
+        self.journal_event(journal.LEVEL_START, self.start_time, level=self.current_level, timeline=timeline)
+
+        if self.live_sync:
+            self.live_shows = 1
+            self.heart_rate = self.current_heart_rate()
+            self.schedule_live_stimulus(self.start_time, IMAGE_ON, 1 % len(self.image_positions[self.current_level]))
+            self.schedule_live_stimulus(self.start_time, BIP)
+        if self.recorder is not None:
+            self.recorder.level_start(self.start_time, self.heart_rate)
+
+    def handle_image_click(self, mouse_pos, event_time=None):
+        """Gère le clic sur l'image visible (event_time : horodatage de capture du clic)."""
         if self.image_visible:  # Les clics ne sont enregistrés que si une image est visible
             # Récupérer l'image active
             image_key, position = self.image_positions[self.current_level][self.current_image_index]
             x, y = position  # Extraire les coordonnées de la position
             image_rect = pygame.Rect(x, y, 50, 50)  # Zone cliquable (taille de l'image)
 
-            if image_rect.collidepoint(mouse_pos):
+            click_time = event_time if event_time is not None else self.time_source()
+            # Un clic antérieur à l'affichage de l'image (frame préparée à l'avance) n'y répond pas
+            if image_rect.collidepoint(mouse_pos) and click_time >= self.image_last_toggle:
                 # Temps de réponse pour l'image cliquée
-                response_time = time.time() - self.image_last_toggle
+                response_time = click_time - self.image_last_toggle
                 self.game_data["response_times"].append(response_time)
-                print(f"Image cliquée avec succès ({image_key}) en {response_time:.2f}s.")
+                self.game_data["response_levels"].append(self.current_level)
+                self.journal_event(journal.RESPONSE, click_time, target="image", response_time=response_time,
+                                   position=list(mouse_pos))
+                self.log(f"Image cliquée avec succès ({image_key}) en {response_time:.2f}s.")
                 self.image_visible = False  # Cache l'image après un clic réussi
                 return True
 
         # Si le clic est hors de l'image visible
         self.game_data["missed_bonus"] += 1
-        print("Clic manqué ou hors de l'image.")
+        click_time = event_time if event_time is not None else self.time_source()
+        self.journal_event(journal.MISSED_BONUS, click_time, reason="click", position=list(mouse_pos))
+        self.log("Clic manqué ou hors de l'image.")
         return False
 
-    def handle_bonus_click(self, mouse_pos):
-        """Gère le clic sur un bonus"""
+    def handle_target_click(self, mouse_pos, event_time=None):
+        """Mode multi-cibles : attribue le clic à la cible touchée (index spatial)"""
+        click_time = event_time if event_time is not None else self.time_source()
+        target, response_time = self.targets.hit(mouse_pos, click_time)
+        if target is None:
+            return False
+        # Séparés des réponses aux images et aux bonus : ne pas mélanger les deux modes dans l'analyse
+        self.game_data["target_response_times"].append(response_time)
+        self.game_data["target_response_levels"].append(self.current_level)
+        self.journal_event(journal.RESPONSE, click_time, target="target", response_time=response_time,
+                           position=list(mouse_pos), slot=target["slot"])
+        return True
+
+    def handle_bonus_click(self, mouse_pos, event_time=None):
+        """Gère le clic sur un bonus (vrai si le bonus est touché)"""
         if not self.active_bonus:
-            return
+            return False
 
         bonus_rect = pygame.Rect(
             self.active_bonus["position"][0] - 15,
@@ -350,86 +437,47 @@ class Game:
             30, 30
         )
 
-        if bonus_rect.collidepoint(mouse_pos):
-            response_time = time.time() - self.active_bonus["start_time"]
+        click_time = event_time if event_time is not None else self.time_source()
+        if bonus_rect.collidepoint(mouse_pos) and click_time >= self.active_bonus["start_time"]:
+            response_time = click_time - self.active_bonus["start_time"]
             self.game_data["response_times"].append(response_time)
+            self.game_data["response_levels"].append(self.current_level)
+            self.journal_event(journal.RESPONSE, click_time, target="bonus", response_time=response_time,
+                               position=list(mouse_pos))
             self.active_bonus = None
 
             # Jouer un son de succès ici si souhaité
             # pygame.mixer.Sound("success.wav").play()
+            return True
+        return False
 
     def handle_movement(self, direction):
-        """Gère le mouvement du mobile sur le chemin"""
-        current_path = self.level_paths[self.current_level]
-        current_point = None
-
-        # Trouver le point le plus proche sur le chemin
-        min_dist = float('inf')
-        for point in current_path:
-            dist = ((self.mobile_pos[0] - point[0]) ** 2 + (self.mobile_pos[1] - point[1]) ** 2) ** 0.5
-            if dist < min_dist:
-                min_dist = dist
-                current_point = point
-
-        if not current_point:
-            return
-
-        # Trouver les points connectés au point actuel
-        connected_points = []
-        for i, point in enumerate(current_path):
-            if point == current_point:
-                if i > 0:
-                    connected_points.append(current_path[i - 1])
-                if i < len(current_path) - 1:
-                    connected_points.append(current_path[i + 1])
-
-        # Déterminer la direction souhaitée
-        desired_point = None
-        for point in connected_points:
-            if direction == "left" and point[0] < current_point[0]:
-                desired_point = point
-            elif direction == "right" and point[0] > current_point[0]:
-                desired_point = point
-            elif direction == "up" and point[1] < current_point[1]:
-                desired_point = point
-            elif direction == "down" and point[1] > current_point[1]:
-                desired_point = point
+        """Gère le mouvement du mobile sur le chemin (consultation O(1) du graphe du niveau)"""
+        graph = self.level_graphs[self.current_level]
+        next_node = graph.move(self.mobile_node, direction)
 
         # Déplacer le mobile si la direction est valide
-        if desired_point:
-            self.mobile_pos = list(desired_point)
+        if next_node is not None:
+            self.place_mobile(next_node)
+            self.journal_event(journal.MOVE, self.time_source(), direction=direction, node=next_node)
         else:
             self.game_data["command_errors"] += 1
+            self.journal_event(journal.COMMAND_ERROR, self.time_source(), direction=direction)
 
-    def schedule_bonus(self):
-        """Gère l'apparition des bonus"""
-        current_time = time.time()
-
-        # Si aucun bonus n'est actif, on peut en créer un nouveau
-        if not self.active_bonus and random.random() < 0.02:  # 2% de chance par frame
-            current_path = self.level_paths[self.current_level]
-
-            # Choisir un point aléatoire du chemin
-            bonus_point = random.choice(current_path)
-
-            # Vérifier que le point n'est pas trop proche du dernier bonus
-            if self.bonus_history:
-                last_bonus = self.bonus_history[-1]
-                dist = ((bonus_point[0] - last_bonus[0]) ** 2 +
-                        (bonus_point[1] - last_bonus[1]) ** 2) ** 0.5
-                if dist < 100:  # Distance minimale entre les bonus
-                    return
-
-            self.active_bonus = {
-                "position": bonus_point,
-                "start_time": current_time
-            }
-            self.bonus_history.append(bonus_point)
-
-            # Limiter l'historique des bonus
-            if len(self.bonus_history) > 5:
-                self.bonus_history.pop(0)
+    def place_mobile(self, node):
+        """Place le mobile sur un nœud du graphe du niveau courant"""
+        self.mobile_node = node
+        self.mobile_pos = list(self.level_graphs[self.current_level].position(node))
 
+    def schedule_bonus(self, position, current_time):
+        """Fait apparaître un bonus programmé, sauf si un bonus est déjà actif"""
+        if self.active_bonus:
+            return False
+        self.active_bonus = {
+            "position": position,
+            "start_time": current_time  # Redaté à l'affichage par present()
+        }
+        return True
 
     def setup_ui(self):
         """Configure les éléments d'interface utilisateur"""
@@ -480,8 +528,8 @@ class Game:
                 Button(550, 150 + i * 60, 200, 40, level)
             )
 
-    def reset_game(self):
-        """Réinitialise toutes les variables du jeu"""
+    def reset_game(self, seed=None):
+        """Réinitialise toutes les variables du jeu (seed : graine des stimuli, aléatoire si absente)"""
         self.participant_data = {
             "id": "",
             "age": 0,
@@ -494,23 +542,42 @@ class Game:
 
         self.current_level = 1
         self.game_state = "setup"
-        self.level_paths = self.create_paths()
-        self.mobile_pos = list(self.level_paths[1][0])  # Position initiale
+        self.place_mobile(self.level_graphs[1].start)  # Position initiale
         self.active_bonus = None
-        self.bonus_history = []
-        self.time_left = 60
+        self.time_left = LEVEL_DURATION
         self.start_time = None
         self.heart_rate = 75
+        self.live_sync = False
+        self.live_shows = 0
+        self.session_start_time = None
+        self.session_timestamp = None
+        self.last_frame_time = None
+        self.frame_input_events = 0
+        if self.telemetry is not None:
+            self.telemetry.reset()
         self.current_evaluation = {}
         self.bip_start_time = None
+        self.last_bip_time = 0
+        self.current_image_index = 0
+        self.stimulus_seed = seed if seed is not None else random.SystemRandom().randrange(2 ** 32)
+        self.scheduler.clear()
+        self.pending_onsets = []
+        self.pending_bips = []
+        self.onset_timing.reset()
+        self.targets.reset()
 
         # Initialisez game_data AVANT d'ajouter des clés
         self.game_data = {
             "response_times": [],
+            "response_levels": [],
+            "target_response_times": [],  # Mode multi-cibles
+            "target_response_levels": [],
             "missed_bonus": 0,
             "command_errors": 0,
             "level_evaluations": [],
-            "bip_times": []
+            "bip_times": [],
+            "stimulus_timeline": {},
+            "telemetry_files": []
         }
         # Réinitialisation explicite des variables de bips
 
@@ -553,20 +620,52 @@ class Game:
 
         # Gestion du bouton de démarrage
         if self.start_button.handle_event(event):
-            print("Données saisies :", self.participant_data)
-            if self.validate_setup():
-                print("Validation réussie. Début du jeu...")
-                self.game_state = "playing"
-                self.start_time = time.time()
+            self.log(f"Données saisies : {self.participant_data}")
+            self.start_game()
+
+    def start_game(self):
+        """Valide la configuration et lance le premier niveau"""
+        if not self.validate_setup():
+            return False
+        self.log("Validation réussie. Début du jeu...")
+        self.game_state = "playing"
+        self.session_start_time = self.time_source()
+        self.session_timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        if self.kiosk and self.session_end_time is not None:
+            # Fin de la session précédente → début de celle-ci (saisie comprise)
+            self.kiosk_turnaround = self.session_start_time - self.session_end_time
+            self.log(f"Délai entre participants : {self.kiosk_turnaround:.1f} s")
+        self.open_journal()
+        if self.recorder is not None:
+            participant_info = {key: value for key, value in self.participant_data.items() if key != "timestamps"}
+            self.recorder.start(self.session_start_time, participant_info, self.stimulus_seed,
+                                self.heart_rate_source is not None, {"targets": self.n_targets, "circuit": self.circuit})
+        self.start_level()
+        return True
+
+    def open_journal(self):
+        """Ouvre le journal de la session et y écrit son en-tête"""
+        if self.journal is None:
+            return
+        filename = f"participant_{self.participant_data['id']}_{self.session_timestamp}.jsonl"
+        self.journal.open(self.data_dir / "journal" / filename)
+        participant_info = {key: value for key, value in self.participant_data.items() if key != "timestamps"}
+        self.journal_event(journal.SESSION, self.session_start_time, participant_info=participant_info,
+                           seed=self.stimulus_seed, timestamp=self.session_timestamp,
+                           live_sync=self.heart_rate_source is not None and self.participant_data['condition'] == 'sync',
+                           targets=self.n_targets, circuit=self.circuit, pacing=self.effective_pacing(),
+                           frame_duration=self.onset_timing.frame_duration)
+        self.journal.flush()
+
+    def effective_pacing(self):
+        """Cadencement réellement appliqué (vsync indisponible : attente active)"""
+        return self.pacing if self.pacing != "vsync" or self.runtime.vsync else "busy"
 
     def validate_setup(self):
         """Vérifie que toutes les informations nécessaires sont remplies"""
-
-
-        print(self.participant_data)
         required_fields = ['id', 'age', 'gender', 'heart_rate_before', 'condition']
         if self.participant_data['condition'] == 'async' and self.participant_data['heart_rate_before'] == 100:
-            print("La fréquence cardiaque doit être différente de 100 BPM pour cette condition.")
+            self.log("La fréquence cardiaque doit être différente de 100 BPM pour cette condition.")
             return False
         return all(self.participant_data.get(field) for field in required_fields)
 
@@ -575,33 +674,48 @@ class Game:
         for category, buttons in self.evaluation_buttons.items():
             for i, button in enumerate(buttons):
                 if button.handle_event(event):
-                    self.current_evaluation[category] = i + 1
-
-                    if len(self.current_evaluation) == 3:  # Toutes les évaluations sont faites
-                        self.game_data['level_evaluations'].append({
-                            'level': self.current_level,
-                            **self.current_evaluation
-                        })
-                        self.current_evaluation = {}
-
-                        if self.current_level < 3:
-                            self.current_level += 1
-                            self.game_state = "playing"
-                            self.start_time = time.time()
-                            self.mobile_pos = list(self.level_paths[self.current_level][0])
-                        else:
-                            self.game_state = "finished"
-                            self.save_data()
+                    self.record_evaluation(category, i + 1)
+
+    def record_evaluation(self, category, value):
+        """Enregistre une évaluation et passe au niveau suivant quand elles sont toutes faites"""
+        self.current_evaluation[category] = value
+
+        if len(self.current_evaluation) == 3:  # Toutes les évaluations sont faites
+            level_times = [rt for rt, level in zip(self.game_data['response_times'], self.game_data['response_levels'])
+                           if level == self.current_level]
+            self.game_data['level_evaluations'].append({
+                'level': self.current_level,
+                **self.current_evaluation,
+                # Temps de réponse moyen du niveau (images et bonus ; None sans réponse)
+                'avg_response_time': sum(level_times) / len(level_times) if level_times else None
+            })
+            self.current_evaluation = {}
+            self.journal_event(journal.EVALUATION, self.time_source(),
+                               evaluation=self.game_data['level_evaluations'][-1])
+
+            if self.current_level < 3:
+                self.current_level += 1
+                self.game_state = "playing"
+                self.start_level()
+            else:
+                self.game_state = "finished"
+                self.session_end_time = self.time_source()
+                # FC après l'expérience : dernière valeur mesurée en direct
+                if self.heart_rate_source is not None and self.heart_rate_source.current_bpm():
+                    self.participant_data['heart_rate_after'] = round(self.heart_rate_source.current_bpm())
+                self.journal_event(journal.SESSION_END, self.time_source(),
+                                   heart_rate_after=self.participant_data['heart_rate_after'])
+                if self.journal is not None:
+                    self.journal.close()
+                self.save_data()
 
     def draw_setup_screen(self):
         """Dessine l'écran de configuration"""
         # Titre
-        font = pygame.font.Font(None, 46)
-        title = font.render("Configuration du Participant", True, BLACK)
-        screen.blit(title, (WINDOW_WIDTH // 2 - title.get_width() // 2, 30))
+        title = text_cache.render("Configuration du Participant", 46, BLACK)
+        self.screen.blit(title, (WINDOW_WIDTH // 2 - title.get_width() // 2, 30))
 
         # Labels
-        font = pygame.font.Font(None, 30)
         labels = {
             'id': 'Identifiant:',
             'age': 'Âge:',
@@ -609,69 +723,112 @@ class Game:
         }
 
         for i, (key, text) in enumerate(labels.items()):
-            label = font.render(text, True, BLACK)
-            screen.blit(label, (WINDOW_WIDTH // 2 - 250, 105 + i * 80))
-            self.input_boxes[key].draw(screen)
+            label = text_cache.render(text, 30, BLACK)
+            self.screen.blit(label, (WINDOW_WIDTH // 2 - 250, 105 + i * 80))
+            self.input_boxes[key].draw(self.screen)
 
         # Dessin des boutons
         for button in self.gender_buttons.values():
-            button.draw(screen)
+            button.draw(self.screen)
         for button in self.condition_buttons.values():
-            button.draw(screen)
-        self.start_button.draw(screen)
+            button.draw(self.screen)
+        self.start_button.draw(self.screen)
 
     def draw_game_screen(self):
-        """Dessine l'écran de jeu"""
-        # Fond
-        screen.fill(WHITE)
-
-        # Dessine le chemin
-        current_path = self.level_paths[self.current_level]
-        for i in range(len(current_path) - 1):
-            pygame.draw.line(screen, BLACK, current_path[i], current_path[i + 1], 2)
+        """
+        Dessine l'écran de jeu.
 
-        # Points du chemin
-        for point in current_path:
-            pygame.draw.circle(screen, BLUE, point, 5)
+        Retourne la liste des zones modifiées en mode dirty rects,
+        None si tout l'écran doit être mis à jour.
+        """
+        # Fond et circuit pré-rendus
+        layer = self.level_layers.get(self.level_paths[self.current_level])
+        if self.dirty_rects:
+            self.dirty_tracker.restore(self.screen, layer)
+        else:
+            self.screen.blit(layer, (0, 0))
+        rects = []
 
         # Dessine le mobile
-        pygame.draw.circle(screen, RED, self.mobile_pos, 10)
+        rects.append(pygame.draw.circle(self.screen, RED, self.mobile_pos, 10))
 
         # Dessine le bonus actif avec animation de clignotement
         if self.active_bonus:
-            alpha = int(255 * (0.5 + 0.5 * abs(math.sin(time.time() * 5))))
+            alpha = int(255 * (0.5 + 0.5 * abs(math.sin(self.time_source() * 5))))
             bonus_surface = pygame.Surface((30, 30), pygame.SRCALPHA)
             pygame.draw.circle(bonus_surface, (*YELLOW, alpha), (15, 15), 15)
-            screen.blit(bonus_surface,
-                        (self.active_bonus["position"][0] - 15,
-                         self.active_bonus["position"][1] - 15))
+            rects.append(self.screen.blit(bonus_surface,
+                                     (self.active_bonus["position"][0] - 15,
+                                      self.active_bonus["position"][1] - 15)))
 
-        # Informations
-        font = pygame.font.Font(None, 32)
+        # Informations (rendues seulement quand leur valeur change)
         info_texts = [
             f"Niveau: {self.current_level}",
             f"Temps: {self.time_left}s",
-            f"Score: {len(self.game_data['response_times'])}"
+            f"Score: {len(self.game_data['response_times']) + len(self.game_data['target_response_times'])}"
         ]
 
         for i, text in enumerate(info_texts):
-            surface = font.render(text, True, BLACK)
-            screen.blit(surface, (10, 10 + i * 40))
+            surface = text_cache.render(text, 32, BLACK)
+            rects.append(self.screen.blit(surface, (10, 10 + i * 40)))
 
         # Dessine les images clignotantes
         if self.image_visible:  # Si l'image doit être visible
             image_key, pos = self.image_positions[self.current_level][self.current_image_index]
-            screen.blit(self.images[image_key], pos)
+            rects.append(self.screen.blit(self.images[image_key], pos))
+
+        # Cibles du mode multi-cibles (un seul appel de blit pour toutes)
+        if self.targets.active:
+            rects.extend(self.screen.blits(
+                [(self.images[target["image_key"]], target["rect"]) for target in self.targets.active.values()]
+            ))
+
+        overlay_rect = self.draw_profiler_overlay()
+        if overlay_rect is not None:
+            rects.append(overlay_rect)
+
+        if not self.dirty_rects:
+            return None
+        return self.dirty_tracker.collect(rects)
+
+    def draw_profiler_overlay(self):
+        """Affiche le résumé du profileur en haut à droite, retourne la zone dessinée"""
+        if not self.show_profiler_overlay:
+            return None
+        # Texte rafraîchi deux fois par seconde pour ne pas saturer le cache de texte
+        if self.profiler.work.samples % (FPS // 2) == 0 or not self.profiler_overlay_lines:
+            self.profiler_overlay_lines = self.profiler.overlay_lines()
+
+        area = None
+        for i, text in enumerate(self.profiler_overlay_lines):
+            surface = text_cache.render(text, 24, GRAY)
+            rect = self.screen.blit(surface, (WINDOW_WIDTH - surface.get_width() - 10, 10 + i * 24))
+            area = rect if area is None else area.union(rect)
+        return area
+
+    def draw(self):
+        """Dessine l'écran courant et retourne les zones à mettre à jour (None = tout l'écran)"""
+        if self.game_state == "playing":
+            return self.draw_game_screen()
+
+        self.dirty_tracker.invalidate()
+        self.screen.fill(WHITE)
+        if self.game_state == "setup":
+            self.draw_setup_screen()
+        elif self.game_state == "evaluation":
+            self.draw_evaluation_screen()
+        elif self.game_state == "finished":
+            self.draw_final_screen()
+        self.draw_profiler_overlay()
+        return None
 
     def draw_evaluation_screen(self):
         """Dessine l'écran d'évaluation"""
         # Titre
-        font = pygame.font.Font(None, 48)
-        title = font.render(f"Évaluation du niveau {self.current_level}", True, BLACK)
-        screen.blit(title, (WINDOW_WIDTH // 2 - title.get_width() // 2, 30))
+        title = text_cache.render(f"Évaluation du niveau {self.current_level}", 48, BLACK)
+        self.screen.blit(title, (WINDOW_WIDTH // 2 - title.get_width() // 2, 30))
 
         # Sous-titres
-        font = pygame.font.Font(None, 36)
         subtitles = {
             'performance': "Performance",
             'stress': "Niveau de stress",
@@ -680,22 +837,20 @@ class Game:
 
         x_positions = [150, 400, 650]
         for i, (key, text) in enumerate(subtitles.items()):
-            surface = font.render(text, True, BLACK)
-            screen.blit(surface, (x_positions[i] - surface.get_width() // 2, 100))
+            surface = text_cache.render(text, 36, BLACK)
+            self.screen.blit(surface, (x_positions[i] - surface.get_width() // 2, 100))
 
             # Dessine les boutons d'évaluation
             for button in self.evaluation_buttons[key]:
-                button.draw(screen)
+                button.draw(self.screen)
 
     def draw_final_screen(self):
         """Dessine l'écran final"""
         # Titre
-        font = pygame.font.Font(None, 48)
-        title = font.render("Expérience terminée", True, BLACK)
-        screen.blit(title, (WINDOW_WIDTH // 2 - title.get_width() // 2, 30))
+        title = text_cache.render("Expérience terminée", 48, BLACK)
+        self.screen.blit(title, (WINDOW_WIDTH // 2 - title.get_width() // 2, 30))
 
         # Statistiques
-        font = pygame.font.Font(None, 36)
         stats = [
             f"Temps de réaction moyen: {self.get_average_response_time():.2f}s",
             f"Bonus manqués: {self.game_data['missed_bonus']}",
@@ -703,17 +858,23 @@ class Game:
         ]
 
         for i, text in enumerate(stats):
-            surface = font.render(text, True, BLACK)
-            screen.blit(surface, (WINDOW_WIDTH // 2 - surface.get_width() // 2, 150 + i * 50))
+            surface = text_cache.render(text, 36, BLACK)
+            self.screen.blit(surface, (WINDOW_WIDTH // 2 - surface.get_width() // 2, 150 + i * 50))
 
 
-        # Message de sauvegarde
-        save_text = font.render("Données sauvegardées", True, GREEN)
-        screen.blit(save_text, (WINDOW_WIDTH // 2 - save_text.get_width() // 2, 400))
+        # Message de sauvegarde (écriture en arrière-plan)
+        if self.writer.pending():
+            save_text = text_cache.render("Sauvegarde en cours...", 36, BLACK)
+        else:
+            save_text = text_cache.render("Données sauvegardées", 36, GREEN)
+        self.screen.blit(save_text, (WINDOW_WIDTH // 2 - save_text.get_width() // 2, 400))
 
-        # Instructions pour quitter
-        quit_text = font.render("Appuyez sur ESPACE pour quitter", True, BLACK)
-        screen.blit(quit_text, (WINDOW_WIDTH // 2 - quit_text.get_width() // 2, 500))
+        # Instructions pour quitter (ou passer au participant suivant en mode kiosque)
+        if self.kiosk:
+            quit_text = text_cache.render("Appuyez sur ESPACE pour le participant suivant", 36, BLACK)
+        else:
+            quit_text = text_cache.render("Appuyez sur ESPACE pour quitter", 36, BLACK)
+        self.screen.blit(quit_text, (WINDOW_WIDTH // 2 - quit_text.get_width() // 2, 500))
 
     def get_average_response_time(self):
         """Calcule le temps de réaction moyen"""
@@ -721,13 +882,22 @@ class Game:
             return 0
         return sum(self.game_data['response_times']) / len(self.game_data['response_times'])
 
+    def heart_rate_stream(self):
+        """Échantillons de FC reçus pendant la session, en secondes depuis son début"""
+        if self.heart_rate_source is None or self.session_start_time is None:
+            return {"live": False, "samples": []}
+        return {
+            "live": True,
+            "samples": [
+                [round(timestamp - self.session_start_time, 3), round(bpm, 1)]
+                for timestamp, bpm in self.heart_rate_source.stream()
+                if timestamp >= self.session_start_time
+            ]
+        }
+
     def save_data(self):
         """Sauvegarde les données de l'expérience"""
-        # Création du dossier de données s'il n'existe pas
-        data_dir = Path("data")
-        data_dir.mkdir(exist_ok=True)
-
-        # Préparation des données
+        # Préparation des données (copies : l'écriture a lieu dans un autre thread)
         data = {
             "participant_info": {
                 "id": self.participant_data["id"],
@@ -739,12 +909,15 @@ class Game:
             },
 
             "performance_data": {
-                "response_times": self.game_data["response_times"],
+                "response_times": list(self.game_data["response_times"]),
+                "response_levels": list(self.game_data["response_levels"]),  # Niveau de chaque réponse
+                "target_response_times": list(self.game_data["target_response_times"]),
+                "target_response_levels": list(self.game_data["target_response_levels"]),
                 "average_response_time": self.get_average_response_time(),
                 "missed_bonus": self.game_data["missed_bonus"],
                 "command_errors": self.game_data["command_errors"]
             },
-            "evaluations": self.game_data["level_evaluations"],
+            "evaluations": list(self.game_data["level_evaluations"]),
             "timestamp": datetime.now().strftime("%Y-%m-%d_%H-%M-%S"),
             "bip_data": {
                 "condition": self.participant_data['condition'],
@@ -752,83 +925,237 @@ class Game:
                 "total_bips": len(self.game_data['bip_times']),
                 "missed_bips": self.game_data['missed_bips']
             },
+            "stimulus": {
+                "seed": self.stimulus_seed,
+                "timeline": dict(self.game_data['stimulus_timeline'])
+            },
+            "heart_rate_stream": self.heart_rate_stream(),
+            "telemetry": {
+                **self.telemetry.summary(),
+                "files": list(self.game_data['telemetry_files'])
+            } if self.telemetry is not None else None,
+            "frame_profile": self.profiler.summary(),
+            "input_capture": self.input_capture.summary(),
+            "audio": self.sound_manager.latency_summary() if self.sound_manager is not None else None,
+            "kiosk": self.kiosk_summary(),
+            "targets": self.targets.summary() if self.n_targets else None,
+            "circuit": self.circuit,
+            "onset_timing": {
+                "pacing": self.effective_pacing(),
+                **self.onset_timing.summary()
+            },
         }
 
-        # Sauvegarde au format JSON
-        filename = data_dir / f"participant_{self.participant_data['id']}_{data['timestamp']}.json"
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
-
-        # Sauvegarde au format CSV pour analyse facile
-        csv_filename = data_dir / f"participant_{self.participant_data['id']}_{data['timestamp']}.csv"
-        with open(csv_filename, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.writer(f)
-            writer.writerow(['Participant ID', 'Age', 'Genre', 'Condition',
-                             'FC Avant', 'FC Après', 'Temps Moyen', 'Bonus Manqués',
-                             'Erreurs Commande'])
-            writer.writerow([
-                data['participant_info']['id'],
-                data['participant_info']['age'],
-                data['participant_info']['gender'],
-                data['participant_info']['condition'],
-                data['participant_info']['heart_rate_before'],
-                data['participant_info']['heart_rate_after'],
-                data['performance_data']['average_response_time'],
-                data['performance_data']['missed_bonus'],
-                data['performance_data']['command_errors']
-            ])
+        # Sérialisation et écriture en arrière-plan (JSON + CSV)
+        stem = f"participant_{self.participant_data['id']}_{data['timestamp']}"
+        self.writer.submit(write_session_files, self.data_dir, stem, data)
+        if self.recorder is not None:
+            recording = self.recorder.to_dict({
+                "response_times": data["performance_data"]["response_times"],
+                "target_response_times": data["performance_data"]["target_response_times"],
+                "missed_bonus": data["performance_data"]["missed_bonus"],
+                "command_errors": data["performance_data"]["command_errors"]
+            })
+            self.recorder.start(0.0, {}, None, False, {})  # La session enregistrée appartient désormais à l'écrivain
+            self.writer.submit(write_json, self.data_dir / "replay" / f"{stem}.replay.json", recording)
 
     def run(self):
         """Boucle principale du jeu"""
+        self.start_runtime()
         running = True
+        frame_ns = int(1e9 / FPS)
+        next_frame_ns = self.input_capture.clock_ns()
+        profiler = self.profiler
+        # busy / vsync : la frame est préparée puis affichée à une échéance connue à l'avance
+        render_ahead = self.pacing != "sleep"
         while running:
-            current_time = time.time()
+            profiler.begin_frame()
+            current_time = self.time_source()
 
-            # Gestion des événements
-            for event in pygame.event.get():
+            # Gestion des événements, avec leur horodatage de capture
+            for event_time, event in self.input_capture.drain():
                 if event.type == pygame.QUIT:
                     running = False
                 if event.type == pygame.KEYDOWN and event.key == pygame.K_SPACE:
                     if self.game_state == "finished":
+                        if self.kiosk:
+                            self.next_participant()
+                            continue
                         running = False
+                if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                    self.show_profiler_overlay = isinstance(profiler, FrameProfiler) and not self.show_profiler_overlay
+                    self.dirty_tracker.invalidate()
 
-                # Gestion des événements selon l'état du jeu
-                if self.game_state == "setup":
-                    self.handle_setup_input(event)  # Appelé à chaque événement
-                elif self.game_state == "playing":
-                    self.handle_playing_input(event)
-                elif self.game_state == "evaluation":
-                    self.handle_evaluation_input(event)
+                self.handle_event(event, event_time)
+            profiler.mark("events")
+
+            if render_ahead:
+                next_frame_ns = max(next_frame_ns + frame_ns, self.input_capture.clock_ns())
+                self.next_flip_time = next_frame_ns / 1e9
 
             # Mise à jour du jeu
-            if self.game_state == "playing":
-                self.update_game(current_time)
+            self.step(current_time)
+            profiler.mark("update")
 
             # Dessin
-            screen.fill(WHITE)
-            if self.game_state == "setup":
-                self.draw_setup_screen()
-            elif self.game_state == "playing":
-                self.draw_game_screen()
-            elif self.game_state == "evaluation":
-                self.draw_evaluation_screen()
-            elif self.game_state == "finished":
-                self.draw_final_screen()
-
-            pygame.display.flip()
-            clock.tick(FPS)
-
-        pygame.quit()
+            dirty = self.draw()
+            profiler.mark("draw")
+
+            if render_ahead:
+                if self.runtime.vsync:
+                    # flip() attend le rafraîchissement vertical : capture des entrées jusque peu avant
+                    self.input_capture.wait_until(next_frame_ns - int(SPIN_MARGIN * 1e9))
+                else:
+                    self.input_capture.wait_until(next_frame_ns, spin=SPIN_MARGIN)
+                profiler.mark("wait")
+
+            if dirty is None:
+                pygame.display.flip()
+            else:
+                pygame.display.update(dirty)
+            flip_time = self.time_source()
+            profiler.mark("flip", waiting=self.runtime.vsync)  # vsync : flip() bloque jusqu'au rafraîchissement
+            self.present(flip_time)
+
+            if render_ahead:
+                if self.runtime.vsync:
+                    next_frame_ns = int(flip_time * 1e9)  # Recalage sur le rafraîchissement mesuré
+            else:
+                # Attente de la frame suivante en continuant à capturer les entrées
+                next_frame_ns += frame_ns
+                now_ns = self.input_capture.clock_ns()
+                if next_frame_ns < now_ns:
+                    next_frame_ns = now_ns  # Frame en retard : pas de rattrapage en rafale
+                self.input_capture.wait_until(next_frame_ns)
+                profiler.mark("wait")
+            profiler.end_frame()
+
+        self.shutdown()
         sys.exit()
 
-    def handle_playing_input(self, event):
+    def shutdown(self):
+        """Termine les écritures en attente puis libère les ressources de la session"""
+        if self.journal is not None:
+            self.journal.close()  # Session interrompue : le journal permet de la reconstruire
+        self.writer.close()
+        for error in self.writer.errors:
+            print(f"Écriture non effectuée : {error}")
+        self.assets.shutdown()
+        if self.heart_rate_source is not None:
+            self.heart_rate_source.stop()
+        self.runtime.close()
+
+    def next_participant(self):
+        """
+        Mode kiosque : revient à l'écran de configuration pour un nouveau participant.
+
+        Fenêtre, banque audio, cache de textes, images chargées et port du
+        cardiofréquencemètre sont conservés ; seul l'état du participant est
+        réinitialisé.
+        """
+        started = time.perf_counter()
+        self.writer.flush()  # La session précédente est sur disque avant d'en commencer une autre
+        self.reset_game()
+        self.setup_ui()
+        self.input_capture.reset()
+        self.profiler.reset()
+        self.dirty_tracker.invalidate()
+        if self.sound_manager is not None:
+            self.sound_manager.reset_stats()
+        if self.heart_rate_source is not None:
+            self.heart_rate_source.clear_stream()
+        self.assets.preload(self.level_image_specs(1))
+        self.kiosk_session += 1
+        self.kiosk_reset_ms = (time.perf_counter() - started) * 1000
+        self.log(f"Participant suivant (session {self.kiosk_session}) prêt en {self.kiosk_reset_ms:.1f} ms")
+
+    def kiosk_summary(self):
+        """Rang de la session et délai depuis la fin de la précédente (mode kiosque)"""
+        if not self.kiosk:
+            return None
+        return {
+            "session": self.kiosk_session,
+            "reset_ms": round(self.kiosk_reset_ms, 3) if self.kiosk_reset_ms is not None else None,
+            "turnaround_s": round(self.kiosk_turnaround, 3) if self.kiosk_turnaround is not None else None
+        }
+
+    def start_runtime(self):
+        """Ouvre la fenêtre et l'audio de la session"""
+        self.runtime.start()
+        if self.sound_manager is None:
+            self.sound_manager = self.runtime.audio
+        if self.heart_rate_source is not None:
+            self.heart_rate_source.start()
+        self.assets.convert_loaded()
+        for image_key in self.images:
+            self.images[image_key] = self.assets.load(*IMAGE_FILES[image_key])
+        # Décodage des images du premier niveau pendant l'écran de configuration
+        self.assets.preload(self.level_image_specs(1))
+
+    def handle_event(self, event, event_time=None):
+        """Distribue un événement selon l'état du jeu"""
+        self.frame_input_events += 1
+        if self.recorder is not None and self.game_state in ("playing", "evaluation"):
+            self.recorder.event(event_time if event_time is not None else self.time_source(), event)
+        if self.game_state == "setup":
+            self.handle_setup_input(event)  # Appelé à chaque événement
+        elif self.game_state == "playing":
+            self.handle_playing_input(event, event_time)
+        elif self.game_state == "evaluation":
+            self.handle_evaluation_input(event)
+
+    def step(self, current_time):
+        """Avance la logique du jeu d'une frame"""
+        if self.game_state == "playing":
+            self.update_game(current_time)
+            if self.recorder is not None:
+                self.recorder.frame(current_time, self.heart_rate, self.next_flip_time)
+            self.record_frame(current_time)
+            if self.game_state != "playing":
+                self.flush_telemetry()  # Fin du niveau : écriture en bloc
+                if self.journal is not None:
+                    self.journal.flush(current_time - self.session_start_time)
+            elif self.journal is not None:
+                self.journal.tick(current_time - self.session_start_time)
+        self.last_frame_time = current_time
+        self.frame_input_events = 0
+
+    def record_frame(self, current_time):
+        """Enregistre l'état de la frame dans la télémétrie"""
+        if self.telemetry is None:
+            return
+        frame_time = current_time - self.last_frame_time if self.last_frame_time is not None else 0.0
+        self.telemetry.record(
+            current_time, self.current_level, self.mobile_node, self.mobile_pos[0], self.mobile_pos[1],
+            self.current_image_index, self.image_visible, self.active_bonus is not None,
+            frame_time, self.frame_input_events,
+        )
+
+    def flush_telemetry(self):
+        """Écrit la télémétrie du niveau courant sur disque"""
+        if self.telemetry is None:
+            return
+        filename = f"participant_{self.participant_data['id']}_{self.session_timestamp}_niveau{self.current_level}.npy"
+        self.writer.submit(write_array, self.data_dir / "telemetry" / filename, self.telemetry.take())
+        self.game_data['telemetry_files'].append(f"telemetry/{filename}")
+        self.journal_event(journal.TELEMETRY_FILE, self.last_frame_time, path=f"telemetry/{filename}")
+
+    def handle_playing_input(self, event, event_time=None):
         """Gère les entrées pendant le jeu"""
         if event.type == pygame.MOUSEBUTTONDOWN:
-            mouse_pos = pygame.mouse.get_pos()
+            mouse_pos = event.pos
+            if self.n_targets and self.handle_target_click(mouse_pos, event_time):
+                return
+            handled = False
             if self.image_visible:  # Vérifier le clic sur l'image visible
-                self.handle_image_click(mouse_pos)
+                handled = self.handle_image_click(mouse_pos, event_time)
             if self.active_bonus:  # Vérifier le clic sur un bonus actif
-                self.handle_bonus_click(mouse_pos)
+                handled = self.handle_bonus_click(mouse_pos, event_time) or handled
+            if self.n_targets and not handled:
+                # Faux clic : ni cible, ni image, ni bonus touché
+                self.targets.false_clicks += 1
+                self.journal_event(journal.FALSE_CLICK, event_time if event_time is not None else self.time_source(),
+                                   position=list(mouse_pos))
 
         elif event.type == pygame.KEYDOWN:
             if event.key in [pygame.K_LEFT, pygame.K_RIGHT, pygame.K_UP, pygame.K_DOWN]:
@@ -847,31 +1174,80 @@ class Game:
 
     def update_game(self, current_time):
         """Met à jour l'état du jeu"""
-        self.manage_images(current_time)
-        self.manage_bips(current_time)
-
         if self.start_time is None:
             self.start_time = current_time
 
         # Mise à jour du temps restant
         elapsed_time = int(current_time - self.start_time)
-        self.time_left = max(0, 60 - elapsed_time)
+        self.time_left = max(0, LEVEL_DURATION - elapsed_time)
 
         # Vérification de fin de niveau
         if self.time_left <= 0:
             self.game_state = "evaluation"
+            self.targets.clear()  # Cibles encore affichées : manquées
+            # Préchargement des images du niveau suivant pendant l'évaluation
+            if self.current_level < 3:
+                self.assets.preload(self.level_image_specs(self.current_level + 1))
             return
 
-        # Gestion des bonus
-        self.schedule_bonus()
+        # Stimuli programmés (images, bips, bonus)
+        self.heart_rate = self.current_heart_rate()
+        self.manage_bips(current_time)
+        self.manage_stimuli(current_time)
 
         # Vérification des bonus expirés
         if self.active_bonus:
             if current_time - self.active_bonus["start_time"] > 5:
                 self.game_data["missed_bonus"] += 1
+                self.journal_event(journal.MISSED_BONUS, current_time, reason="expired",
+                                   position=list(self.active_bonus["position"]))
                 self.active_bonus = None
 
 
 if __name__ == "__main__":
-    game = Game()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Mobile Game - Facteurs Humains")
+    parser.add_argument("--hr-port", help="Port série du cardiofréquencemètre (ex. /dev/ttyUSB0, COM3)")
+    parser.add_argument("--hr-baudrate", type=int, default=9600)
+    parser.add_argument("--fake-hr", type=float, metavar="BPM",
+                        help="Simule un cardiofréquencemètre sur pseudo-terminal (POSIX)")
+    parser.add_argument("--profile", action="store_true",
+                        help="Chronomètre les phases de chaque frame (F3 : affichage à l'écran)")
+    parser.add_argument("--kiosk", action="store_true",
+                        help="Enchaîne les participants sans relancer le jeu (retour à la configuration)")
+    parser.add_argument("--pacing", choices=PACING_MODES, default="sleep",
+                        help="Cadencement des frames : pauses, attente active ou synchronisation verticale")
+    parser.add_argument("--dirty-rects", action="store_true", default=DIRTY_RECTS,
+                        help="Pendant le jeu, n'envoie à l'écran que les zones modifiées au lieu de toute la fenêtre")
+    parser.add_argument("--targets", type=int, default=0, metavar="N",
+                        help="Mode multi-cibles : N cibles clignotantes simultanées en plus des stimuli habituels")
+    parser.add_argument("--circuit-seed", type=int, metavar="GRAINE",
+                        help="Circuits générés à partir de cette graine au lieu des circuits historiques")
+    parser.add_argument("--circuit-size", type=int, default=DEFAULT_SIZE, metavar="PAS",
+                        help="Longueur des circuits générés (pas de grille)")
+    parser.add_argument("--circuit-step", type=int, default=None, metavar="PX",
+                        help="Pas de la grille des circuits générés (par défaut, adapté à la longueur)")
+    parser.add_argument("--turn-density", type=float, default=DEFAULT_TURN_DENSITY,
+                        help="Probabilité de virage à chaque pas des circuits générés")
+    parser.add_argument("--fsync", choices=FSYNC_POLICIES, default="file",
+                        help="Politique de synchronisation disque des sauvegardes")
+    args = parser.parse_args()
+    circuit = None
+    if args.circuit_seed is not None:
+        try:
+            circuit = circuit_params((WINDOW_WIDTH, WINDOW_HEIGHT), args.circuit_seed, args.circuit_size,
+                                     args.turn_density, args.circuit_step)
+        except ValueError as e:
+            parser.error(str(e))
+
+    heart_rate_source = None
+    if args.fake_hr:
+        device = FakeHeartRateDevice(bpm=args.fake_hr).start()
+        heart_rate_source = SerialHeartRateSource(device.port)
+    elif args.hr_port:
+        heart_rate_source = SerialHeartRateSource(args.hr_port, args.hr_baudrate)
+
+    game = Game(heart_rate_source=heart_rate_source, profile=args.profile, fsync=args.fsync, kiosk=args.kiosk,
+                pacing=args.pacing, dirty_rects=args.dirty_rects, targets=args.targets, circuit=circuit)
     game.run()
\ No newline at end of file
@@ -0,0 +1,210 @@
+"""
+Sources de fréquence cardiaque.
+
+SerialHeartRateSource lit un cardiofréquencemètre série dans un thread de
+fond : chaque échantillon (horodatage, BPM, BPM lissé) est écrit dans un
+tampon circulaire préalloué, seule mémoire des échantillons. Le tampon est
+protégé par un verrou tenu quelques microsecondes, jamais pendant la lecture
+du port : la boucle de rendu lit la valeur lissée à chaque frame sans
+bloquer sur le port série.
+
+FakeHeartRateDevice simule un appareil sur un pseudo-terminal (POSIX) pour
+les essais sans matériel.
+"""
+import os
+import re
+import threading
+import time
+
+import numpy as np
+
+BPM_PATTERN = re.compile(rb"(\d+(?:\.\d+)?)")
+MIN_BPM = 30
+MAX_BPM = 220
+
+
+def parse_bpm(line):
+    """Extrait une valeur de BPM plausible d'une ligne (ex. b"72", b"BPM:72.5"), sinon None"""
+    match = BPM_PATTERN.search(line)
+    if match is None:
+        return None
+    bpm = float(match.group(1))
+    return bpm if MIN_BPM <= bpm <= MAX_BPM else None
+
+
+class RingBuffer:
+    """
+    Tampon circulaire préalloué (horodatage, BPM, BPM lissé).
+
+    Au-delà de capacity échantillons, les plus anciens sont écrasés. Non
+    synchronisé : l'appelant tient son verrou.
+    """
+
+    def __init__(self, capacity=16384):
+        self.times = np.zeros(capacity)
+        self.values = np.zeros(capacity)
+        self.smoothed = np.zeros(capacity)
+        self.capacity = capacity
+        self.count = 0
+
+    def push(self, timestamp, value, smoothed):
+        index = self.count % self.capacity
+        self.times[index] = timestamp
+        self.values[index] = value
+        self.smoothed[index] = smoothed
+        self.count += 1
+
+    def latest(self):
+        """Dernier échantillon (horodatage, BPM, BPM lissé), None si le tampon est vide"""
+        if not self.count:
+            return None
+        index = (self.count - 1) % self.capacity
+        return self.times[index], self.values[index], self.smoothed[index]
+
+    def recent(self, n=None):
+        """Les n derniers échantillons conservés (tous par défaut), du plus ancien au plus récent"""
+        n = min(self.count if n is None else n, self.count, self.capacity)
+        indices = np.arange(self.count - n, self.count) % self.capacity
+        return self.times[indices], self.values[indices]
+
+    @property
+    def dropped(self):
+        """Nombre d'échantillons écrasés"""
+        return max(0, self.count - self.capacity)
+
+    def clear(self):
+        self.count = 0
+
+
+class SerialHeartRateSource:
+    """Lecture en continu d'un cardiofréquencemètre série dans un thread de fond"""
+
+    def __init__(self, port, baudrate=9600, smoothing=0.3, capacity=16384, clock=time.perf_counter):
+        self.port = port
+        self.baudrate = baudrate
+        self.smoothing = smoothing  # Coefficient de la moyenne mobile exponentielle
+        self.clock = clock
+        # Flux de la session (16384 échantillons : plus de 4 h à 1 Hz)
+        self.buffer = RingBuffer(capacity)
+        self.lock = threading.Lock()
+        self.errors = 0
+        self.reported_dropped = 0  # Échantillons écrasés déjà signalés
+        self.running = False
+        self.thread = None
+        self.connection = None
+
+    def start(self):
+        """Ouvre le port et démarre le thread de lecture"""
+        import serial  # pyserial, importé seulement si une source série est utilisée
+
+        if self.running:
+            return self
+        self.connection = serial.Serial(self.port, self.baudrate, timeout=0.1)
+        self.running = True
+        self.thread = threading.Thread(target=self.read_loop, name="heart-rate-reader", daemon=True)
+        self.thread.start()
+        return self
+
+    def read_loop(self):
+        while self.running:
+            try:
+                line = self.connection.readline()
+            except Exception as e:
+                self.report_error(f"erreur de lecture : {e}")
+                time.sleep(0.1)
+                continue
+            if line:
+                bpm = parse_bpm(line)
+                if bpm is None:
+                    self.errors += 1
+                else:
+                    self.add_sample(self.clock(), bpm)
+
+    def report_error(self, message):
+        """Compte et signale une erreur de la source"""
+        self.errors += 1
+        print(f"Cardiofréquencemètre : {message}")
+
+    def add_sample(self, timestamp, bpm):
+        with self.lock:
+            latest = self.buffer.latest()
+            smoothed = bpm if latest is None else latest[2] + self.smoothing * (bpm - latest[2])
+            self.buffer.push(timestamp, bpm, smoothed)
+
+    def current_bpm(self):
+        """Dernière valeur lissée (None tant qu'aucun échantillon n'est reçu)"""
+        with self.lock:
+            latest = self.buffer.latest()
+        return None if latest is None else float(latest[2])
+
+    def stream(self):
+        """Échantillons conservés [(horodatage, BPM), ...], du plus ancien au plus récent"""
+        with self.lock:
+            times, values = self.buffer.recent()
+            dropped = self.buffer.dropped - self.reported_dropped
+            self.reported_dropped = self.buffer.dropped
+        if dropped:
+            # Seuls les échantillons écrasés depuis l'appel précédent sont signalés
+            self.report_error(f"{dropped} échantillons anciens écrasés (tampon plein)")
+        return list(zip(times.tolist(), values.tolist()))
+
+    def clear_stream(self):
+        """Oublie les échantillons et le lissage du participant précédent (le port reste ouvert)"""
+        with self.lock:
+            self.buffer.clear()
+            self.reported_dropped = 0
+
+    def stop(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(timeout=1)
+            self.thread = None
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+
+class FakeHeartRateDevice:
+    """
+    Faux cardiofréquencemètre sur pseudo-terminal.
+
+    Exemple :
+        with FakeHeartRateDevice(bpm=72) as device:
+            source = SerialHeartRateSource(device.port).start()
+    """
+
+    def __init__(self, bpm=72, variability=3.0, rate=1.0, seed=None):
+        self.bpm = bpm
+        self.variability = variability
+        self.interval = 1.0 / rate
+        self.rng = np.random.default_rng(seed)
+        self.master, self.slave = os.openpty()
+        self.port = os.ttyname(self.slave)
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self.write_loop, name="fake-heart-rate", daemon=True)
+        self.thread.start()
+        return self
+
+    def write_loop(self):
+        while self.running:
+            bpm = self.bpm + self.rng.normal(0, self.variability)
+            os.write(self.master, f"BPM:{bpm:.1f}\n".encode())
+            time.sleep(self.interval)
+
+    def stop(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(timeout=1)
+            self.thread = None
+        os.close(self.master)
+        os.close(self.slave)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.stop()
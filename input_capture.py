@@ -0,0 +1,170 @@
+"""
+Capture des entrées à haute résolution, découplée de la cadence d'affichage.
+
+Plutôt que de dormir pendant toute la fin de frame (clock.tick), la boucle
+interroge la file d'événements SDL toutes les ~1 ms et horodate chaque
+événement sur une horloge monotone en nanosecondes dès son arrivée. Le jeu
+reçoit ensuite les événements avec leur horodatage d'origine.
+
+Le pompage des événements SDL doit rester sur le thread principal, d'où une
+scrutation dans le temps d'attente de la frame plutôt qu'un thread dédié.
+"""
+import time
+from collections import deque
+
+import numpy as np
+import pygame
+
+
+class InputCapture:
+    """Horodate les événements pygame à leur arrivée et mesure la latence de capture"""
+
+    def __init__(self, poll_interval=0.001, clock_ns=time.perf_counter_ns, max_samples=100000):
+        self.poll_interval = poll_interval
+        self.clock_ns = clock_ns
+        self.pending = deque()
+        # Latences capture → traitement (ns), mémoire bornée
+        self.latencies_ns = np.zeros(max_samples, dtype=np.int64)
+        self.latency_count = 0
+
+    def poll(self):
+        """Vide la file SDL en horodatant chaque événement"""
+        events = pygame.event.get()
+        if events:
+            timestamp = self.clock_ns()
+            self.pending.extend((timestamp, event) for event in events)
+
+    def wait_until(self, deadline_ns, spin=0.0):
+        """
+        Attend l'échéance de la prochaine frame en continuant à capturer les entrées.
+
+        Les spin dernières secondes sont attendues en boucle active, pour ne pas
+        dépendre de la précision de time.sleep.
+        """
+        sleep_above_ns = int((self.poll_interval + spin) * 1e9)
+        while True:
+            self.poll()
+            remaining = deadline_ns - self.clock_ns()
+            if remaining <= 0:
+                return
+            if remaining > sleep_above_ns:
+                time.sleep(self.poll_interval)
+
+    def drain(self):
+        """
+        Retourne les événements capturés sous forme de (temps en secondes, événement).
+
+        Le temps est exprimé dans la base de time.perf_counter().
+        """
+        self.poll()
+        now = self.clock_ns()
+        captured = []
+        while self.pending:
+            timestamp, event = self.pending.popleft()
+            self.record_latency(now - timestamp)
+            captured.append((timestamp / 1e9, event))
+        return captured
+
+    def record_latency(self, latency_ns):
+        index = self.latency_count % len(self.latencies_ns)
+        self.latencies_ns[index] = latency_ns
+        self.latency_count += 1
+
+    def summary(self):
+        """Statistiques de latence de capture en millisecondes"""
+        samples = self.latencies_ns[:min(self.latency_count, len(self.latencies_ns))]
+        if not len(samples):
+            return {"events": 0}
+        samples_ms = samples / 1e6
+        return {
+            "events": self.latency_count,
+            "mean_latency_ms": round(float(samples_ms.mean()), 3),
+            "p95_latency_ms": round(float(np.percentile(samples_ms, 95)), 3),
+            "max_latency_ms": round(float(samples_ms.max()), 3),
+        }
+
+    def reset(self):
+        self.pending.clear()
+        self.latency_count = 0
+
+
+# Attributs d'événement conservés pour le rejeu
+EVENT_FIELDS = ("pos", "button", "key", "unicode", "mod")
+
+
+def event_to_record(event):
+    """Forme sérialisable (JSON) d'un événement pygame : [type, attributs]"""
+    fields = {name: getattr(event, name) for name in EVENT_FIELDS if hasattr(event, name)}
+    if "pos" in fields:
+        fields["pos"] = list(fields["pos"])
+    return [event.type, fields]
+
+
+def event_from_record(event_type, fields):
+    """Reconstruit un événement pygame à partir de event_to_record"""
+    fields = dict(fields)
+    if "pos" in fields:
+        fields["pos"] = tuple(fields["pos"])
+    return pygame.event.Event(event_type, fields)
+
+
+class InputRecorder:
+    """
+    Enregistre ce qui rend une session non déterministe, pour la rejouer :
+    graine des stimuli, instants de début de niveau, instants des frames de
+    jeu (FC en direct, affichage visé), instants des affichages ayant montré
+    un stimulus et événements d'entrée horodatés. Les temps sont
+    relatifs au début de la session ; chaque événement est rattaché à la frame
+    avant laquelle il a été traité.
+    """
+
+    def __init__(self):
+        self.start(0.0, {}, None, False, {})
+
+    def start(self, origin, participant_info, seed, live_heart_rate, options):
+        self.origin = origin
+        self.options = dict(options)  # Paramètres du jeu influant sur la session (ex. nombre de cibles)
+        self.participant_info = dict(participant_info)
+        self.seed = seed
+        self.live_heart_rate = live_heart_rate
+        self.level_starts = []
+        self.frame_times = []
+        self.frame_heart_rates = []
+        self.flip_targets = []
+        self.presents = []
+        self.events = []
+
+    def level_start(self, t, heart_rate):
+        self.level_starts.append([t - self.origin, heart_rate if self.live_heart_rate else None])
+
+    def frame(self, t, heart_rate, flip_target=None):
+        self.frame_times.append(t - self.origin)
+        if self.live_heart_rate:
+            self.frame_heart_rates.append(heart_rate)
+        if flip_target is not None:
+            self.flip_targets.append(flip_target - self.origin)
+
+    def present(self, flip_time):
+        """Affichage de la dernière frame enregistrée"""
+        self.presents.append([len(self.frame_times) - 1, flip_time - self.origin])
+
+    def event(self, t, event):
+        self.events.append([len(self.frame_times), t - self.origin, *event_to_record(event)])
+
+    def to_dict(self, metrics):
+        return {
+            "version": 1,
+            "participant_info": self.participant_info,
+            "seed": self.seed,
+            "live_heart_rate": self.live_heart_rate,
+            "options": self.options,
+            "level_starts": self.level_starts,
+            "frames": {
+                "t": self.frame_times,
+                "heart_rate": self.frame_heart_rates if self.live_heart_rate else None,
+                "flip_target": self.flip_targets or None
+            },
+            "presents": self.presents,
+            "events": self.events,
+            "metrics": metrics
+        }
@@ -0,0 +1,236 @@
+"""
+Journal de session en ajout seul (une ligne JSON par événement).
+
+Pendant la session, les événements (début de niveau, stimuli, clics,
+déplacements, évaluations) sont mis en tampon puis ajoutés au fichier par
+petits lots via l'écrivain en arrière-plan : la mémoire reste bornée et un
+arrêt brutal ne coûte au plus que le dernier lot.
+
+rebuild_session reconstruit la structure de participant_*.json à partir d'un
+journal complet ou tronqué. Les mesures propres au poste (profil des frames,
+capture des entrées, latence audio, mode kiosque) ne sont pas journalisées :
+ces clés valent None dans une session reconstruite.
+    python journal.py data/journal/participant_P01_2025-01-01_10-00-00.jsonl
+"""
+import json
+from pathlib import Path
+
+from display_timing import OnsetTiming
+from persistence import append_text
+
+# Types d'enregistrements
+SESSION = "session"
+LEVEL_START = "level_start"
+STIMULUS = "stimulus"
+RESPONSE = "response"
+MISSED_BONUS = "missed_bonus"
+MOVE = "move"
+COMMAND_ERROR = "command_error"
+FALSE_CLICK = "false_click"
+EVALUATION = "evaluation"
+TELEMETRY_FILE = "telemetry_file"
+SESSION_END = "session_end"
+
+# Stimuli enchaînés en direct par la condition synchrone (absents de la chronologie précalculée)
+LIVE_STIMULI = ("image_on", "image_off", "bip")
+
+
+class SessionJournal:
+    """Tampon d'enregistrements vidé par lots dans un fichier .jsonl"""
+
+    def __init__(self, writer, batch_size=64, flush_interval=1.0):
+        self.writer = writer
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval  # Délai maximal avant écriture d'un lot (s)
+        self.path = None
+        self.lines = []
+        self.last_flush = None
+        self.records = 0
+
+    def open(self, path):
+        self.flush()
+        self.path = Path(path)
+        self.lines = []
+        self.last_flush = None
+        self.records = 0
+
+    def record(self, kind, t, **fields):
+        """Ajoute un enregistrement (t : secondes depuis le début de la session)"""
+        if self.path is None:
+            return
+        self.lines.append(json.dumps({"type": kind, "t": round(t, 6), **fields}, ensure_ascii=False))
+        self.records += 1
+        if len(self.lines) >= self.batch_size:
+            self.flush(t)
+
+    def tick(self, t):
+        """Vide le tampon si le dernier lot date de plus de flush_interval"""
+        if self.lines and (self.last_flush is None or t - self.last_flush >= self.flush_interval):
+            self.flush(t)
+
+    def flush(self, t=None):
+        if self.path is None or not self.lines:
+            return
+        self.writer.submit(append_text, self.path, "\n".join(self.lines) + "\n")
+        self.lines = []
+        if t is not None:
+            self.last_flush = t
+
+    def close(self):
+        self.flush()
+        self.path = None
+
+
+def read_journal(path):
+    """
+    Lit les enregistrements d'un journal.
+
+    Retourne (enregistrements, complet) ; une dernière ligne tronquée par un
+    arrêt brutal est ignorée.
+    """
+    records = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                break
+    complete = bool(records) and records[-1]["type"] == SESSION_END
+    return records, complete
+
+
+def rebuild_session(path):
+    """Reconstruit les données de participant_*.json à partir d'un journal"""
+    records, complete = read_journal(path)
+    if not records or records[0]["type"] != SESSION:
+        raise ValueError(f"Journal sans en-tête de session : {path}")
+    header = records[0]
+
+    participant_info = dict(header["participant_info"])
+    response_times = []
+    response_levels = []
+    target_response_times = []
+    target_response_levels = []
+    missed_bonus = 0
+    command_errors = 0
+    evaluations = []
+    bips = 0
+    timeline = {}
+    live_onsets = {}
+    level = None
+    level_start = 0.0
+    telemetry_files = []
+    onset_timing = OnsetTiming(header.get("frame_duration", 0.0))
+    targets_shown = 0
+    false_clicks = 0
+
+    for record in records[1:]:
+        kind = record["type"]
+        if kind == LEVEL_START:
+            level = record["level"]
+            level_start = record["t"]
+            timeline[str(level)] = record["timeline"]
+            live_onsets[str(level)] = []
+        elif kind == STIMULUS:
+            if record["stimulus"] == "bip":
+                bips += 1
+            elif record["stimulus"] == "target_on":
+                targets_shown += 1
+            if "scheduled" in record and record["stimulus"] != "image_off":
+                onset_timing.add(level, record["stimulus"], record["scheduled"], record["t"])
+            if header.get("live_sync") and record["stimulus"] in LIVE_STIMULI:
+                # Instant programmé (les bonus et cibles figurent déjà dans la chronologie précalculée)
+                onset = round(record.get("scheduled", record["t"]) - level_start, 6)
+                live_onsets[str(level)].append([onset, record["stimulus"], record["payload"]])
+        elif kind == RESPONSE and record.get("target") == "target":
+            target_response_times.append(record["response_time"])
+            target_response_levels.append(level)
+        elif kind == RESPONSE:
+            response_times.append(record["response_time"])
+            response_levels.append(level)
+        elif kind == MISSED_BONUS:
+            missed_bonus += 1
+        elif kind == COMMAND_ERROR:
+            command_errors += 1
+        elif kind == FALSE_CLICK:
+            false_clicks += 1
+        elif kind == EVALUATION:
+            evaluations.append(record["evaluation"])
+        elif kind == TELEMETRY_FILE:
+            telemetry_files.append(record["path"])
+        elif kind == SESSION_END:
+            participant_info["heart_rate_after"] = record["heart_rate_after"]
+
+    if header.get("live_sync"):
+        # Synchrone en direct : la chronologie est celle des stimuli réellement déclenchés
+        for key, onsets in live_onsets.items():
+            timeline[key] = sorted(timeline[key] + onsets, key=lambda entry: entry[0])
+
+    return {
+        "participant_info": participant_info,
+        "performance_data": {
+            "response_times": response_times,
+            "response_levels": response_levels,
+            "target_response_times": target_response_times,
+            "target_response_levels": target_response_levels,
+            "average_response_time": sum(response_times) / len(response_times) if response_times else 0,
+            "missed_bonus": missed_bonus,
+            "command_errors": command_errors
+        },
+        "evaluations": evaluations,
+        "timestamp": header["timestamp"],
+        "bip_data": {
+            "condition": participant_info["condition"],
+            "heart_rate": participant_info["heart_rate_before"],
+            "total_bips": bips,
+            "missed_bips": 0
+        },
+        "stimulus": {
+            "seed": header["seed"],
+            "timeline": timeline
+        },
+        "heart_rate_stream": {"live": header.get("live_sync", False), "samples": []},
+        "telemetry": {"files": telemetry_files} if telemetry_files else None,
+        "frame_profile": None,
+        "input_capture": None,
+        "audio": None,
+        "kiosk": None,
+        # Cibles encore affichées en fin de journal comptées manquées, comme en fin de niveau
+        "targets": {
+            "targets": targets_shown,
+            "hits": len(target_response_times),
+            "misses": targets_shown - len(target_response_times),
+            "false_clicks": false_clicks,
+            "mean_hit_latency": sum(target_response_times) / len(target_response_times) if target_response_times else None,
+        } if header.get("targets") else None,
+        "circuit": header.get("circuit"),
+        # Journaux antérieurs sans instant programmé : aucune apparition datée
+        "onset_timing": {"pacing": header.get("pacing"), **onset_timing.summary()},
+        "journal": {
+            "complete": complete,
+            "records": len(records),
+            "last_level": level
+        }
+    }
+
+
+def main():
+    import argparse
+
+    from persistence import write_session_files
+
+    parser = argparse.ArgumentParser(description="Reconstruit des sessions à partir de leur journal")
+    parser.add_argument("journals", nargs="+", help="Fichiers .jsonl")
+    parser.add_argument("--output", default="data", help="Dossier des fichiers reconstruits")
+    args = parser.parse_args()
+
+    for journal_path in args.journals:
+        data = rebuild_session(journal_path)
+        stem = Path(journal_path).stem
+        write_session_files(args.output, stem, data)
+        status = "complet" if data["journal"]["complete"] else f"tronqué (niveau {data['journal']['last_level']})"
+        print(f"{journal_path} : {data['journal']['records']} enregistrements, journal {status} → {args.output}/{stem}.json")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Graphe de navigation pré-calculé des circuits.
+
+Chaque circuit est compilé une seule fois en une table d'adjacence
+nœud → {direction: voisin}, ce qui rend chaque déplacement O(1).
+"""
+from functools import lru_cache
+
+DIRECTIONS = ("left", "right", "up", "down")
+
+
+def direction_between(start, end):
+    """Direction dominante pour aller de start à end"""
+    dx = end[0] - start[0]
+    dy = end[1] - start[1]
+    if abs(dx) >= abs(dy):
+        return "right" if dx > 0 else "left"
+    return "down" if dy > 0 else "up"
+
+
+class NavigationGraph:
+    """
+    Circuit sous forme de graphe : positions des nœuds et voisins par direction.
+
+    Les points de coordonnées identiques sont fusionnés en un seul nœud, ce qui
+    permet des circuits ramifiés et pas seulement des lignes brisées.
+    """
+
+    def __init__(self, positions, edges, start=0):
+        self.positions = [tuple(position) for position in positions]
+        self.start = start
+        self.neighbours = [{} for _ in self.positions]
+        for a, b in edges:
+            self.connect(a, b)
+
+    def connect(self, a, b):
+        """Relie deux nœuds dans les deux sens"""
+        if a == b:
+            return
+        self.neighbours[a][direction_between(self.positions[a], self.positions[b])] = b
+        self.neighbours[b][direction_between(self.positions[b], self.positions[a])] = a
+
+    @classmethod
+    def from_path(cls, path):
+        """Compile une ligne brisée (liste de points) en graphe"""
+        ids = {}
+        positions = []
+        for point in path:
+            point = tuple(point)
+            if point not in ids:
+                ids[point] = len(positions)
+                positions.append(point)
+        edges = [(ids[tuple(a)], ids[tuple(b)]) for a, b in zip(path, path[1:])]
+        return cls(positions, edges, start=ids[tuple(path[0])])
+
+    def move(self, node, direction):
+        """Retourne le voisin dans la direction demandée, ou None"""
+        return self.neighbours[node].get(direction)
+
+    def position(self, node):
+        return self.positions[node]
+
+
+@lru_cache(maxsize=None)
+def _compile(path):
+    return NavigationGraph.from_path(path)
+
+
+def compile_path(path):
+    """Graphe du chemin, compilé une seule fois par circuit"""
+    return _compile(tuple(tuple(point) for point in path))
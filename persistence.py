@@ -0,0 +1,150 @@
+"""
+Écriture des sessions en arrière-plan.
+
+Les fichiers sont sérialisés et écrits par un thread dédié alimenté par une
+file bornée : le thread de rendu ne fait que déposer les données. Chaque
+fichier est écrit dans un fichier temporaire puis renommé atomiquement, avec
+une politique de fsync configurable :
+    "none" : pas de fsync (le plus rapide)
+    "file" : fsync du fichier avant renommage
+    "full" : fsync du fichier et du répertoire après renommage
+"""
+import csv
+import io
+import json
+import os
+import queue
+import threading
+from pathlib import Path
+
+import numpy as np
+
+FSYNC_POLICIES = ("none", "file", "full")
+
+CSV_HEADER = ['Participant ID', 'Age', 'Genre', 'Condition',
+              'FC Avant', 'FC Après', 'Temps Moyen', 'Bonus Manqués',
+              'Erreurs Commande']
+
+
+def atomic_write(path, data, fsync="file"):
+    """Écrit des octets via un fichier temporaire renommé, sans jamais laisser de fichier tronqué"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+            if fsync != "none":
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        temp_path.unlink(missing_ok=True)
+        raise
+
+    if fsync == "full" and hasattr(os, "O_DIRECTORY"):
+        directory = os.open(path.parent, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(directory)
+        finally:
+            os.close(directory)
+
+
+def write_json(path, data, fsync="file", indent=None):
+    """Écrit un document JSON"""
+    atomic_write(path, json.dumps(data, indent=indent, ensure_ascii=False).encode('utf-8'), fsync)
+
+
+def write_session_files(data_dir, stem, data, fsync="file"):
+    """Écrit une session aux formats JSON et CSV"""
+    data_dir = Path(data_dir)
+    write_json(data_dir / f"{stem}.json", data, fsync, indent=2)
+
+    # Format CSV pour analyse facile
+    buffer = io.StringIO(newline='')
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_HEADER)
+    writer.writerow([
+        data['participant_info']['id'],
+        data['participant_info']['age'],
+        data['participant_info']['gender'],
+        data['participant_info']['condition'],
+        data['participant_info']['heart_rate_before'],
+        data['participant_info']['heart_rate_after'],
+        data['performance_data']['average_response_time'],
+        data['performance_data']['missed_bonus'],
+        data['performance_data']['command_errors']
+    ])
+    atomic_write(data_dir / f"{stem}.csv", buffer.getvalue().encode('utf-8'), fsync)
+
+
+def write_array(path, array, fsync="file"):
+    """Écrit un tableau NumPy (.npy)"""
+    buffer = io.BytesIO()
+    np.save(buffer, array)
+    atomic_write(path, buffer.getvalue(), fsync)
+
+
+def append_text(path, text, fsync="file"):
+    """Ajoute du texte à la fin d'un fichier (journal en ajout seul)"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(text)
+        if fsync != "none":
+            f.flush()
+            os.fsync(f.fileno())
+
+
+class BackgroundWriter:
+    """Thread d'écriture alimenté par une file bornée de tâches"""
+
+    def __init__(self, max_pending=16, fsync="file"):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Politique de fsync inconnue : {fsync} (attendu : {FSYNC_POLICIES})")
+        self.fsync = fsync
+        self.queue = queue.Queue(maxsize=max_pending)
+        self.errors = []
+        self.thread = None
+
+    def start(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.worker, name="session-writer", daemon=True)
+            self.thread.start()
+        return self
+
+    def submit(self, function, *args):
+        """Programme function(*args, fsync=...) ; ne bloque que si la file est pleine"""
+        self.start()
+        self.queue.put((function, args))
+
+    def worker(self):
+        while True:
+            job = self.queue.get()
+            try:
+                if job is None:
+                    return
+                function, args = job
+                function(*args, fsync=self.fsync)
+            except Exception as e:
+                self.errors.append(str(e))
+                print(f"Erreur lors de l'écriture en arrière-plan : {e}")
+            finally:
+                self.queue.task_done()
+
+    def pending(self):
+        """Nombre de tâches pas encore terminées"""
+        return self.queue.unfinished_tasks
+
+    def flush(self):
+        """Attend la fin de toutes les écritures programmées"""
+        if self.thread is not None:
+            self.queue.join()
+
+    def close(self):
+        """Termine les écritures en attente puis arrête le thread"""
+        if self.thread is not None:
+            self.queue.put(None)
+            self.thread.join()
+            self.thread = None
+
@@ -0,0 +1,148 @@
+"""
+Profilage des phases de la boucle de jeu (événements, mise à jour, dessin,
+affichage, attente) avec perf_counter_ns.
+
+Les durées alimentent des histogrammes à pas fixe : mémoire constante quelle
+que soit la durée de la session, percentiles p50/p95/p99 calculés à la
+demande, et décompte des frames hors budget.
+"""
+import time
+
+import numpy as np
+
+PHASES = ("events", "update", "draw", "flip", "wait")
+
+
+class PhaseHistogram:
+    """Histogramme en flux des durées d'une phase (pas de bin_us microsecondes)"""
+
+    def __init__(self, bin_us=50, max_ms=100):
+        self.bin_ns = bin_us * 1000
+        self.counts = np.zeros(int(max_ms * 1000 / bin_us) + 1, dtype=np.int64)
+        self.total_ns = 0
+        self.max_ns = 0
+        self.samples = 0
+
+    def add(self, duration_ns):
+        index = duration_ns // self.bin_ns
+        if index >= len(self.counts):
+            index = len(self.counts) - 1  # Dernière case : dépassements
+        self.counts[index] += 1
+        self.total_ns += duration_ns
+        self.samples += 1
+        if duration_ns > self.max_ns:
+            self.max_ns = duration_ns
+
+    def percentile(self, q):
+        """Borne supérieure (ms) de la case contenant le q-ième centile"""
+        if not self.samples:
+            return 0.0
+        index = int(np.searchsorted(np.cumsum(self.counts), q / 100 * self.samples))
+        return min((index + 1) * self.bin_ns, self.max_ns) / 1e6
+
+    def summary(self):
+        if not self.samples:
+            return {"samples": 0}
+        return {
+            "samples": self.samples,
+            "mean_ms": round(self.total_ns / self.samples / 1e6, 3),
+            "p50_ms": round(self.percentile(50), 3),
+            "p95_ms": round(self.percentile(95), 3),
+            "p99_ms": round(self.percentile(99), 3),
+            "max_ms": round(self.max_ns / 1e6, 3),
+        }
+
+
+class FrameProfiler:
+    """
+    Chronométrage des phases de chaque frame.
+
+    Une frame est hors budget si son travail (tout sauf l'attente) dépasse le
+    budget, et en retard si l'intervalle entre deux frames dépasse 1,5 budget.
+    Un affichage bloqué sur le rafraîchissement vertical (vsync) est une
+    attente : il reste chronométré dans sa phase mais ne compte pas comme
+    travail.
+    """
+
+    def __init__(self, fps, clock_ns=time.perf_counter_ns):
+        self.budget_ns = int(1e9 / fps)
+        self.clock_ns = clock_ns
+        self.frame_start = None
+        self.last_mark = None
+        self.work_ns = 0
+        self.reset()
+
+    def reset(self):
+        """Vide les statistiques (la frame en cours reste chronométrée)"""
+        self.phases = {phase: PhaseHistogram() for phase in PHASES}
+        self.work = PhaseHistogram()
+        self.interval = PhaseHistogram()
+        self.over_budget_frames = 0
+        self.late_frames = 0
+
+    def begin_frame(self):
+        now = self.clock_ns()
+        if self.frame_start is not None:
+            interval = now - self.frame_start
+            self.interval.add(interval)
+            if interval > 1.5 * self.budget_ns:
+                self.late_frames += 1
+        self.frame_start = self.last_mark = now
+        self.work_ns = 0
+
+    def mark(self, phase, waiting=False):
+        """Clôt la phase en cours de la frame (waiting : phase passée à attendre)"""
+        now = self.clock_ns()
+        duration = now - self.last_mark
+        self.phases[phase].add(duration)
+        if phase != "wait" and not waiting:
+            self.work_ns += duration
+        self.last_mark = now
+
+    def end_frame(self):
+        self.work.add(self.work_ns)
+        if self.work_ns > self.budget_ns:
+            self.over_budget_frames += 1
+
+    def overlay_lines(self):
+        """Texte court pour l'affichage de débogage"""
+        work = self.work.summary()
+        if not work["samples"]:
+            return []
+        return [
+            f"Travail p50 {work['p50_ms']:.1f} / p99 {work['p99_ms']:.1f} ms",
+            f"Hors budget: {self.over_budget_frames}  En retard: {self.late_frames}",
+        ]
+
+    def summary(self):
+        return {
+            "budget_ms": round(self.budget_ns / 1e6, 3),
+            "frames": self.work.samples,
+            "over_budget_frames": self.over_budget_frames,
+            "late_frames": self.late_frames,
+            "work": self.work.summary(),
+            "frame_interval": self.interval.summary(),
+            "phases": {phase: histogram.summary() for phase, histogram in self.phases.items()},
+        }
+
+
+class NullProfiler:
+    """Profileur inactif (coût quasi nul dans la boucle)"""
+
+    def reset(self):
+        pass
+
+    def begin_frame(self):
+        pass
+
+    def mark(self, phase, waiting=False):
+        pass
+
+    def end_frame(self):
+        pass
+
+    def overlay_lines(self):
+        return []
+
+    def summary(self):
+        return None
@@ -0,0 +1,123 @@
+"""
+Outils de rendu partagés : registre de polices et cache LRU des surfaces de texte.
+"""
+from collections import OrderedDict
+
+import pygame
+
+
+class TextCache:
+    """
+    Registre de polices et cache LRU borné des textes rendus.
+
+    Les surfaces sont indexées par (police, taille, texte, couleur) : un texte
+    n'est rastérisé qu'une seule fois tant qu'il reste dans le cache.
+    """
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self.fonts = {}
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def font(self, size, name=None):
+        """Retourne la police demandée, créée une seule fois"""
+        key = (name, size)
+        font = self.fonts.get(key)
+        if font is None:
+            font = self.fonts[key] = pygame.font.Font(name, size)
+        return font
+
+    def render(self, text, size, color, name=None):
+        """Retourne la surface du texte, rendue seulement si absente du cache"""
+        key = (name, size, text, tuple(color))
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+
+        self.misses += 1
+        surface = self.font(size, name).render(text, True, color)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.max_entries:
+            self.surfaces.popitem(last=False)
+        return surface
+
+    def clear(self):
+        """Vide le cache des surfaces (les polices restent chargées)"""
+        self.surfaces.clear()
+
+
+# Cache partagé par tous les écrans et widgets
+text_cache = TextCache()
+
+
+class LevelLayerCache:
+    """
+    Fond statique de chaque niveau (circuit et points) rendu une seule fois.
+    """
+
+    def __init__(self, size, background, line_color, node_color):
+        self.size = size
+        self.background = background
+        self.line_color = line_color
+        self.node_color = node_color
+        self.layers = {}
+
+    def get(self, path):
+        """Retourne la surface du circuit, rendue au premier appel"""
+        key = tuple(path)
+        layer = self.layers.get(key)
+        if layer is None:
+            layer = self.layers[key] = self.render(path)
+        return layer
+
+    def render(self, path):
+        layer = pygame.Surface(self.size)
+        # Conversion au format de l'écran pour des blits sans conversion de pixels
+        if pygame.display.get_surface() is not None:
+            layer = layer.convert()
+        layer.fill(self.background)
+        for start, end in zip(path, path[1:]):
+            pygame.draw.line(layer, self.line_color, start, end, 2)
+        for point in path:
+            pygame.draw.circle(layer, self.node_color, point, 5)
+        return layer
+
+
+class DirtyRectTracker:
+    """
+    Suit les zones dynamiques d'une frame à l'autre.
+
+    Les zones de la frame précédente sont restaurées depuis le fond puis
+    envoyées à l'affichage avec celles de la frame courante.
+    """
+
+    def __init__(self):
+        self.previous = []
+        self.full_redraw = True
+
+    def invalidate(self):
+        """Force un rafraîchissement complet à la prochaine frame"""
+        self.full_redraw = True
+        self.previous = []
+
+    def restore(self, surface, background):
+        """Efface les zones dynamiques de la frame précédente"""
+        if self.full_redraw:
+            surface.blit(background, (0, 0))
+            return
+        for rect in self.previous:
+            surface.blit(background, rect, rect)
+
+    def collect(self, rects):
+        """Retourne les zones à mettre à jour (None si tout l'écran doit l'être)"""
+        if self.full_redraw:
+            self.full_redraw = False
+            self.previous = rects
+            return None
+        dirty = self.previous + rects
+        self.previous = rects
+        return dirty
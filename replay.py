@@ -0,0 +1,176 @@
+"""
+Rejeu déterministe des sessions enregistrées (data/replay/*.replay.json).
+
+Chaque session est rejouée sans affichage, aussi vite que possible : même
+graine de stimuli, mêmes instants de frame, de début de niveau et
+d'affichage des stimuli, mêmes événements d'entrée transmis à
+handle_playing_input et handle_evaluation_input. Les métriques (temps de réaction, bonus manqués,
+erreurs de commande) sont recalculées avec le code courant et comparées à
+celles enregistrées ; tout écart est signalé.
+
+    python replay.py data/replay/*.replay.json --output rescored.json
+"""
+import argparse
+import json
+import time
+from pathlib import Path
+
+from game import Game
+from input_capture import event_from_record
+from simulation import VirtualClock, SilentSoundManager
+
+TOLERANCE = 1e-6  # Écart toléré sur les temps de réaction (s)
+
+
+class ReplayHeartRate:
+    """Source de FC rejouant les valeurs lues pendant la session"""
+
+    def __init__(self):
+        self.smoothed_bpm = None
+
+    def start(self):
+        return self
+
+    def stop(self):
+        pass
+
+    def current_bpm(self):
+        return self.smoothed_bpm
+
+    def stream(self):
+        return []
+
+    def clear_stream(self):
+        pass
+
+
+def load_recording(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def replay_game():
+    """Instance de jeu headless réutilisable pour rejouer plusieurs sessions"""
+    game = Game(time_source=VirtualClock(), sound_manager=SilentSoundManager(), verbose=False,
+                telemetry=False, journal=False, record=False)
+    game.save_data = lambda: None
+    return game
+
+
+def compare_metrics(recorded, replayed, tolerance=TOLERANCE):
+    """Différences entre métriques enregistrées et recalculées ({} si identiques)"""
+    differences = {}
+    for key in ("response_times", "target_response_times"):
+        recorded_times = recorded.get(key, [])
+        replayed_times = replayed[key]
+        if len(recorded_times) != len(replayed_times):
+            differences[key] = {"recorded": len(recorded_times), "replayed": len(replayed_times)}
+        else:
+            deviation = max((abs(a - b) for a, b in zip(recorded_times, replayed_times)), default=0.0)
+            if deviation > tolerance:
+                differences[key] = {"max_deviation": deviation}
+    for key in ("missed_bonus", "command_errors"):
+        if recorded[key] != replayed[key]:
+            differences[key] = {"recorded": recorded[key], "replayed": replayed[key]}
+    return differences
+
+
+def replay_session(recording, game=None):
+    """Rejoue une session enregistrée et retourne ses métriques recalculées"""
+    game = game or replay_game()
+    clock = game.time_source
+    heart_rate = ReplayHeartRate() if recording["live_heart_rate"] else None
+    game.heart_rate_source = heart_rate
+    options = recording.get("options", {})
+    game.n_targets = options.get("targets", 0)
+    game.load_circuits(options.get("circuit"))
+    level_starts = recording["level_starts"]
+
+    def enter_level(level):
+        # Horloge et FC telles qu'au lancement du niveau pendant la session
+        if level <= len(level_starts):
+            clock.current_time, bpm = level_starts[level - 1]
+            if heart_rate is not None:
+                heart_rate.smoothed_bpm = bpm
+
+    started = time.perf_counter()
+    game.reset_game(recording["seed"])
+    game.participant_data.update(recording["participant_info"])
+    enter_level(1)
+    if not game.start_game():
+        raise ValueError(f"Profil de participant invalide : {recording['participant_info']}")
+
+    events = recording["events"]
+    frame_times = recording["frames"]["t"]
+    frame_heart_rates = recording["frames"]["heart_rate"]
+    flip_targets = recording["frames"].get("flip_target")
+    presents = recording.get("presents", [])
+    next_event = 0
+    next_present = 0
+    for index in range(len(frame_times) + 1):
+        while next_event < len(events) and events[next_event][0] == index:
+            _, event_time, event_type, fields = events[next_event]
+            next_event += 1
+            if game.game_state == "evaluation":
+                enter_level(game.current_level + 1)  # La dernière évaluation lance le niveau suivant
+            else:
+                clock.current_time = event_time
+            game.handle_event(event_from_record(event_type, fields), event_time)
+        if index == len(frame_times):
+            break
+
+        clock.current_time = frame_times[index]
+        if heart_rate is not None:
+            heart_rate.smoothed_bpm = frame_heart_rates[index]
+        game.next_flip_time = flip_targets[index] if flip_targets else None
+        game.step(frame_times[index])
+        # Apparitions datées au retour de flip() pendant la session
+        while next_present < len(presents) and presents[next_present][0] == index:
+            game.present(presents[next_present][1])
+            next_present += 1
+    elapsed = time.perf_counter() - started
+
+    replayed = {
+        "response_times": list(game.game_data["response_times"]),
+        "target_response_times": list(game.game_data["target_response_times"]),
+        "missed_bonus": game.game_data["missed_bonus"],
+        "command_errors": game.game_data["command_errors"]
+    }
+    differences = compare_metrics(recording["metrics"], replayed)
+    session_duration = frame_times[-1] if frame_times else 0.0
+    return {
+        "participant_id": recording["participant_info"]["id"],
+        "finished": game.game_state == "finished",
+        "diverged": bool(differences),
+        "differences": differences,
+        "metrics": replayed,
+        "frames": len(frame_times),
+        "replay_seconds": round(elapsed, 3),
+        "speedup": round(session_duration / elapsed, 1) if elapsed else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rejeu déterministe de sessions enregistrées")
+    parser.add_argument("recordings", nargs="+", help="Fichiers .replay.json")
+    parser.add_argument("--output", help="Fichier JSON des métriques recalculées")
+    args = parser.parse_args()
+
+    game = replay_game()
+    results = []
+    for path in args.recordings:
+        result = replay_session(load_recording(path), game)
+        result["recording"] = str(path)
+        results.append(result)
+        status = "DIVERGENCE " + json.dumps(result["differences"]) if result["diverged"] else "identique"
+        print(f"{Path(path).name} : {result['frames']} frames, x{result['speedup']} → {status}")
+
+    diverged = sum(result["diverged"] for result in results)
+    print(f"{len(results)} sessions rejouées, {diverged} divergence(s)")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Ressources SDL d'une session (fenêtre, audio, horloge), créées à la demande.
+
+Importer le jeu ne démarre ni SDL ni l'audio : seuls les outils qui ouvrent
+réellement une session (Game.run) paient ce coût.
+"""
+import pygame
+
+from audio import AudioEngine
+
+
+class Runtime:
+    """Fenêtre, moteur audio et horloge, initialisés une seule fois au démarrage de la session"""
+
+    def __init__(self, size, caption, audio=True, vsync=False):
+        self.size = size
+        self.caption = caption
+        self.audio_enabled = audio
+        self.vsync = vsync
+        self.screen = None
+        self.audio = None
+        self.clock = None
+
+    @property
+    def started(self):
+        return self.screen is not None
+
+    def start(self):
+        """Ouvre la fenêtre et l'audio (sans effet si déjà démarré)"""
+        if self.started:
+            return self
+        # Pas de pygame.init() : le mixeur est ouvert par AudioEngine avec son propre tampon
+        pygame.display.init()
+        pygame.font.init()
+        if self.vsync:
+            # La synchronisation verticale n'est proposée par SDL qu'avec un rendu accéléré (SCALED)
+            try:
+                self.screen = pygame.display.set_mode(self.size, pygame.SCALED, vsync=1)
+            except pygame.error as e:
+                print(f"Synchronisation verticale indisponible : {e}")
+                self.vsync = False
+        if self.screen is None:
+            self.screen = pygame.display.set_mode(self.size)
+        pygame.display.set_caption(self.caption)
+        self.clock = pygame.time.Clock()
+        if self.audio_enabled:
+            self.audio = AudioEngine()
+        return self
+
+    def close(self):
+        """Libère toutes les ressources SDL"""
+        pygame.quit()
+        self.screen = None
+        self.audio = None
+        self.clock = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.close()
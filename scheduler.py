@@ -0,0 +1,158 @@
+"""
+Chronologie des stimuli pré-calculée par niveau.
+
+Au début de chaque niveau, toutes les apparitions d'images, les bips et les
+bonus sont générés à partir d'un générateur aléatoire initialisé par une
+graine, puis rangés dans un tas. À chaque frame, seuls les événements échus
+sont dépilés (O(log n) chacun) : les fréquences de stimulation ne dépendent
+plus du FPS ni de la charge de la machine, et la chronologie est sauvegardée
+avec la session.
+"""
+import heapq
+import math
+import random
+
+IMAGE_ON = "image_on"
+IMAGE_OFF = "image_off"
+BIP = "bip"
+BONUS = "bonus"
+TARGET_ON = "target_on"
+TARGET_OFF = "target_off"
+
+ASYNC_BPM = 100  # Fréquence fixe de la condition asynchrone
+RANDOM_EVENT_RATE = 1.2  # Événements aléatoires par seconde (ancien 2 % par frame à 60 FPS)
+RANDOM_IMAGE_INTERVAL = (0.5, 1.5)  # Intervalles aléatoires entre bascules d'image (s)
+BONUS_MIN_DISTANCE = 100  # Distance minimale entre deux bonus successifs (px)
+TARGET_VISIBLE = (0.8, 2.0)  # Durée d'affichage d'une cible du mode multi-cibles (s)
+TARGET_GAP = (0.5, 2.0)  # Pause entre deux cibles d'un même emplacement (s)
+
+
+def level_rng(seed, level):
+    """Générateur reproductible propre à un niveau"""
+    return random.Random(f"{seed}:{level}")
+
+
+def periodic_times(interval, duration):
+    """Instants k * interval (k >= 1) strictement avant la fin du niveau"""
+    return [k * interval for k in range(1, int(duration / interval) + 1) if k * interval < duration]
+
+
+def build_level_timeline(condition, heart_rate, duration, n_images, path, rng, live_sync=False):
+    """
+    Génère la chronologie complète d'un niveau.
+
+    Avec live_sync, les images et bips de la condition synchrone sont omis :
+    ils sont programmés au fil de l'eau sur la fréquence cardiaque mesurée.
+
+    Retourne une liste triée de (instant relatif au début du niveau, type, données).
+    """
+    timeline = []
+    heart_rate = heart_rate or 70
+    live = live_sync and condition == "sync"
+
+    # Images : alternance apparition / disparition, rotation des emplacements
+    toggle_times = []
+    max_shows = 0
+    if condition in ("sync", "async"):
+        if not live:
+            bpm = heart_rate if condition == "sync" else ASYNC_BPM
+            toggle_times = periodic_times(60.0 / bpm, duration)
+            max_shows = len(toggle_times)
+    else:
+        t = rng.uniform(*RANDOM_IMAGE_INTERVAL)
+        while t < duration:
+            toggle_times.append(t)
+            t += rng.uniform(*RANDOM_IMAGE_INTERVAL)
+        max_shows = int((heart_rate / 60) * duration)  # Nombre de clignotements du niveau
+
+    shows = 0
+    for i, t in enumerate(toggle_times):
+        if i % 2 == 0:
+            if shows >= max_shows:
+                break
+            shows += 1
+            timeline.append((t, IMAGE_ON, shows % n_images))
+        else:
+            timeline.append((t, IMAGE_OFF, None))
+
+    # Bips
+    if condition in ("sync", "async"):
+        if not live:
+            bpm = heart_rate if condition == "sync" else ASYNC_BPM
+            timeline.extend((t, BIP, None) for t in periodic_times(60.0 / bpm, duration))
+    else:
+        # Au moins la moitié de l'intervalle moyen entre deux bips, puis délai aléatoire
+        half_interval = 30.0 / heart_rate
+        t = half_interval + rng.expovariate(RANDOM_EVENT_RATE)
+        while t < duration:
+            timeline.append((t, BIP, None))
+            t += half_interval + rng.expovariate(RANDOM_EVENT_RATE)
+
+    # Bonus : arrivées poissonniennes, ignorées tant qu'un bonus est actif
+    last_position = None
+    t = rng.expovariate(RANDOM_EVENT_RATE)
+    while t < duration:
+        position = tuple(rng.choice(path))
+        if last_position is None or math.dist(position, last_position) >= BONUS_MIN_DISTANCE:
+            timeline.append((t, BONUS, position))
+            last_position = position
+        t += rng.expovariate(RANDOM_EVENT_RATE)
+
+    timeline.sort(key=lambda entry: entry[0])
+    return timeline
+
+
+def build_target_timeline(n_targets, duration, n_images, area, size, rng):
+    """
+    Chronologie du mode multi-cibles : n_targets emplacements indépendants,
+    chacun alternant cible affichée (position et image tirées au hasard dans
+    area) et pause.
+
+    Retourne une liste triée de (instant, type, données) comme build_level_timeline.
+    """
+    timeline = []
+    width, height = area
+    for slot in range(n_targets):
+        t = rng.uniform(0, TARGET_GAP[1])
+        while t < duration:
+            position = (rng.randrange(0, width - size[0]), rng.randrange(0, height - size[1]))
+            timeline.append((t, TARGET_ON, (slot, rng.randrange(n_images), position)))
+            t += rng.uniform(*TARGET_VISIBLE)
+            timeline.append((min(t, duration), TARGET_OFF, slot))
+            t += rng.uniform(*TARGET_GAP)
+    timeline.sort(key=lambda entry: entry[0])
+    return timeline
+
+
+class StimulusScheduler:
+    """File de priorité des stimuli à déclencher, en temps absolu"""
+
+    def __init__(self):
+        self.heap = []
+        self.counter = 0
+
+    def clear(self):
+        self.heap = []
+
+    def push(self, at, kind, payload=None):
+        # Le compteur départage les événements simultanés dans l'ordre d'insertion
+        heapq.heappush(self.heap, (at, self.counter, kind, payload))
+        self.counter += 1
+
+    def load(self, timeline, start_time):
+        """Programme une chronologie relative à partir de start_time"""
+        self.clear()
+        for t, kind, payload in timeline:
+            self.push(start_time + t, kind, payload)
+
+    def pop_due(self, current_time):
+        """Dépile les événements échus à current_time"""
+        due = []
+        heap = self.heap
+        while heap and heap[0][0] <= current_time:
+            at, _, kind, payload = heapq.heappop(heap)
+            due.append((at, kind, payload))
+        return due
+
+    def next_time(self):
+        return self.heap[0][0] if self.heap else None
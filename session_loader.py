@@ -0,0 +1,404 @@
+"""
+Chargement parallèle des fichiers de session (data/*.json) pour l'analyse.
+
+Les fichiers sont répartis par paquets entre des processus : chaque processus
+lit ses fichiers et renvoie un paquet en colonnes (un tableau NumPy par
+colonne) plutôt qu'une liste de dictionnaires. Les paquets sont concaténés
+une seule fois pour former le DataFrame (une ligne par participant et
+niveau) et le jeu d'essais (temps de réaction individuels, trials.py). Les
+fichiers ou évaluations illisibles ne bloquent pas le chargement : leurs
+erreurs sont retournées ensemble.
+
+Le résultat est conservé dans un cache en colonnes (data/.parse_cache.npz)
+avec l'empreinte de chaque fichier (chemin, taille, date de modification,
+hachage du contenu). Aux lancements suivants, seuls les fichiers nouveaux ou
+modifiés sont relus ; les fichiers supprimés sortent du cache.
+"""
+import hashlib
+import io
+import json
+import logging
+import math
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from persistence import atomic_write
+from trials import TrialSet, UNKNOWN_LEVEL
+
+# Colonnes d'une ligne (participant × niveau) : (section du fichier, clé, type)
+LEVEL_COLUMNS: Dict[str, Tuple[str, str, type]] = {
+    'participant_id': ('participant_info', 'id', str),
+    'age': ('participant_info', 'age', float),
+    'gender': ('participant_info', 'gender', str),
+    'condition': ('participant_info', 'condition', str),
+    'heart_rate_before': ('participant_info', 'heart_rate_before', float),
+    'heart_rate_after': ('participant_info', 'heart_rate_after', float),
+    'level': ('evaluation', 'level', int),
+    'avg_response_time': ('evaluation', 'avg_response_time', float),
+    'missed_bonus': ('performance_data', 'missed_bonus', float),
+    'command_errors': ('performance_data', 'command_errors', float),
+    'performance_eval': ('evaluation', 'performance', float),
+    'stress_eval': ('evaluation', 'stress', float),
+    'certitude_eval': ('evaluation', 'certitude', float),
+}
+ROW_COLUMNS: Dict[str, type] = {name: kind for name, (_, _, kind) in LEVEL_COLUMNS.items()}
+# Colonnes des essais (une ligne par temps de réaction) et des fichiers (une ligne par fichier)
+TRIAL_COLUMNS: Dict[str, type] = {'rt': float, 'level': int}
+FILE_COLUMNS: Dict[str, type] = {'hash': str, 'participant_id': str, 'condition': str}
+COLUMN_DTYPES = {str: object, int: np.int64, float: np.float64}
+# En dessous, la lecture dans le processus courant est plus rapide que le démarrage des processus
+PARALLEL_MIN_FILES = 256
+
+CACHE_NAME = ".parse_cache.npz"
+CACHE_VERSION = 4  # À incrémenter si les colonnes ou l'analyse des fichiers changent
+
+Chunk = Dict[str, np.ndarray]
+LoadError = Tuple[str, str]  # (fichier, message)
+
+
+class Batch(NamedTuple):
+    """Paquet de fichiers lu par un processus"""
+    rows: Chunk  # Lignes participant × niveau
+    row_counts: np.ndarray  # Lignes de chaque fichier
+    trials: Chunk  # Essais
+    trial_counts: np.ndarray  # Essais de chaque fichier
+    files: Chunk  # Hachage, participant et condition de chaque fichier
+    errors: List[LoadError]
+
+
+class LoadResult(NamedTuple):
+    frame: pd.DataFrame
+    trials: TrialSet
+    errors: List[LoadError]
+    counts: Optional[Dict[str, int]] = None  # Fichiers repris du cache, relus et retirés
+
+
+def to_chunk(values: Sequence[tuple], columns: Dict[str, type]) -> Chunk:
+    """Transpose des lignes en un tableau par colonne"""
+    transposed = list(zip(*values)) if values else [()] * len(columns)
+    return {
+        name: np.array(column, dtype=COLUMN_DTYPES[kind])
+        for (name, kind), column in zip(columns.items(), transposed)
+    }
+
+
+def parse_session(data: Dict) -> Tuple[List[tuple], np.ndarray, np.ndarray, List[str]]:
+    """
+    Lignes (une par évaluation) d'une session déjà décodée, temps de réaction
+    et niveau de chaque essai, et erreurs de la session.
+    """
+    sections = {
+        'participant_info': data['participant_info'],
+        'performance_data': data['performance_data'],
+    }
+    errors = []
+    performance_data = sections['performance_data']
+    try:
+        rt = np.asarray(performance_data.get('response_times', []), dtype=np.float64).ravel()
+    except (TypeError, ValueError) as e:
+        errors.append(f"temps de réaction invalides ({e})")
+        rt = np.empty(0)
+    levels = np.full(len(rt), UNKNOWN_LEVEL, dtype=np.int64)
+    known_levels = False
+    if 'response_levels' in performance_data:
+        # Fichiers antérieurs à response_levels : essais regroupés au niveau UNKNOWN_LEVEL
+        try:
+            levels = np.asarray(performance_data['response_levels'], dtype=np.int64).ravel()
+            if len(levels) != len(rt):
+                raise ValueError(f"{len(levels)} niveaux pour {len(rt)} temps")
+            known_levels = True
+        except (TypeError, ValueError) as e:
+            errors.append(f"niveaux des réponses ignorés ({e})")
+            levels = np.full(len(rt), UNKNOWN_LEVEL, dtype=np.int64)
+
+    rows = []
+    for index, evaluation in enumerate(data.get('evaluations', [])):
+        if known_levels and evaluation.get('avg_response_time') is None and 'level' in evaluation:
+            # Temps moyen du niveau absent de l'évaluation : calculé à partir des essais (NaN sans réponse)
+            level_rt = rt[levels == evaluation['level']]
+            evaluation = {**evaluation, 'avg_response_time': level_rt.mean() if len(level_rt) else np.nan}
+        sections['evaluation'] = evaluation
+        try:
+            rows.append(tuple(kind(sections[section][key]) for section, key, kind in LEVEL_COLUMNS.values()))
+        except KeyError as e:
+            errors.append(f"évaluation {index} : clé manquante {e}")
+        except (TypeError, ValueError) as e:
+            errors.append(f"évaluation {index} : valeur invalide ({e})")
+    return rows, rt, levels, errors
+
+
+def content_hash(content: bytes) -> str:
+    return hashlib.blake2b(content, digest_size=16).hexdigest()
+
+
+def parse_files(paths: Sequence[str]) -> Batch:
+    """Lit un paquet de fichiers (exécuté dans un processus de travail)"""
+    rows = []
+    row_counts = []
+    trial_rt = []
+    trial_levels = []
+    files = []
+    errors = []
+    for path in paths:
+        file_rows = []
+        rt = levels = np.empty(0)
+        digest = participant_id = condition = ""
+        try:
+            with open(path, 'rb') as f:
+                content = f.read()
+            digest = content_hash(content)
+            data = json.loads(content)
+            file_rows, rt, levels, file_errors = parse_session(data)
+            participant_id = str(data['participant_info']['id'])
+            condition = str(data['participant_info'].get('condition', ""))
+            errors.extend((str(path), message) for message in file_errors)
+        except (OSError, ValueError) as e:
+            errors.append((str(path), f"fichier illisible ({e})"))
+        except (KeyError, TypeError) as e:
+            errors.append((str(path), f"section manquante {e}"))
+        if not participant_id or not file_rows:
+            # Fichier sans session exploitable : ni essais ni session, pour que
+            # les tables d'essais et de niveaux décrivent les mêmes sessions
+            if len(rt):
+                errors.append((str(path), f"{len(rt)} temps de réaction ignorés (aucune évaluation valide)"))
+            rt = levels = np.empty(0)
+            participant_id = condition = ""
+        rows.extend(file_rows)
+        row_counts.append(len(file_rows))
+        trial_rt.append(rt)
+        trial_levels.append(levels)
+        files.append((digest, participant_id, condition))
+    return Batch(
+        rows=to_chunk(rows, ROW_COLUMNS),
+        row_counts=np.array(row_counts, dtype=np.int64),
+        trials={'rt': np.concatenate(trial_rt + [np.empty(0)]).astype(np.float64),
+                'level': np.concatenate(trial_levels + [np.empty(0)]).astype(np.int64)},
+        trial_counts=np.array([len(rt) for rt in trial_rt], dtype=np.int64),
+        files=to_chunk(files, FILE_COLUMNS),
+        errors=errors,
+    )
+
+
+def parse_batches(paths: Sequence[str], workers: Optional[int] = None,
+                  chunk_size: Optional[int] = None) -> List[Batch]:
+    """
+    Lit des fichiers de session en parallèle, par paquets.
+
+    workers : nombre de processus (par défaut, un par cœur ; 1 pour tout lire
+    dans le processus courant). chunk_size : fichiers par paquet (par défaut,
+    environ quatre paquets par processus pour équilibrer la charge). Moins de
+    PARALLEL_MIN_FILES fichiers sont toujours lus dans le processus courant.
+    """
+    paths = [str(path) for path in paths]
+    workers = workers or os.cpu_count() or 1
+    if chunk_size is None:
+        chunk_size = max(1, math.ceil(len(paths) / (workers * 4)))
+    batches = [paths[i:i + chunk_size] for i in range(0, len(paths), chunk_size)]
+
+    if workers > 1 and len(batches) > 1 and len(paths) >= PARALLEL_MIN_FILES:
+        # "spawn" : processus vierges, comme pour la simulation
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=min(workers, len(batches)), mp_context=context) as executor:
+            return list(executor.map(parse_files, batches))
+    return [parse_files(batch) for batch in batches]
+
+
+def concat(chunks: Sequence[Chunk], columns: Dict[str, type]) -> Chunk:
+    """Concatène des paquets en une seule passe par colonne"""
+    return {name: np.concatenate([chunk[name] for chunk in chunks]) for name in columns}
+
+
+def build_trials(trials: Chunk, trial_counts: np.ndarray, files: Chunk) -> TrialSet:
+    return TrialSet.from_files(trials['rt'], trials['level'], trial_counts,
+                               files['participant_id'], files['condition'])
+
+
+def load_sessions(paths: Sequence[Path], workers: Optional[int] = None,
+                  chunk_size: Optional[int] = None) -> LoadResult:
+    """Charge des fichiers de session en parallèle, sans cache"""
+    results = [parse_files([])] + parse_batches([str(path) for path in paths], workers, chunk_size)
+    rows = concat([batch.rows for batch in results], ROW_COLUMNS)
+    trials = concat([batch.trials for batch in results], TRIAL_COLUMNS)
+    files = concat([batch.files for batch in results], FILE_COLUMNS)
+    trial_counts = np.concatenate([batch.trial_counts for batch in results])
+    errors = [error for batch in results for error in batch.errors]
+    return LoadResult(pd.DataFrame(rows), build_trials(trials, trial_counts, files), errors)
+
+
+def ragged_gather(starts: np.ndarray, counts: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Indices rassemblant bout à bout des tranches [start, start + count), et leurs nouveaux offsets"""
+    offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+    index = np.repeat(starts - offsets[:-1], counts) + np.arange(offsets[-1], dtype=np.int64)
+    return index, offsets
+
+
+class ParseCache:
+    """
+    Sessions déjà lues, en colonnes, avec l'empreinte de leur fichier.
+
+    Les lignes du fichier i occupent row_offsets[i]:row_offsets[i + 1] des
+    colonnes de lignes, ses essais trial_offsets[i]:trial_offsets[i + 1] des
+    colonnes d'essais. Un fichier dont la taille et la date de modification
+    n'ont pas changé est repris tel quel ; sinon son contenu est haché et il
+    n'est relu que si le hachage diffère.
+    """
+
+    TABLES = {'row': ROW_COLUMNS, 'trial': TRIAL_COLUMNS, 'file': FILE_COLUMNS}
+
+    def __init__(self, paths=(), sizes=(), mtimes=(), tables=None, row_offsets=(0,), trial_offsets=(0,),
+                 errors=()):
+        if tables is None:
+            empty = parse_files([])
+            tables = {'row': empty.rows, 'trial': empty.trials, 'file': empty.files}
+        self.paths = list(paths)
+        self.sizes = np.asarray(sizes, dtype=np.int64)
+        self.mtimes = np.asarray(mtimes, dtype=np.int64)
+        self.tables = tables
+        self.row_offsets = np.asarray(row_offsets, dtype=np.int64)
+        self.trial_offsets = np.asarray(trial_offsets, dtype=np.int64)
+        self.errors = list(errors)
+        self.index = {path: i for i, path in enumerate(self.paths)}
+
+    @classmethod
+    def load(cls, cache_path: Path) -> "ParseCache":
+        """Lit le cache (vide s'il est absent, illisible ou d'une autre version)"""
+        try:
+            with np.load(cache_path, allow_pickle=False) as archive:
+                if int(archive['version']) != CACHE_VERSION:
+                    return cls()
+                tables = {}
+                for table, columns in cls.TABLES.items():
+                    tables[table] = {}
+                    for name, kind in columns.items():
+                        column = archive[f'{table}_{name}']
+                        tables[table][name] = column.astype(object) if kind is str else column
+                paths = archive['paths'].tolist()
+                errors = list(zip((paths[i] for i in archive['error_files']), archive['error_messages'].tolist()))
+                return cls(paths, archive['sizes'], archive['mtimes'], tables,
+                           archive['row_offsets'], archive['trial_offsets'], errors)
+        except FileNotFoundError:
+            return cls()
+        except (OSError, KeyError, ValueError) as e:
+            logging.warning(f"Cache de lecture ignoré ({cache_path}): {e}")
+            return cls()
+
+    def save(self, cache_path: Path, fsync: str = "file"):
+        file_index = {path: i for i, path in enumerate(self.paths)}
+        arrays = {
+            'version': np.array(CACHE_VERSION),
+            'paths': np.array(self.paths, dtype=str),
+            'sizes': self.sizes,
+            'mtimes': self.mtimes,
+            'row_offsets': self.row_offsets,
+            'trial_offsets': self.trial_offsets,
+            'error_files': np.array([file_index[path] for path, _ in self.errors], dtype=np.int64),
+            'error_messages': np.array([message for _, message in self.errors], dtype=str),
+        }
+        for table, columns in self.TABLES.items():
+            for name, kind in columns.items():
+                column = self.tables[table][name]
+                arrays[f'{table}_{name}'] = column.astype(str) if kind is str else column
+        buffer = io.BytesIO()
+        np.savez(buffer, **arrays)
+        atomic_write(cache_path, buffer.getvalue(), fsync)
+
+    def lookup(self, path: str, size: int, mtime: int) -> Tuple[Optional[int], bool]:
+        """Indice du fichier dans le cache, et vrai si son empreinte rapide (taille, date) est inchangée"""
+        i = self.index.get(path)
+        if i is None:
+            return None, False
+        return i, bool(self.sizes[i] == size and self.mtimes[i] == mtime)
+
+    def result(self, counts=None) -> LoadResult:
+        trials = build_trials(self.tables['trial'], np.diff(self.trial_offsets), self.tables['file'])
+        return LoadResult(pd.DataFrame(self.tables['row']), trials, self.errors, counts)
+
+
+def file_hash(path: str) -> str:
+    try:
+        with open(path, 'rb') as f:
+            return content_hash(f.read())
+    except OSError:
+        return ""
+
+
+def merge_table(cache_offsets: np.ndarray, cache_columns: Chunk, new_counts: Sequence[np.ndarray],
+                new_columns: Sequence[Chunk], columns: Dict[str, type], cached_files: np.ndarray,
+                cached_indices: np.ndarray, parsed_files: np.ndarray) -> Tuple[np.ndarray, Chunk]:
+    """Tranches de chaque fichier, reprises du cache ou relues, rassemblées en un seul gather par colonne"""
+    new_counts = np.concatenate([np.empty(0, dtype=np.int64), *new_counts]).astype(np.int64)
+    n_files = len(cached_files) + len(parsed_files)
+    starts = np.empty(n_files, dtype=np.int64)
+    counts = np.empty(n_files, dtype=np.int64)
+    starts[cached_files] = cache_offsets[cached_indices]
+    counts[cached_files] = cache_offsets[cached_indices + 1] - cache_offsets[cached_indices]
+    starts[parsed_files] = np.cumsum(new_counts) - new_counts + cache_offsets[-1]
+    counts[parsed_files] = new_counts
+    index, offsets = ragged_gather(starts, counts)
+    merged = {name: np.concatenate([cache_columns[name]] + [chunk[name] for chunk in new_columns])[index]
+              for name in columns}
+    return offsets, merged
+
+
+def load_sessions_cached(paths: Sequence[Path], cache_path: Path, workers: Optional[int] = None,
+                         chunk_size: Optional[int] = None, rebuild: bool = False) -> LoadResult:
+    """
+    Charge des fichiers de session en ne relisant que ceux qui ont changé.
+
+    rebuild : ignore le cache existant et relit tous les fichiers. Les erreurs
+    retournées comprennent celles des fichiers repris du cache ; counts donne
+    le nombre de fichiers repris, relus et retirés du cache.
+    """
+    paths = [str(path) for path in paths]
+    cache = ParseCache() if rebuild else ParseCache.load(cache_path)
+    stats = [os.stat(path) for path in paths]
+    sizes = np.array([stat.st_size for stat in stats], dtype=np.int64)
+    mtimes = np.array([stat.st_mtime_ns for stat in stats], dtype=np.int64)
+
+    cached = []  # (fichier, indice dans le cache) des fichiers repris
+    to_parse = []
+    for i, path in enumerate(paths):
+        index, unchanged = cache.lookup(path, sizes[i], mtimes[i])
+        if index is not None and (unchanged or file_hash(path) == cache.tables['file']['hash'][index]):
+            cached.append((i, index))
+        else:
+            to_parse.append(i)
+    selection = {
+        'cached_files': np.array([i for i, _ in cached], dtype=np.int64),
+        'cached_indices': np.array([index for _, index in cached], dtype=np.int64),
+        'parsed_files': np.array(to_parse, dtype=np.int64),
+    }
+
+    results = parse_batches([paths[i] for i in to_parse], workers, chunk_size)
+    row_offsets, rows = merge_table(cache.row_offsets, cache.tables['row'], [batch.row_counts for batch in results],
+                                    [batch.rows for batch in results], ROW_COLUMNS, **selection)
+    trial_offsets, trials = merge_table(cache.trial_offsets, cache.tables['trial'],
+                                        [batch.trial_counts for batch in results],
+                                        [batch.trials for batch in results], TRIAL_COLUMNS, **selection)
+    # Une ligne par fichier : même rassemblement avec des tranches de longueur 1
+    _, files = merge_table(np.arange(len(cache.paths) + 1, dtype=np.int64), cache.tables['file'],
+                           [np.ones(len(batch.row_counts), dtype=np.int64) for batch in results],
+                           [batch.files for batch in results], FILE_COLUMNS, **selection)
+
+    reused = set(paths[i] for i, _ in cached)
+    errors = [error for error in cache.errors if error[0] in reused]
+    errors += [error for batch in results for error in batch.errors]
+    order = {path: i for i, path in enumerate(paths)}
+    errors.sort(key=lambda error: order[error[0]])
+
+    updated = ParseCache(paths, sizes, mtimes, {'row': rows, 'trial': trials, 'file': files},
+                         row_offsets, trial_offsets, errors)
+    removed = len(set(cache.paths) - set(paths))
+    touched = not np.array_equal(cache.mtimes[selection['cached_indices']], mtimes[selection['cached_files']])
+    if rebuild or to_parse or removed or touched:
+        try:
+            updated.save(cache_path)
+        except OSError as e:
+            logging.warning(f"Cache de lecture non enregistré ({cache_path}): {e}")
+    return updated.result({"cached": len(cached), "parsed": len(to_parse), "removed": removed})
@@ -0,0 +1,352 @@
+"""
+Simulation headless du jeu : horloge virtuelle, agents d'entrée scriptés ou
+stochastiques, sans affichage ni audio.
+
+Exemple :
+    python simulation.py --sessions 1000 --seed 42 --output simulated_data
+"""
+import argparse
+import random
+import time
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pygame
+
+from game import Game, FPS, WINDOW_WIDTH, WINDOW_HEIGHT
+from circuits import circuit_params, DEFAULT_SIZE, DEFAULT_TURN_DENSITY
+
+DIRECTION_KEYS = {
+    "left": pygame.K_LEFT,
+    "right": pygame.K_RIGHT,
+    "up": pygame.K_UP,
+    "down": pygame.K_DOWN,
+}
+
+
+class VirtualClock:
+    """Horloge virtuelle avancée manuellement par le moteur de simulation"""
+
+    def __init__(self, start=0.0):
+        self.current_time = start
+
+    def __call__(self):
+        return self.current_time
+
+    def advance(self, dt):
+        self.current_time += dt
+        return self.current_time
+
+
+class SilentSoundManager:
+    """Gestionnaire de son muet pour la simulation"""
+
+    def play_bip(self, volume=0.5):
+        pass
+
+    def reset_stats(self):
+        pass
+
+    def latency_summary(self):
+        return {"triggers": 0}
+
+
+def click_event(pos):
+    """Construit un clic gauche de souris"""
+    return pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=pos, button=1)
+
+
+def motion_event(pos):
+    """Construit un déplacement de la souris"""
+    return pygame.event.Event(pygame.MOUSEMOTION, pos=pos, rel=(0, 0), buttons=(0, 0, 0))
+
+
+def evaluation_events(game, category, value):
+    """Survol puis clic du bouton d'évaluation correspondant à une note"""
+    center = game.evaluation_buttons[category][value - 1].rect.center
+    return [motion_event(center), click_event(center)]
+
+
+def key_event(direction):
+    """Construit un appui sur une flèche de direction"""
+    return pygame.event.Event(pygame.KEYDOWN, key=DIRECTION_KEYS[direction], unicode="")
+
+
+class ScriptedAgent:
+    """
+    Agent qui rejoue un script d'entrées.
+
+    Le script est une liste de (temps relatif au début du niveau, niveau, événement)
+    où l'événement est ("click", (x, y)) ou ("key", direction).
+    """
+
+    def __init__(self, profile, script, evaluations):
+        self.profile = profile
+        self.script = sorted(script, key=lambda entry: (entry[1], entry[0]))
+        self.evaluations = evaluations
+        self.cursor = 0
+
+    def setup(self, game):
+        self.cursor = 0
+        return dict(self.profile)
+
+    def events(self, game, current_time):
+        elapsed = current_time - game.start_time
+        events = []
+        while self.cursor < len(self.script):
+            at, level, (kind, value) = self.script[self.cursor]
+            if level > game.current_level or (level == game.current_level and at > elapsed):
+                break
+            self.cursor += 1
+            if level < game.current_level:
+                continue
+            events.append(click_event(value) if kind == "click" else key_event(value))
+        return events
+
+    def evaluate(self, game):
+        return self.evaluations[game.current_level]
+
+
+class RandomAgent:
+    """
+    Agent stochastique : temps de réaction log-normaux, clics manqués,
+    déplacements le long du circuit avec erreurs de commande.
+    """
+
+    def __init__(self, seed=None, condition=None, reaction_median=0.3, reaction_sigma=0.25,
+                 miss_rate=0.1, key_interval=0.6, error_rate=0.1):
+        self.rng = random.Random(seed)
+        self.condition = condition
+        self.reaction_median = reaction_median
+        self.reaction_sigma = reaction_sigma
+        self.miss_rate = miss_rate
+        self.key_interval = key_interval
+        self.error_rate = error_rate
+        self.session_index = 0
+
+    def setup(self, game):
+        self.session_index += 1
+        self.pending_image = None
+        self.pending_bonus = None
+        self.seen_image_onset = None
+        self.seen_bonus_onset = None
+        self.seen_targets = set()
+        self.pending_targets = {}
+        self.next_key_time = 0
+        self.forward = True
+        condition = self.condition or self.rng.choice(["sync", "async", "random"])
+        heart_rate = self.rng.randint(55, 110)
+        if condition == "async" and heart_rate == 100:
+            heart_rate = 99
+        return {
+            "id": f"SIM{self.session_index:05d}",
+            "age": self.rng.randint(18, 65),
+            "gender": self.rng.choice(["homme", "femme"]),
+            "heart_rate_before": heart_rate,
+            "heart_rate_after": heart_rate + self.rng.randint(-5, 15),
+            "condition": condition,
+        }
+
+    def reaction_time(self):
+        return self.reaction_median * self.rng.lognormvariate(0, self.reaction_sigma)
+
+    def plan_click(self, onset, pos):
+        """Programme un clic (éventuellement à côté de la cible)"""
+        if self.rng.random() < self.miss_rate:
+            pos = (pos[0] + self.rng.choice([-60, 60]), pos[1] + self.rng.choice([-60, 60]))
+        return onset + self.reaction_time(), pos
+
+    def events(self, game, current_time):
+        events = []
+
+        # Nouvelle image affichée
+        if game.image_visible and game.image_last_toggle != self.seen_image_onset:
+            self.seen_image_onset = game.image_last_toggle
+            _, (x, y) = game.image_positions[game.current_level][game.current_image_index]
+            self.pending_image = self.plan_click(game.image_last_toggle, (x + 25, y + 25))
+        if self.pending_image and current_time >= self.pending_image[0]:
+            if game.image_visible:
+                events.append(click_event(self.pending_image[1]))
+            self.pending_image = None
+
+        # Nouveau bonus
+        if game.active_bonus and game.active_bonus["start_time"] != self.seen_bonus_onset:
+            self.seen_bonus_onset = game.active_bonus["start_time"]
+            x, y = game.active_bonus["position"]
+            self.pending_bonus = self.plan_click(self.seen_bonus_onset, (int(x), int(y)))
+        if self.pending_bonus and current_time >= self.pending_bonus[0]:
+            if game.active_bonus:
+                events.append(click_event(self.pending_bonus[1]))
+            self.pending_bonus = None
+
+        # Cibles du mode multi-cibles
+        for target in game.targets.active.values():
+            if target["id"] not in self.seen_targets:
+                self.seen_targets.add(target["id"])
+                self.pending_targets[target["id"]] = self.plan_click(target["onset"], target["rect"].center)
+        for target_id, (click_time, pos) in list(self.pending_targets.items()):
+            if current_time >= click_time:
+                del self.pending_targets[target_id]
+                if any(target["id"] == target_id for target in game.targets.active.values()):
+                    events.append(click_event(pos))
+
+        # Déplacement du mobile
+        if current_time >= self.next_key_time:
+            self.next_key_time = current_time + self.key_interval * self.rng.uniform(0.5, 1.5)
+            events.append(key_event(self.choose_direction(game)))
+
+        return events
+
+    def choose_direction(self, game):
+        """Choisit la direction vers le point suivant du circuit (ou une erreur)"""
+        if self.rng.random() < self.error_rate:
+            return self.rng.choice(list(DIRECTION_KEYS))
+
+        path = game.level_paths[game.current_level]
+        index = path.index(tuple(game.mobile_pos))
+        if index == len(path) - 1:
+            self.forward = False
+        elif index == 0:
+            self.forward = True
+        target = path[index + 1] if self.forward else path[index - 1]
+
+        dx = target[0] - path[index][0]
+        dy = target[1] - path[index][1]
+        if abs(dx) >= abs(dy):
+            return "right" if dx > 0 else "left"
+        return "down" if dy > 0 else "up"
+
+    def evaluate(self, game):
+        return {
+            "performance": self.rng.randint(1, 5),
+            "stress": self.rng.randint(1, 5),
+            "certitude": self.rng.randint(1, 3),
+        }
+
+
+class HeadlessSession:
+    """Exécute la machine à états du jeu (setup → playing → evaluation → finished) sur une horloge virtuelle"""
+
+    def __init__(self, agent, fps=FPS, data_dir="simulated_data", save=True, game=None, clock=None,
+                 telemetry=False, targets=0, circuit=None):
+        self.agent = agent
+        self.frame_duration = 1.0 / fps
+        self.clock = clock or VirtualClock()
+        self.game = game or Game(time_source=self.clock, sound_manager=SilentSoundManager(),
+                                 data_dir=data_dir, verbose=False, telemetry=telemetry, fsync="none",
+                                 journal=save, targets=targets, circuit=circuit)
+        if not save:
+            self.game.save_data = lambda: None
+
+    def run(self, seed=None):
+        """Joue une session complète et retourne les données de performance"""
+        game = self.game
+        game.reset_game(seed)
+        game.participant_data.update(self.agent.setup(game))
+        if not game.start_game():
+            raise ValueError(f"Profil de participant invalide : {game.participant_data}")
+
+        frames = 0
+        while game.game_state != "finished":
+            current_time = self.clock.advance(self.frame_duration)
+            frames += 1
+
+            if game.game_state == "playing":
+                for event in self.agent.events(game, current_time):
+                    game.handle_event(event)
+            elif game.game_state == "evaluation":
+                # Passage par les boutons, comme un participant (et enregistré pour le rejeu)
+                for category, value in self.agent.evaluate(game).items():
+                    for event in evaluation_events(game, category, value):
+                        game.handle_event(event)
+
+            game.step(current_time)
+            # Frame « affichée » à son instant virtuel : datation des apparitions comme après flip()
+            game.present(current_time)
+
+        return {
+            "participant_id": game.participant_data["id"],
+            "stimulus_seed": game.stimulus_seed,
+            "condition": game.participant_data["condition"],
+            "frames": frames,
+            "response_times": list(game.game_data["response_times"]),
+            "target_response_times": list(game.game_data["target_response_times"]),
+            "missed_bonus": game.game_data["missed_bonus"],
+            "command_errors": game.game_data["command_errors"],
+            "evaluations": list(game.game_data["level_evaluations"]),
+        }
+
+
+def simulate_sessions(n_sessions, seed=None, condition=None, fps=FPS, data_dir="simulated_data", save=True,
+                      workers=1, telemetry=False, targets=0, circuit=None):
+    """Génère n sessions synthétiques en réutilisant une seule instance de jeu par processus"""
+    if workers > 1:
+        counts = [n_sessions // workers + (1 if i < n_sessions % workers else 0) for i in range(workers)]
+        jobs = [
+            (count, None if seed is None else seed + i, condition, fps, data_dir, save, telemetry, targets,
+             circuit, sum(counts[:i]))
+            for i, count in enumerate(counts) if count
+        ]
+        # "spawn" : processus vierges, sans état SDL hérité du parent
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=len(jobs), mp_context=context) as executor:
+            chunks = list(executor.map(_simulate_chunk, *zip(*jobs)))
+        return [result for chunk in chunks for result in chunk]
+    return _simulate_chunk(n_sessions, seed, condition, fps, data_dir, save, telemetry, targets, circuit)
+
+
+def _simulate_chunk(n_sessions, seed, condition, fps, data_dir, save, telemetry, targets=0, circuit=None,
+                    first_index=0):
+    agent = RandomAgent(seed=seed, condition=condition)
+    agent.session_index = first_index
+    session = HeadlessSession(agent, fps=fps, data_dir=data_dir, save=save, telemetry=telemetry, targets=targets,
+                              circuit=circuit)
+    # Graines des chronologies de stimuli, reproductibles si seed est fixée
+    seeds = random.Random(seed)
+    results = [session.run(seeds.randrange(2 ** 32)) for _ in range(n_sessions)]
+    session.game.writer.close()  # Attend la fin des écritures en arrière-plan
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulation headless de sessions de jeu")
+    parser.add_argument("--sessions", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--condition", choices=["sync", "async", "random"], default=None)
+    parser.add_argument("--fps", type=int, default=FPS)
+    parser.add_argument("--output", default="simulated_data")
+    parser.add_argument("--no-save", action="store_true", help="Ne pas écrire les fichiers de session")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--telemetry", action="store_true", help="Enregistrer la télémétrie par frame")
+    parser.add_argument("--targets", type=int, default=0, help="Mode multi-cibles : nombre de cibles simultanées")
+    parser.add_argument("--circuit-seed", type=int, default=None,
+                        help="Circuits générés à partir de cette graine au lieu des circuits historiques")
+    parser.add_argument("--circuit-size", type=int, default=DEFAULT_SIZE, help="Longueur des circuits générés")
+    parser.add_argument("--circuit-step", type=int, default=None,
+                        help="Pas de la grille des circuits générés (par défaut, adapté à la longueur)")
+    parser.add_argument("--turn-density", type=float, default=DEFAULT_TURN_DENSITY,
+                        help="Probabilité de virage à chaque pas des circuits générés")
+    args = parser.parse_args()
+    circuit = None
+    if args.circuit_seed is not None:
+        try:
+            circuit = circuit_params((WINDOW_WIDTH, WINDOW_HEIGHT), args.circuit_seed, args.circuit_size,
+                                     args.turn_density, args.circuit_step)
+        except ValueError as e:
+            parser.error(str(e))
+
+    start = time.perf_counter()
+    results = simulate_sessions(args.sessions, seed=args.seed, condition=args.condition,
+                                fps=args.fps, data_dir=args.output, save=not args.no_save,
+                                workers=args.workers, telemetry=args.telemetry, targets=args.targets,
+                                circuit=circuit)
+    elapsed = time.perf_counter() - start
+
+    frames = sum(result["frames"] for result in results)
+    print(f"{len(results)} sessions simulées en {elapsed:.2f}s "
+          f"({len(results) / elapsed:.1f} sessions/s, {frames / elapsed:.0f} frames/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+"""
+Statistiques par cellule (condition × niveau) calculées en une seule passe.
+
+Les facteurs sont factorisés une fois ; les lignes sont triées une fois par
+cellule. Pour chaque colonne analysée, effectifs, sommes, sommes des carrés
+des écarts à la moyenne de la cellule, minimum et maximum par cellule sont
+obtenus par réductions NumPy (np.add.reduceat) sur ce tri. Tout le reste en
+découle sans relire les données :
+    - statistiques descriptives par cellule ou par niveau d'un facteur ;
+    - ANOVA à deux facteurs (effets principaux et interaction, sommes des
+      carrés de type II, exactes pour des plans déséquilibrés) : les modèles
+      emboîtés sont ajustés sur les moyennes de cellule pondérées par leurs
+      effectifs, ce qui équivaut à l'ajustement sur les lignes ;
+    - comparaisons post-hoc deux à deux (t sur la variance résiduelle de
+      l'ANOVA, correction de Holm) ;
+    - Kruskal-Wallis et t apparié par niveau d'un facteur.
+"""
+from itertools import combinations
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+# count, sum, m2 (somme des carrés des écarts à la moyenne), min, max :
+# une ligne par cellule, une colonne par variable
+Moments = Dict[str, np.ndarray]
+MOMENT_KEYS = ('count', 'sum', 'm2', 'min', 'max')
+
+
+def cell_projection(codes: Sequence[np.ndarray], shape: Sequence[int], count: np.ndarray,
+                    axes: Sequence[int]) -> Tuple[np.ndarray, int]:
+    """
+    Projection des moyennes de cellule sur un modèle additif des facteurs axes.
+
+    Moindres carrés pondérés par les effectifs : projection @ moyennes donne
+    les moyennes ajustées. Retourne aussi le rang du modèle.
+    """
+    design = np.column_stack(
+        [np.ones(len(count))] +
+        [(codes[axis][:, None] == np.arange(1, shape[axis])[None, :]).astype(np.float64) for axis in axes]
+    )
+    weighted = design.T * count
+    projection = design @ np.linalg.pinv(weighted @ design) @ weighted
+    return projection, int(np.linalg.matrix_rank(design))
+
+
+class StatsEngine:
+    """Moments par cellule des facteurs d'un DataFrame, et tests qui en dérivent"""
+
+    def __init__(self, frame: pd.DataFrame, factors: Sequence[str] = ('condition', 'level')):
+        self.frame = frame
+        self.factors = list(factors)
+        codes = []
+        self.levels = []
+        for factor in self.factors:
+            factor_codes, uniques = pd.factorize(frame[factor], sort=True)
+            codes.append(factor_codes)
+            self.levels.append(uniques)
+        self.shape = tuple(len(uniques) for uniques in self.levels)
+        cell = np.ravel_multi_index(codes, self.shape) if len(frame) else np.empty(0, dtype=np.int64)
+        # Tri unique des lignes par cellule, partagé par toutes les colonnes
+        self.order = np.argsort(cell, kind='stable')
+        self.cells, self.starts = np.unique(cell[self.order], return_index=True)
+        self.cell_codes = np.unravel_index(self.cells, self.shape)
+        self.cache: Dict[str, Moments] = {}
+
+    def moments(self, columns: Sequence[str]) -> Moments:
+        """Moments par cellule des colonnes (valeurs manquantes exclues), mis en cache par colonne"""
+        missing = [column for column in columns if column not in self.cache]
+        if missing and len(self.cells):
+            values = self.frame[missing].to_numpy(dtype=np.float64)[self.order]
+            present = ~np.isnan(values)
+            filled = np.where(present, values, 0.0)
+            count = np.add.reduceat(present.astype(np.int64), self.starts, axis=0)
+            total = np.add.reduceat(filled, self.starts, axis=0)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                mean = total / count
+            # Écarts à la moyenne de la cellule (deux passes, sans perte de précision sur de grandes valeurs)
+            deviations = np.where(present, values - np.repeat(mean, np.diff(np.append(self.starts, len(values))),
+                                                              axis=0), 0.0)
+            computed = {
+                'count': count,
+                'sum': total,
+                'm2': np.add.reduceat(deviations * deviations, self.starts, axis=0),
+                'min': np.fmin.reduceat(values, self.starts, axis=0),
+                'max': np.fmax.reduceat(values, self.starts, axis=0),
+            }
+            for j, column in enumerate(missing):
+                self.cache[column] = {key: array[:, j] for key, array in computed.items()}
+        elif missing:
+            for column in missing:
+                self.cache[column] = {key: np.empty(0) for key in MOMENT_KEYS}
+        return {key: np.column_stack([self.cache[column][key] for column in columns]) for key in MOMENT_KEYS}
+
+    def marginal(self, moments: Moments, by: Sequence[str]) -> Tuple[Moments, List[Tuple]]:
+        """Regroupe les moments des cellules selon un sous-ensemble des facteurs"""
+        axes = [self.factors.index(factor) for factor in by]
+        if axes == list(range(len(self.factors))):
+            keys = [tuple(self.levels[axis][self.cell_codes[axis][i]] for axis in axes)
+                    for i in range(len(self.cells))]
+            return moments, keys
+        group_codes = np.ravel_multi_index([self.cell_codes[axis] for axis in axes],
+                                           [self.shape[axis] for axis in axes])
+        groups, group_index = np.unique(group_codes, return_inverse=True)
+        n_columns = moments['count'].shape[1]
+        merged = {}
+        for key in ('count', 'sum', 'm2'):
+            merged[key] = np.zeros((len(groups), n_columns), dtype=moments[key].dtype)
+            np.add.at(merged[key], group_index, moments[key])
+        # Somme des carrés du groupe : intra-cellules + écarts des moyennes de cellule à celle du groupe
+        with np.errstate(invalid='ignore', divide='ignore'):
+            cell_mean = moments['sum'] / moments['count']
+            group_mean = merged['sum'] / merged['count']
+        spread = np.where(moments['count'] > 0, moments['count'] * (cell_mean - group_mean[group_index]) ** 2, 0.0)
+        np.add.at(merged['m2'], group_index, spread)
+        merged['min'] = np.full((len(groups), n_columns), np.inf)
+        np.fmin.at(merged['min'], group_index, moments['min'])
+        merged['max'] = np.full((len(groups), n_columns), -np.inf)
+        np.fmax.at(merged['max'], group_index, moments['max'])
+        group_levels = np.unravel_index(groups, [self.shape[axis] for axis in axes])
+        keys = [tuple(self.levels[axis][group_levels[k][i]] for k, axis in enumerate(axes))
+                for i in range(len(groups))]
+        return merged, keys
+
+    @staticmethod
+    def mean_std(moments: Moments) -> Tuple[np.ndarray, np.ndarray]:
+        count = moments['count']
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = moments['sum'] / count
+            variance = moments['m2'] / (count - 1)
+        return mean, np.where(count > 1, np.sqrt(variance), np.nan)
+
+    def describe(self, columns, statistics=('count', 'mean', 'std', 'min', 'max'), by=None) -> pd.DataFrame:
+        """Équivalent de frame.groupby(by)[columns].agg(statistics), sans relire les lignes"""
+        single = isinstance(columns, str)
+        columns = [columns] if single else list(columns)
+        by = list(by or self.factors)
+        moments, keys = self.marginal(self.moments(columns), by)
+        mean, std = self.mean_std(moments)
+        values = {'count': moments['count'], 'mean': mean, 'std': std, 'min': moments['min'], 'max': moments['max']}
+        index = pd.MultiIndex.from_tuples(keys, names=by) if len(by) > 1 else pd.Index([key[0] for key in keys],
+                                                                                       name=by[0])
+        if single:
+            return pd.DataFrame({statistic: values[statistic][:, 0] for statistic in statistics}, index=index)
+        data = {(column, statistic): values[statistic][:, j]
+                for j, column in enumerate(columns) for statistic in statistics}
+        return pd.DataFrame(data, index=index)
+
+    def anova(self, column: str) -> Dict[str, Dict[str, float]]:
+        """
+        ANOVA à deux facteurs (type II) : effets principaux, interaction et résidu.
+
+        Les sommes des carrés des modèles emboîtés sont calculées sur les
+        moyennes de cellule pondérées par les effectifs ; la somme des carrés
+        intra-cellule est le résidu du modèle complet.
+        """
+        if len(self.factors) != 2:
+            raise ValueError("L'ANOVA nécessite exactement deux facteurs")
+        moments = self.moments([column])
+        count = moments['count'][:, 0]
+        observed = count > 0
+        count = count[observed]
+        mean = moments['sum'][observed, 0] / count
+        within = float(np.sum(moments['m2'][observed, 0]))
+        codes = [cell_codes[observed] for cell_codes in self.cell_codes]
+        n_rows = int(count.sum())
+        n_cells = len(count)
+
+        def fit(*axes):
+            """Somme des carrés résiduelle et rang d'un modèle additif"""
+            projection, rank = cell_projection(codes, self.shape, count, axes)
+            return within + float(np.sum(count * (mean - projection @ mean) ** 2)), rank
+
+        rss_a, rank_a = fit(0)
+        rss_b, rank_b = fit(1)
+        rss_ab, rank_ab = fit(0, 1)
+        df_residual = n_rows - n_cells
+        mse = within / df_residual if df_residual > 0 else np.nan
+        effects = {
+            self.factors[0]: (rss_b - rss_ab, rank_ab - rank_b),
+            self.factors[1]: (rss_a - rss_ab, rank_ab - rank_a),
+            f"{self.factors[0]}:{self.factors[1]}": (rss_ab - within, n_cells - rank_ab),
+        }
+        results = {}
+        for name, (sum_squares, df) in effects.items():
+            with np.errstate(invalid='ignore', divide='ignore'):
+                f_statistic = (sum_squares / df) / mse if df > 0 else np.nan
+            results[name] = {
+                'sum_sq': float(sum_squares),
+                'df': int(df),
+                'f_statistic': float(f_statistic),
+                'p_value': float(stats.f.sf(f_statistic, df, df_residual)) if df > 0 else np.nan,
+            }
+        results['residual'] = {'sum_sq': within, 'df': int(df_residual), 'mean_sq': float(mse)}
+        return results
+
+    def posthoc(self, column: str, factor: str, anova: Dict[str, Dict[str, float]] = None) -> List[Dict[str, Any]]:
+        """Comparaisons deux à deux des niveaux d'un facteur (t sur l'erreur de l'ANOVA, correction de Holm)"""
+        anova = anova or self.anova(column)
+        mse = anova['residual']['mean_sq']
+        df_residual = anova['residual']['df']
+        moments, keys = self.marginal(self.moments([column]), [factor])
+        count = moments['count'][:, 0]
+        mean = moments['sum'][:, 0] / np.where(count > 0, count, np.nan)
+        pairs = list(combinations(range(len(keys)), 2))
+        if not pairs:
+            return []
+        first, second = np.array(pairs).T
+        difference = mean[first] - mean[second]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            t_statistic = difference / np.sqrt(mse * (1 / count[first] + 1 / count[second]))
+        p_values = 2 * stats.t.sf(np.abs(t_statistic), df_residual)
+        # Holm : p triées croissantes multipliées par (m - rang), puis rendues monotones
+        order = np.argsort(p_values)
+        adjusted = np.empty_like(p_values)
+        adjusted[order] = np.minimum(np.maximum.accumulate(p_values[order] * (len(pairs) - np.arange(len(pairs)))),
+                                     1.0)
+        return [
+            {
+                'contrast': f"{keys[i][0]} - {keys[j][0]}",
+                'difference': float(difference[k]),
+                't_statistic': float(t_statistic[k]),
+                'p_value': float(p_values[k]),
+                'p_holm': float(adjusted[k]),
+            }
+            for k, (i, j) in enumerate(pairs)
+        ]
+
+    def kruskal(self, column: str, factor: str) -> Tuple[float, float]:
+        """Kruskal-Wallis entre les niveaux d'un facteur (rangs calculés une fois)"""
+        values = self.frame[column].to_numpy(dtype=np.float64)
+        present = ~np.isnan(values)
+        codes = pd.factorize(self.frame[factor], sort=True)[0][present]
+        values = values[present]
+        n = len(values)
+        ranks = stats.rankdata(values)
+        rank_sums = np.bincount(codes, weights=ranks)
+        counts = np.bincount(codes)
+        used = counts > 0
+        if used.sum() < 2:
+            raise ValueError("Kruskal-Wallis nécessite au moins deux groupes")
+        h_statistic = 12.0 / (n * (n + 1)) * np.sum(rank_sums[used] ** 2 / counts[used]) - 3 * (n + 1)
+        ties = np.unique(values, return_counts=True)[1]
+        correction = 1 - np.sum(ties ** 3 - ties) / (n ** 3 - n)
+        h_statistic /= correction
+        return float(h_statistic), float(stats.chi2.sf(h_statistic, used.sum() - 1))
+
+    def paired_t(self, before: str, after: str, factor: str) -> Dict[Any, Tuple[float, float]]:
+        """t apparié (before - after) pour chaque niveau d'un facteur, à partir des moments des différences"""
+        differences = self.frame[before].to_numpy(dtype=np.float64) - self.frame[after].to_numpy(dtype=np.float64)
+        codes, levels = pd.factorize(self.frame[factor], sort=True)
+        count = np.bincount(codes, minlength=len(levels))
+        total = np.bincount(codes, weights=differences, minlength=len(levels))
+        squares = np.bincount(codes, weights=differences * differences, minlength=len(levels))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = total / count
+            std = np.sqrt(np.maximum(squares - count * mean * mean, 0.0) / (count - 1))
+            t_statistic = mean / (std / np.sqrt(count))
+        p_values = 2 * stats.t.sf(np.abs(t_statistic), count - 1)
+        return {level: (float(t_statistic[i]), float(p_values[i])) for i, level in enumerate(levels)}
@@ -0,0 +1,135 @@
+"""
+Cibles simultanées (mode multi-cibles) indexées dans une grille uniforme.
+
+Chaque cible occupe les quelques cases de la grille que couvre son
+rectangle : un clic ne teste que les cibles de sa case (O(1) en moyenne,
+quel que soit le nombre de cibles affichées). Chaque cible garde son propre
+instant d'apparition ; elle est comptée manquée si elle disparaît sans avoir
+été touchée.
+"""
+import pygame
+
+CELL_SIZE = 64  # Côté d'une case (px), supérieur à la taille des cibles
+
+
+class SpatialGrid:
+    """Grille uniforme : case → identifiants des rectangles qui la recouvrent"""
+
+    def __init__(self, cell_size=CELL_SIZE):
+        self.cell_size = cell_size
+        self.cells = {}
+        self.rects = {}
+
+    def cells_of(self, rect):
+        size = self.cell_size
+        return [
+            (cx, cy)
+            for cx in range(rect.left // size, (rect.right - 1) // size + 1)
+            for cy in range(rect.top // size, (rect.bottom - 1) // size + 1)
+        ]
+
+    def insert(self, key, rect):
+        self.rects[key] = rect
+        for cell in self.cells_of(rect):
+            self.cells.setdefault(cell, []).append(key)
+
+    def remove(self, key):
+        rect = self.rects.pop(key)
+        for cell in self.cells_of(rect):
+            keys = self.cells[cell]
+            keys.remove(key)
+            if not keys:
+                del self.cells[cell]
+
+    def query(self, point):
+        """Identifiants des rectangles contenant le point"""
+        keys = self.cells.get((point[0] // self.cell_size, point[1] // self.cell_size), ())
+        return [key for key in keys if self.rects[key].collidepoint(point)]
+
+    def clear(self):
+        self.cells = {}
+        self.rects = {}
+
+
+class TargetManager:
+    """Cibles actives, résolution des clics et bilan par cible"""
+
+    def __init__(self, cell_size=CELL_SIZE):
+        self.grid = SpatialGrid(cell_size)
+        self.reset()
+
+    def reset(self):
+        self.grid.clear()
+        self.active = {}  # emplacement → cible affichée
+        # Bilan des cibles disparues (le détail par cible est dans le journal)
+        self.finished = 0
+        self.hits = 0
+        self.hit_latency_total = 0.0
+        self.false_clicks = 0
+        self.next_id = 0
+
+    def show(self, slot, image_key, position, size, onset, level):
+        """Affiche une cible sur un emplacement (remplace la précédente s'il y en a une)"""
+        if slot in self.active:
+            self.hide(slot)
+        target = {
+            "id": self.next_id,
+            "slot": slot,
+            "level": level,
+            "image_key": image_key,
+            "rect": pygame.Rect(position, size),
+            "onset": onset,
+        }
+        self.next_id += 1
+        self.active[slot] = target
+        self.grid.insert(slot, target["rect"])
+        return target
+
+    def hide(self, slot):
+        """Retire une cible ; elle est manquée si elle n'a pas été touchée"""
+        target = self.active.pop(slot, None)
+        if target is None:
+            return None
+        self.grid.remove(slot)
+        self.finished += 1
+        return target
+
+    def hit(self, point, click_time):
+        """
+        Attribue un clic à la cible touchée la plus récente.
+
+        Retourne la cible et le temps de réaction, ou (None, None). Les clics
+        antérieurs à l'apparition d'une cible ne la touchent pas.
+        """
+        candidates = [self.active[slot] for slot in self.grid.query(point)
+                      if click_time >= self.active[slot]["onset"]]
+        if not candidates:
+            return None, None
+        target = max(candidates, key=lambda candidate: candidate["onset"])
+        response_time = click_time - target["onset"]
+        del self.active[target["slot"]]
+        self.grid.remove(target["slot"])
+        self.finished += 1
+        self.hits += 1
+        self.hit_latency_total += response_time
+        return target, response_time
+
+    def set_onset(self, slot, onset):
+        """Date l'apparition au moment de l'affichage réel (après flip)"""
+        if slot in self.active:
+            self.active[slot]["onset"] = onset
+
+    def clear(self):
+        """Fin de niveau : les cibles encore affichées sont manquées"""
+        for slot in list(self.active):
+            self.hide(slot)
+
+    def summary(self):
+        """Bilan agrégé des cibles disparues"""
+        return {
+            "targets": self.finished,
+            "hits": self.hits,
+            "misses": self.finished - self.hits,
+            "false_clicks": self.false_clicks,
+            "mean_hit_latency": self.hit_latency_total / self.hits if self.hits else None,
+        }
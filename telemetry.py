@@ -0,0 +1,79 @@
+"""
+Télémétrie par frame dans un tampon NumPy structuré pré-alloué.
+
+Chaque frame de jeu écrit un enregistrement de taille fixe directement dans
+les colonnes du tampon (aucun objet Python conservé, pas de croissance de
+liste) ; à la fin du niveau, take() retire les enregistrements que le jeu
+écrit d'un bloc sur disque (.npy, persistence.write_array).
+"""
+import numpy as np
+
+FRAME_DTYPE = np.dtype([
+    ("timestamp", "f8"),       # Temps de la frame (s, base de la source de temps du jeu)
+    ("level", "u1"),
+    ("mobile_node", "i4"),     # Nœud du graphe de navigation
+    ("mobile_x", "f4"),
+    ("mobile_y", "f4"),
+    ("image_index", "i2"),
+    ("image_visible", "?"),
+    ("bonus_active", "?"),
+    ("frame_time", "f4"),      # Durée depuis la frame précédente (s)
+    ("input_events", "u2"),    # Événements d'entrée traités pendant la frame
+])
+
+
+class TelemetryRecorder:
+    """
+    Tampon circulaire d'enregistrements par frame.
+
+    Si un niveau dépasse la capacité, les frames les plus anciennes sont
+    écrasées et comptées dans dropped.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.buffer = np.zeros(capacity, dtype=FRAME_DTYPE)
+        # Vues sur les colonnes : écriture champ par champ sans tuple intermédiaire
+        self.columns = {name: self.buffer[name] for name in FRAME_DTYPE.names}
+        self.count = 0
+        self.dropped = 0
+        self.total_frames = 0
+
+    def record(self, timestamp, level, mobile_node, mobile_x, mobile_y, image_index,
+               image_visible, bonus_active, frame_time, input_events):
+        index = self.count % self.capacity
+        columns = self.columns
+        columns["timestamp"][index] = timestamp
+        columns["level"][index] = level
+        columns["mobile_node"][index] = mobile_node
+        columns["mobile_x"][index] = mobile_x
+        columns["mobile_y"][index] = mobile_y
+        columns["image_index"][index] = image_index
+        columns["image_visible"][index] = image_visible
+        columns["bonus_active"][index] = bonus_active
+        columns["frame_time"][index] = frame_time
+        columns["input_events"][index] = input_events
+        self.count += 1
+
+    def frames(self):
+        """Copie ordonnée des enregistrements en attente"""
+        if self.count <= self.capacity:
+            return self.buffer[:self.count].copy()
+        start = self.count % self.capacity
+        return np.concatenate((self.buffer[start:], self.buffer[:start]))
+
+    def take(self):
+        """Retire et retourne les enregistrements en attente (copie), pour écriture différée"""
+        frames = self.frames()
+        self.dropped += max(0, self.count - self.capacity)
+        self.total_frames += len(frames)
+        self.count = 0
+        return frames
+
+    def reset(self):
+        self.count = 0
+        self.dropped = 0
+        self.total_frames = 0
+
+    def summary(self):
+        return {"frames": self.total_frames, "dropped": self.dropped}
@@ -0,0 +1,26 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+# Modules à plat à la racine du dépôt
+sys.path.insert(0, str(ROOT))
+
+
+@pytest.fixture(scope="session")
+def simulated_dir(tmp_path_factory):
+    """Sessions écrites par le jeu lui-même (simulation headless, fichiers JSON, journaux)"""
+    pytest.importorskip("pygame")
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    data_dir = tmp_path_factory.mktemp("simulated")
+    previous = os.getcwd()
+    os.chdir(ROOT)  # Chemins des images relatifs au dépôt
+    try:
+        from simulation import simulate_sessions
+        simulate_sessions(3, seed=11, data_dir=str(data_dir), targets=2)
+    finally:
+        os.chdir(previous)
+    return data_dir
@@ -0,0 +1,84 @@
+import os
+import time
+
+import pytest
+
+from heart_rate import FakeHeartRateDevice, RingBuffer, SerialHeartRateSource, parse_bpm
+
+posix_only = pytest.mark.skipif(os.name != "posix", reason="pseudo-terminal POSIX")
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_parse_bpm():
+    assert parse_bpm(b"72\n") == 72
+    assert parse_bpm(b"BPM:72.5\r\n") == 72.5
+    assert parse_bpm(b"BPM:7") is None
+    assert parse_bpm(b"---") is None
+
+
+def test_ring_buffer_keeps_last_samples():
+    buffer = RingBuffer(capacity=4)
+    for i in range(6):
+        buffer.push(float(i), 60.0 + i, 0.0)
+    times, values = buffer.recent()
+    assert times.tolist() == [2.0, 3.0, 4.0, 5.0]
+    assert values.tolist() == [62.0, 63.0, 64.0, 65.0]
+    assert buffer.dropped == 2
+    assert buffer.latest()[1] == 65.0
+    buffer.clear()
+    assert buffer.latest() is None
+
+
+@posix_only
+def test_serial_source_reads_fake_device():
+    pytest.importorskip("serial")
+    with FakeHeartRateDevice(bpm=80, variability=0.0, rate=100) as device:
+        source = SerialHeartRateSource(device.port).start()
+        try:
+            assert wait_for(lambda: len(source.stream()) >= 5)
+            assert source.current_bpm() == pytest.approx(80.0)
+            stream = source.stream()
+            assert all(bpm == pytest.approx(80.0) for _, bpm in stream)
+            assert [t for t, _ in stream] == sorted(t for t, _ in stream)
+
+            source.clear_stream()
+            assert source.stream() == [] or source.stream()[0][0] > stream[-1][0]
+            device.bpm = 120
+            assert wait_for(lambda: source.current_bpm() is not None and source.current_bpm() > 110)
+        finally:
+            source.stop()
+    assert source.errors == 0
+
+
+def test_smoothing_restarts_after_clear():
+    source = SerialHeartRateSource("unused", smoothing=0.5)
+    source.add_sample(0.0, 60.0)
+    source.add_sample(1.0, 80.0)
+    assert source.current_bpm() == 70.0
+    source.clear_stream()
+    assert source.current_bpm() is None
+    source.add_sample(2.0, 100.0)
+    assert source.current_bpm() == 100.0
+    assert source.stream() == [(2.0, 100.0)]
+
+
+def test_stream_reports_only_new_drops(capsys):
+    source = SerialHeartRateSource("unused", capacity=4)
+    for i in range(6):
+        source.add_sample(float(i), 60.0)
+    source.stream()
+    source.stream()
+    assert source.errors == 1
+    assert "2 échantillons" in capsys.readouterr().out
+    source.add_sample(6.0, 60.0)
+    source.stream()
+    assert source.errors == 2
+    assert "1 échantillons" in capsys.readouterr().out
@@ -0,0 +1,38 @@
+import json
+
+import pytest
+
+from journal import rebuild_session
+
+# Mesures propres au poste, absentes du journal
+NOT_JOURNALED = {"frame_profile", "input_capture", "audio", "kiosk"}
+
+
+def test_rebuild_matches_saved_session(simulated_dir):
+    sessions = [json.loads(path.read_text(encoding='utf-8')) for path in simulated_dir.glob("participant_*.json")]
+    saved_by_id = {data["participant_info"]["id"]: data for data in sessions}
+    journals = sorted((simulated_dir / "journal").glob("*.jsonl"))
+    assert len(journals) == len(saved_by_id)
+    for path in journals:
+        rebuilt = rebuild_session(path)
+        saved = saved_by_id[rebuilt["participant_info"]["id"]]
+        assert rebuilt["journal"]["complete"]
+        assert set(saved) <= set(rebuilt)
+        for key in NOT_JOURNALED:
+            assert rebuilt[key] is None
+
+        assert rebuilt["performance_data"]["target_response_times"] == pytest.approx(
+            saved["performance_data"]["target_response_times"])
+        assert rebuilt["targets"]["hits"] == saved["targets"]["hits"]
+        assert rebuilt["targets"]["misses"] == saved["targets"]["misses"]
+        assert rebuilt["targets"]["false_clicks"] == saved["targets"]["false_clicks"]
+        assert rebuilt["targets"]["mean_hit_latency"] == pytest.approx(saved["targets"]["mean_hit_latency"])
+        assert rebuilt["circuit"] == saved["circuit"]
+
+        assert rebuilt["onset_timing"]["pacing"] == saved["onset_timing"]["pacing"]
+        assert rebuilt["onset_timing"]["onsets"] == saved["onset_timing"]["onsets"]
+        for kind in ("image_on", "bip", "bonus", "target_on"):
+            if kind in saved["onset_timing"]:
+                assert rebuilt["onset_timing"][kind]["count"] == saved["onset_timing"][kind]["count"]
+                assert rebuilt["onset_timing"][kind]["mean_ms"] == pytest.approx(
+                    saved["onset_timing"][kind]["mean_ms"], abs=0.01)
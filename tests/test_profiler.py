@@ -0,0 +1,30 @@
+from profiler import FrameProfiler
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+def run_frame(profiler, clock, durations_ms, vsync):
+    profiler.begin_frame()
+    for phase, duration in durations_ms:
+        clock.now += int(duration * 1e6)
+        profiler.mark(phase, waiting=vsync and phase == "flip")
+    profiler.end_frame()
+
+
+def test_blocking_flip_is_not_work():
+    clock = FakeClock()
+    profiler = FrameProfiler(60, clock_ns=clock)
+    frame = [("events", 1), ("update", 2), ("draw", 3), ("flip", 12)]
+    run_frame(profiler, clock, frame, vsync=True)
+    assert profiler.over_budget_frames == 0
+    assert profiler.work.total_ns == 6_000_000
+    assert profiler.phases["flip"].total_ns == 12_000_000
+
+    run_frame(profiler, clock, frame, vsync=False)
+    assert profiler.over_budget_frames == 1
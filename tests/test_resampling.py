@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import resampling
+from resampling import resample
+from stats_engine import StatsEngine
+
+
+@pytest.fixture
+def engine():
+    rng = np.random.default_rng(7)
+    rows = []
+    for condition in ('async', 'random', 'sync'):
+        for level in (1, 2, 3):
+            for _ in range(int(rng.integers(4, 10))):
+                rows.append({'condition': condition, 'level': level,
+                             'rt': 0.2 + 0.1 * level + rng.normal(0, 0.05), 'stress': float(rng.integers(1, 6))})
+    return StatsEngine(pd.DataFrame(rows))
+
+
+def test_same_seed_same_results_across_worker_counts(engine, monkeypatch):
+    monkeypatch.setattr(resampling, 'TASK_SIZE', 150)
+    serial = resample(engine, ['rt', 'stress'], n_resamples=600, seed=3, workers=1)
+    monkeypatch.setattr(resampling, 'PARALLEL_MIN_WORK', 0)
+    parallel = resample(engine, ['rt', 'stress'], n_resamples=600, seed=3, workers=2)
+    pd.testing.assert_frame_equal(serial['bootstrap'], parallel['bootstrap'])
+    assert serial['permutation'] == parallel['permutation']
+
+
+def test_seed_changes_results(engine):
+    first = resample(engine, ['rt'], n_resamples=300, seed=1, workers=1)
+    again = resample(engine, ['rt'], n_resamples=300, seed=1, workers=1)
+    other = resample(engine, ['rt'], n_resamples=300, seed=2, workers=1)
+    pd.testing.assert_frame_equal(first['bootstrap'], again['bootstrap'])
+    assert not first['bootstrap'].equals(other['bootstrap'])
+
+
+def test_observed_statistics_and_intervals(engine):
+    result = resample(engine, ['rt'], n_resamples=2000, seed=0, workers=1)
+    anova = engine.anova('rt')
+    for effect, values in result['permutation']['rt'].items():
+        assert values['f_statistic'] == pytest.approx(anova[effect]['f_statistic'])
+        assert 1 / 2001 <= values['p_value'] <= 1
+    # Effet du niveau très marqué : aucune permutation ne l'atteint
+    assert result['permutation']['rt']['level']['p_value'] == pytest.approx(1 / 2001)
+
+    bootstrap = result['bootstrap'].loc['rt']
+    means = engine.frame.groupby(['condition', 'level'])['rt'].agg(['mean', 'count'])
+    np.testing.assert_allclose(bootstrap['mean'], means['mean'])
+    np.testing.assert_array_equal(bootstrap['n'], means['count'])
+    assert (bootstrap['ci_low'] <= bootstrap['mean']).all() and (bootstrap['mean'] <= bootstrap['ci_high']).all()
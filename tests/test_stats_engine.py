@@ -0,0 +1,128 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+
+from stats_engine import StatsEngine
+
+
+@pytest.fixture
+def frame():
+    """Plan déséquilibré 3 conditions × 3 niveaux, avec des valeurs manquantes"""
+    rng = np.random.default_rng(42)
+    sizes = {('async', 1): 7, ('async', 2): 12, ('async', 3): 5, ('random', 1): 9, ('random', 2): 4,
+             ('random', 3): 11, ('sync', 1): 6, ('sync', 2): 8, ('sync', 3): 13}
+    rows = []
+    for (condition, level), size in sizes.items():
+        shift = {'async': 0.0, 'random': 0.02, 'sync': -0.01}[condition]
+        for _ in range(size):
+            rows.append({'condition': condition, 'level': level,
+                         'rt': 0.25 + 0.05 * level + shift + rng.normal(0, 0.04),
+                         'hr_before': rng.normal(75, 8), 'hr_after': rng.normal(78, 8)})
+    frame = pd.DataFrame(rows).sample(frac=1, random_state=0).reset_index(drop=True)
+    frame.loc[[3, 17], 'rt'] = np.nan
+    return frame
+
+
+def ols_rss(frame, terms):
+    """Somme des carrés résiduelle d'une régression par moindres carrés (codage en indicatrices)"""
+    design = pd.get_dummies(frame[['condition', 'level']].astype(str), drop_first=True, dtype=float)
+    columns = [np.ones(len(frame))]
+    conditions = [c for c in design if c.startswith('condition_')]
+    levels = [c for c in design if c.startswith('level_')]
+    if 'condition' in terms:
+        columns += [design[c] for c in conditions]
+    if 'level' in terms:
+        columns += [design[c] for c in levels]
+    if 'interaction' in terms:
+        columns += [design[a] * design[b] for a in conditions for b in levels]
+    x = np.column_stack(columns)
+    residuals = frame['rt'] - x @ np.linalg.lstsq(x, frame['rt'], rcond=None)[0]
+    return float(residuals @ residuals)
+
+
+def test_anova_matches_type2_ols(frame):
+    data = frame.dropna(subset=['rt'])
+    full = ols_rss(data, {'condition', 'level', 'interaction'})
+    additive = ols_rss(data, {'condition', 'level'})
+    expected = {
+        'condition': ols_rss(data, {'level'}) - additive,
+        'level': ols_rss(data, {'condition'}) - additive,
+        'condition:level': additive - full,
+    }
+    result = StatsEngine(frame).anova('rt')
+    df_residual = len(data) - 9
+    assert result['residual']['df'] == df_residual
+    assert result['residual']['sum_sq'] == pytest.approx(full)
+    for effect, df in (('condition', 2), ('level', 2), ('condition:level', 4)):
+        sum_squares = expected[effect]
+        assert result[effect]['df'] == df
+        assert result[effect]['sum_sq'] == pytest.approx(sum_squares)
+        f_statistic = (sum_squares / df) / (full / df_residual)
+        assert result[effect]['f_statistic'] == pytest.approx(f_statistic)
+        assert result[effect]['p_value'] == pytest.approx(stats.f.sf(f_statistic, df, df_residual))
+
+
+def test_anova_matches_statsmodels(frame):
+    smf = pytest.importorskip("statsmodels.formula.api")
+    sm = pytest.importorskip("statsmodels.api")
+    model = smf.ols("rt ~ C(condition) * C(level)", data=frame.dropna(subset=['rt'])).fit()
+    table = sm.stats.anova_lm(model, typ=2)
+    result = StatsEngine(frame).anova('rt')
+    for effect, row in (('condition', 'C(condition)'), ('level', 'C(level)'),
+                        ('condition:level', 'C(condition):C(level)')):
+        assert result[effect]['sum_sq'] == pytest.approx(table.loc[row, 'sum_sq'])
+        assert result[effect]['f_statistic'] == pytest.approx(table.loc[row, 'F'])
+        assert result[effect]['p_value'] == pytest.approx(table.loc[row, 'PR(>F)'])
+
+
+def test_posthoc_uses_anova_error_and_holm(frame):
+    engine = StatsEngine(frame)
+    anova = engine.anova('rt')
+    mse, df_residual = anova['residual']['mean_sq'], anova['residual']['df']
+    groups = frame.dropna(subset=['rt']).groupby('level')['rt']
+    contrasts = engine.posthoc('rt', 'level', anova)
+    assert [c['contrast'] for c in contrasts] == ['1 - 2', '1 - 3', '2 - 3']
+
+    raw = []
+    for contrast in contrasts:
+        a, b = (int(level) for level in contrast['contrast'].split(' - '))
+        difference = groups.mean()[a] - groups.mean()[b]
+        t_statistic = difference / np.sqrt(mse * (1 / groups.count()[a] + 1 / groups.count()[b]))
+        assert contrast['difference'] == pytest.approx(difference)
+        assert contrast['t_statistic'] == pytest.approx(t_statistic)
+        raw.append(2 * stats.t.sf(abs(t_statistic), df_residual))
+    # Holm pas à pas
+    order = np.argsort(raw)
+    holm = np.empty(len(raw))
+    running = 0.0
+    for rank, index in enumerate(order):
+        running = max(running, min(1.0, raw[index] * (len(raw) - rank)))
+        holm[index] = running
+    for contrast, p_value, adjusted in zip(contrasts, raw, holm):
+        assert contrast['p_value'] == pytest.approx(p_value)
+        assert contrast['p_holm'] == pytest.approx(adjusted)
+
+
+def test_kruskal_matches_scipy(frame):
+    data = frame.dropna(subset=['rt'])
+    # Valeurs arrondies : ex aequo, pour tester la correction
+    data = data.assign(rt=data['rt'].round(2))
+    expected = stats.kruskal(*[group['rt'] for _, group in data.groupby('condition')])
+    h_statistic, p_value = StatsEngine(data).kruskal('rt', 'condition')
+    assert h_statistic == pytest.approx(expected.statistic)
+    assert p_value == pytest.approx(expected.pvalue)
+
+
+def test_paired_t_matches_scipy(frame):
+    result = StatsEngine(frame).paired_t('hr_before', 'hr_after', 'condition')
+    for condition, group in frame.groupby('condition'):
+        expected = stats.ttest_rel(group['hr_before'], group['hr_after'])
+        assert result[condition][0] == pytest.approx(expected.statistic)
+        assert result[condition][1] == pytest.approx(expected.pvalue)
+
+
+def test_describe_matches_pandas(frame):
+    result = StatsEngine(frame).describe(['rt'], ('count', 'mean', 'std', 'min', 'max'))
+    expected = frame.groupby(['condition', 'level'])[['rt']].agg(['count', 'mean', 'std', 'min', 'max'])
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False, check_names=False)
@@ -0,0 +1,105 @@
+import json
+
+import numpy as np
+import pytest
+
+from session_loader import load_sessions, load_sessions_cached
+from trials import TrialSet
+
+
+def make_trials():
+    # Trois fichiers : le deuxième est invalide (sans identifiant) mais a des essais
+    rt = np.array([0.3, 0.1, 0.2, 9.0, 9.0, 0.5, 0.4])
+    levels = np.array([2, 1, 1, 1, 2, 1, 3])
+    file_counts = np.array([3, 2, 2])
+    ids = np.array(["p1", "", "p2"], dtype=object)
+    conditions = np.array(["sync", "", "async"], dtype=object)
+    return TrialSet.from_files(rt, levels, file_counts, ids, conditions)
+
+
+def test_from_files_groups_by_session_and_level():
+    trials = make_trials()
+    assert trials.n_sessions == 2
+    np.testing.assert_array_equal(trials.rt, [0.1, 0.2, 0.3, 0.5, 0.4])
+    np.testing.assert_array_equal(trials.segment_levels, [1, 2, 1, 3])
+    np.testing.assert_array_equal(trials.session_offsets, [0, 2, 4])
+    np.testing.assert_array_equal(trials.cell(0, 1), [0.1, 0.2])
+    np.testing.assert_array_equal(trials.cell(1, 3), [0.4])
+    assert len(trials.cell(1, 2)) == 0
+
+
+def test_invalid_file_trials_are_dropped():
+    trials = make_trials()
+    assert 9.0 not in trials.rt
+    frame = trials.summary_frame()
+    assert list(frame['participant_id']) == ["p1", "p1", "p2", "p2"]
+    np.testing.assert_array_equal(trials.trial_conditions(), ["sync", "sync", "sync", "async", "async"])
+
+
+def test_grouped_quantiles_match_numpy():
+    rng = np.random.default_rng(0)
+    rt = rng.random(200)
+    levels = rng.integers(1, 4, 200)
+    trials = TrialSet.from_files(rt, levels, np.array([120, 80]), np.array(["a", "b"], dtype=object),
+                                 np.array(["sync", "async"], dtype=object))
+    table = trials.grouped_quantiles()
+    for row in table.itertuples():
+        selected = trials.select(row.condition, row.level)
+        assert row.trials == len(selected)
+        assert row.q50 == pytest.approx(np.quantile(selected, 0.5))
+        assert row.q90 == pytest.approx(np.quantile(selected, 0.9))
+
+
+def write_session(path, participant_id, evaluations, times, levels):
+    data = {
+        'participant_info': {'condition': 'sync', 'age': 30, 'gender': 'F', 'heart_rate_before': 70,
+                             'heart_rate_after': 75},
+        'evaluations': evaluations,
+        'performance_data': {'response_times': times, 'response_levels': levels, 'missed_bonus': 0,
+                             'command_errors': 0},
+    }
+    if participant_id is not None:
+        data['participant_info']['id'] = participant_id
+    path.write_text(json.dumps(data), encoding='utf-8')
+
+
+@pytest.mark.parametrize("cached", [False, True])
+def test_loader_drops_trials_without_session(tmp_path, cached):
+    evaluation = {'level': 1, 'avg_response_time': 0.35, 'performance': 3, 'stress': 2, 'certitude': 2}
+    write_session(tmp_path / "a.json", "p1", [evaluation], [0.3, 0.4], [1, 1])
+    write_session(tmp_path / "b.json", None, [evaluation], [9.0], [1])
+    write_session(tmp_path / "c.json", "p3", [{}], [8.0, 8.0], [1, 1])
+    paths = sorted(tmp_path.glob("*.json"))
+    if cached:
+        result = load_sessions_cached(paths, tmp_path / "cache.npz", workers=1)
+    else:
+        result = load_sessions(paths, workers=1)
+    assert result.trials.n_sessions == 1
+    np.testing.assert_array_equal(result.trials.rt, [0.3, 0.4])
+    assert set(result.frame['participant_id']) == set(result.trials.participant_ids)
+
+
+def test_loader_reads_files_written_by_the_game(simulated_dir):
+    paths = sorted(simulated_dir.glob("participant_*.json"))
+    result = load_sessions(paths, workers=1)
+    assert result.errors == []
+    assert len(result.frame) == 3 * len(paths)
+    assert result.trials.n_sessions == len(paths)
+    for path in paths:
+        data = json.loads(path.read_text(encoding='utf-8'))
+        performance = data['performance_data']
+        rows = result.frame[result.frame['participant_id'] == data['participant_info']['id']]
+        for row in rows.itertuples():
+            level_rt = [rt for rt, level in zip(performance['response_times'], performance['response_levels'])
+                        if level == row.level]
+            assert row.avg_response_time == pytest.approx(np.mean(level_rt))
+    assert result.trials.n_trials == sum(
+        len(json.loads(path.read_text(encoding='utf-8'))['performance_data']['response_times']) for path in paths)
+
+
+def test_loader_derives_level_means_for_older_game_files(tmp_path):
+    evaluation = {'level': 2, 'performance': 3, 'stress': 2, 'certitude': 2}
+    write_session(tmp_path / "a.json", "p1", [evaluation, {**evaluation, 'level': 3}], [0.3, 0.5, 0.2], [2, 2, 1])
+    frame = load_sessions([tmp_path / "a.json"], workers=1).frame
+    assert frame['avg_response_time'].iloc[0] == pytest.approx(0.4)
+    assert np.isnan(frame['avg_response_time'].iloc[1])
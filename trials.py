@@ -0,0 +1,195 @@
+"""
+Temps de réaction individuels (un par essai) en tableaux irréguliers.
+
+Tous les temps sont dans un seul tableau rt, rangés par session puis par
+niveau. Deux niveaux d'offsets (comme une liste de listes Arrow ou une
+matrice CSR) délimitent :
+    session_offsets[i]:session_offsets[i + 1] → segments de la session i
+    segment_offsets[j]:segment_offsets[j + 1] → essais du segment j
+Un segment regroupe les essais d'une session pour un niveau
+(segment_levels[j]). Le niveau 0 regroupe les essais des fichiers qui
+n'enregistrent pas le niveau de chaque réponse (response_levels).
+
+Aucun objet Python n'est créé par essai : les analyses travaillent sur des
+vues et des réductions NumPy (np.add.reduceat, np.repeat).
+"""
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+UNKNOWN_LEVEL = 0
+
+
+class TrialSet:
+    """Temps de réaction par session et par niveau, en tableaux plats"""
+
+    def __init__(self, rt: np.ndarray, segment_offsets: np.ndarray, segment_levels: np.ndarray,
+                 session_offsets: np.ndarray, participant_ids: np.ndarray, conditions: np.ndarray):
+        self.rt = rt
+        self.segment_offsets = segment_offsets
+        self.segment_levels = segment_levels
+        self.session_offsets = session_offsets
+        self.participant_ids = participant_ids
+        self.conditions = conditions
+
+    @classmethod
+    def empty(cls) -> "TrialSet":
+        return cls(np.empty(0), np.zeros(1, dtype=np.int64), np.empty(0, dtype=np.int64),
+                   np.zeros(1, dtype=np.int64), np.empty(0, dtype=object), np.empty(0, dtype=object))
+
+    @classmethod
+    def from_files(cls, rt: np.ndarray, levels: np.ndarray, file_counts: np.ndarray,
+                   participant_ids: np.ndarray, conditions: np.ndarray) -> "TrialSet":
+        """
+        Construit le jeu d'essais à partir des essais concaténés fichier par fichier.
+
+        file_counts : nombre d'essais de chaque fichier. Les fichiers sans
+        identifiant de participant (illisibles) ne forment pas de session :
+        leurs essais sont ignorés.
+        """
+        n_files = len(file_counts)
+        trial_files = np.repeat(np.arange(n_files), file_counts)
+        valid = participant_ids != ""
+        kept = valid[trial_files]
+        rt, levels, trial_files = rt[kept], levels[kept], trial_files[kept]
+        # Tri stable par fichier puis niveau : l'ordre des essais d'un niveau est conservé
+        order = np.lexsort((levels, trial_files))
+        rt = np.ascontiguousarray(rt[order], dtype=np.float64)
+        levels = levels[order]
+        trial_files = trial_files[order]
+
+        if len(rt):
+            change = (trial_files[1:] != trial_files[:-1]) | (levels[1:] != levels[:-1])
+            segment_starts = np.concatenate([[0], np.flatnonzero(change) + 1])
+        else:
+            segment_starts = np.empty(0, dtype=np.int64)
+        segment_offsets = np.append(segment_starts, len(rt)).astype(np.int64)
+        segment_levels = levels[segment_starts].astype(np.int64)
+
+        session_of_file = np.cumsum(valid) - 1
+        segment_sessions = session_of_file[trial_files[segment_starts]]
+        n_sessions = int(valid.sum())
+        session_offsets = np.searchsorted(segment_sessions, np.arange(n_sessions + 1)).astype(np.int64)
+        return cls(rt, segment_offsets, segment_levels, session_offsets,
+                   participant_ids[valid].astype(object), conditions[valid].astype(object))
+
+    @property
+    def n_trials(self) -> int:
+        return len(self.rt)
+
+    @property
+    def n_segments(self) -> int:
+        return len(self.segment_levels)
+
+    @property
+    def n_sessions(self) -> int:
+        return len(self.participant_ids)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(array.nbytes for array in (self.rt, self.segment_offsets, self.segment_levels,
+                                              self.session_offsets))
+
+    def segment_counts(self) -> np.ndarray:
+        return np.diff(self.segment_offsets)
+
+    def segment_sessions(self) -> np.ndarray:
+        """Session de chaque segment"""
+        return np.repeat(np.arange(self.n_sessions), np.diff(self.session_offsets))
+
+    def trial_segments(self) -> np.ndarray:
+        """Segment de chaque essai"""
+        return np.repeat(np.arange(self.n_segments), self.segment_counts())
+
+    def trial_levels(self) -> np.ndarray:
+        return np.repeat(self.segment_levels, self.segment_counts())
+
+    def trial_sessions(self) -> np.ndarray:
+        return self.segment_sessions()[self.trial_segments()]
+
+    def trial_conditions(self) -> np.ndarray:
+        return self.conditions[self.trial_sessions()]
+
+    def session(self, index: int) -> np.ndarray:
+        """Essais d'une session (vue, tous niveaux)"""
+        start = self.segment_offsets[self.session_offsets[index]]
+        end = self.segment_offsets[self.session_offsets[index + 1]]
+        return self.rt[start:end]
+
+    def cell(self, index: int, level: int) -> np.ndarray:
+        """Essais d'une session pour un niveau (vue, vide si aucun)"""
+        first, last = self.session_offsets[index], self.session_offsets[index + 1]
+        segment = first + np.searchsorted(self.segment_levels[first:last], level)
+        if segment == last or self.segment_levels[segment] != level:
+            return self.rt[:0]
+        return self.rt[self.segment_offsets[segment]:self.segment_offsets[segment + 1]]
+
+    def segment_stats(self) -> Dict[str, np.ndarray]:
+        """Nombre d'essais, moyenne et écart-type (ddof=1) de chaque segment"""
+        counts = self.segment_counts()
+        if not self.n_trials:
+            empty = np.empty(0)
+            return {"count": counts, "mean": empty, "std": empty}
+        starts = self.segment_offsets[:-1]
+        sums = np.add.reduceat(self.rt, starts)
+        squares = np.add.reduceat(self.rt * self.rt, starts)
+        mean = sums / counts
+        with np.errstate(invalid="ignore", divide="ignore"):
+            variance = np.maximum(squares - counts * mean * mean, 0.0) / (counts - 1)
+        std = np.where(counts > 1, np.sqrt(variance), np.nan)
+        return {"count": counts, "mean": mean, "std": std}
+
+    def select(self, condition: Optional[str] = None, level: Optional[int] = None) -> np.ndarray:
+        """Essais d'une condition et/ou d'un niveau (copie)"""
+        mask = np.ones(self.n_segments, dtype=bool)
+        if condition is not None:
+            mask &= self.conditions[self.segment_sessions()] == condition
+        if level is not None:
+            mask &= self.segment_levels == level
+        return self.rt[np.repeat(mask, self.segment_counts())]
+
+    def grouped_quantiles(self, quantiles=(0.1, 0.5, 0.9)) -> pd.DataFrame:
+        """
+        Nombre, moyenne et quantiles des essais par condition et niveau.
+
+        Un seul tri (clé de groupe, temps) pour tous les groupes ; les
+        quantiles sont interpolés linéairement, comme np.quantile.
+        """
+        if not self.n_trials:
+            return pd.DataFrame(columns=["condition", "level", "trials", "mean"] +
+                                [f"q{round(q * 100)}" for q in quantiles])
+        condition_codes, condition_names = pd.factorize(self.conditions)
+        n_levels = int(self.segment_levels.max()) + 1
+        segment_keys = condition_codes[self.segment_sessions()] * n_levels + self.segment_levels
+        trial_keys = np.repeat(segment_keys, self.segment_counts())
+        order = np.lexsort((self.rt, trial_keys))
+        sorted_rt = self.rt[order]
+        keys, starts, counts = np.unique(trial_keys[order], return_index=True, return_counts=True)
+
+        result = {
+            "condition": np.asarray(condition_names, dtype=object)[keys // n_levels],
+            "level": keys % n_levels,
+            "trials": counts,
+            "mean": np.add.reduceat(sorted_rt, starts) / counts,
+        }
+        for q in quantiles:
+            position = starts + q * (counts - 1)
+            lower = np.floor(position).astype(np.int64)
+            upper = np.ceil(position).astype(np.int64)
+            fraction = position - lower
+            result[f"q{round(q * 100)}"] = sorted_rt[lower] * (1 - fraction) + sorted_rt[upper] * fraction
+        return pd.DataFrame(result)
+
+    def summary_frame(self) -> pd.DataFrame:
+        """Une ligne par segment (session × niveau) : nombre d'essais, moyenne, écart-type"""
+        stats = self.segment_stats()
+        sessions = self.segment_sessions()
+        return pd.DataFrame({
+            "participant_id": self.participant_ids[sessions],
+            "condition": self.conditions[sessions],
+            "level": self.segment_levels,
+            "trials": stats["count"],
+            "mean_rt": stats["mean"],
+            "sd_rt": stats["std"],
+        })